@@ -0,0 +1,82 @@
+"""
+AI Result Cache
+================================================================================
+Per-restaurant cache for the /ai/* analyses, keyed by
+    (restaurant, analyzer, parameters, data version)
+
+The data version is a row in `data_versions` that every write path touching
+orders, menu items, inventory or reservations bumps in its own transaction, so
+all gunicorn workers see a write immediately. A cached result is therefore
+reused only until the underlying data changes (or the TTL passes, which bounds
+drift in "today"-relative figures when nothing is written).
+================================================================================
+"""
+
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+import os
+import threading
+import time
+import metrics
+import models
+from ai import rollups
+
+MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", 512))
+TTL_SECONDS = float(os.getenv("AI_CACHE_TTL_SECONDS", 300))
+
+_entries = OrderedDict()  # key -> (stored_at, result)
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# WRITE SIDE
+# ─────────────────────────────────────────────────────────────────────────────
+def bump_version(db: Session, restaurant_id: int):
+    """Invalidate every cached analysis for a restaurant (call before the write's commit)."""
+    if restaurant_id:
+        rollups.increment(db, models.DataVersion, ["restaurant_id"], [
+            {"restaurant_id": restaurant_id, "version": 1},
+        ])
+
+
+def current_version(db: Session, restaurant_id: int) -> int:
+    return db.query(models.DataVersion.version).filter(
+        models.DataVersion.restaurant_id == restaurant_id
+    ).scalar() or 0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# READ SIDE
+# ─────────────────────────────────────────────────────────────────────────────
+def cached(db: Session, restaurant_id: int, analyzer: str, compute, **params):
+    """Return `compute()` for this analyzer, reusing the last result if the restaurant's data is unchanged.
+
+    Results are shared between requests — callers must not mutate them.
+    """
+    key = (restaurant_id, analyzer, tuple(sorted(params.items())), current_version(db, restaurant_id))
+    now = time.monotonic()
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry and now - entry[0] < TTL_SECONDS:
+            _entries.move_to_end(key)
+            stats["hits"] += 1
+            metrics.cache_lookup("result", analyzer, hit=True)
+            return entry[1]
+        stats["misses"] += 1
+    metrics.cache_lookup("result", analyzer, hit=False)
+
+    result = compute()
+
+    with _lock:
+        _entries[key] = (now, result)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return result
+
+
+def clear():
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,235 @@
+"""
+Analysis Context
+================================================================================
+One snapshot of a restaurant's data per request, shared by every AI service.
+
+Each piece of the snapshot is a column-only (mostly pre-aggregated) query that
+runs the first time an analyzer asks for it and is then reused, so the
+dashboard scans `orders` / `order_items` once instead of once per analyzer:
+  - menu_items          (id, name, price, cost_price, category, avg_prep_minutes)
+  - order_summary       orders grouped by status × order type × day
+  - item_sales          per-item qty/revenue (all-time, last 7d, days 8-30)
+  - item_hourly         per-item qty by local hour of day
+  - reservations, tables, inventory_items
+  - stock_days          daily stock rollup rows (last 30 days)
+  - recipes             recipe lines (menu item, inventory item, qty per portion)
+
+Days and hours are restaurant-local (ai/timebuckets.py), bucketed in SQL.
+
+`with_session` hands the same snapshot to another thread with its own
+Session; pieces are loaded under a per-piece lock so each loads only once.
+================================================================================
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, and_
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+import copy
+import threading
+import models
+from ai.timebuckets import local_date, local_hour, local_today
+
+NOT_CANCELLED = [s for s in models.OrderStatus if s != models.OrderStatus.CANCELLED]
+
+
+class AnalysisContext:
+    def __init__(self, db: Session, restaurant_id: int, now: datetime = None):
+        self.db = db
+        self.restaurant_id = restaurant_id
+        self.now = now or datetime.utcnow()
+        self.today = local_today(self.now)
+        self._snapshot = {}
+        self._locks = defaultdict(threading.Lock)
+        self._guard = threading.Lock()
+
+    def with_session(self, db: Session) -> "AnalysisContext":
+        """Same snapshot, different Session — for running analyzers on another thread."""
+        other = copy.copy(self)
+        other.db = db
+        return other
+
+    def _get(self, name, loader):
+        if name not in self._snapshot:
+            with self._guard:
+                lock = self._locks[name]
+            with lock:
+                if name not in self._snapshot:
+                    self._snapshot[name] = loader()
+        return self._snapshot[name]
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # MENU
+    # ─────────────────────────────────────────────────────────────────────────
+    @property
+    def menu_items(self) -> list:
+        return self._get("menu_items", lambda: self.db.query(
+            models.MenuItem.id,
+            models.MenuItem.name,
+            models.MenuItem.price,
+            models.MenuItem.cost_price,
+            models.MenuItem.category,
+            models.MenuItem.avg_prep_minutes,
+        ).filter(models.MenuItem.restaurant_id == self.restaurant_id).all())
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # ORDERS
+    # ─────────────────────────────────────────────────────────────────────────
+    @property
+    def order_summary(self) -> list:
+        """Rows of (status, order_type, local day, orders, revenue, first_created_at)."""
+        return self._get("order_summary", self._load_order_summary)
+
+    def _load_order_summary(self):
+        day = local_date(models.Order.created_at)
+        return (
+            self.db.query(
+                models.Order.status,
+                models.Order.order_type,
+                day,
+                func.count(models.Order.id),
+                func.coalesce(func.sum(models.Order.total), 0),
+                func.min(models.Order.created_at),
+            )
+            .filter(models.Order.restaurant_id == self.restaurant_id)
+            .group_by(models.Order.status, models.Order.order_type, day)
+            .all()
+        )
+
+    def order_totals(self, statuses=None, order_type=None, day: date = None) -> tuple:
+        """(order count, revenue) over the order summary, optionally filtered."""
+        count = revenue = 0
+        for status, otype, d, n, rev, _ in self.order_summary:
+            if statuses is not None and status not in statuses:
+                continue
+            if order_type is not None and otype != order_type:
+                continue
+            if day is not None and d != day:
+                continue
+            count += n
+            revenue += rev
+        return count, revenue
+
+    @property
+    def first_order_at(self):
+        firsts = [first for *_, first in self.order_summary if first]
+        return min(firsts) if firsts else None
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # ORDER ITEMS (non-cancelled orders only)
+    # ─────────────────────────────────────────────────────────────────────────
+    @property
+    def item_sales(self) -> dict:
+        """menu_item_id → {qty, revenue, qty_7d, qty_8_30d} in one grouped pass."""
+        return self._get("item_sales", self._load_item_sales)
+
+    def _load_item_sales(self):
+        seven_days_ago = self.now - timedelta(days=7)
+        thirty_days_ago = self.now - timedelta(days=30)
+        qty = models.OrderItem.quantity
+        rows = (
+            self.db.query(
+                models.OrderItem.menu_item_id,
+                func.sum(qty),
+                func.sum(qty * models.OrderItem.unit_price),
+                func.sum(case((models.Order.created_at >= seven_days_ago, qty), else_=0)),
+                func.sum(case((and_(
+                    models.Order.created_at >= thirty_days_ago,
+                    models.Order.created_at < seven_days_ago,
+                ), qty), else_=0)),
+            )
+            .join(models.Order)
+            .filter(models.Order.restaurant_id == self.restaurant_id, models.Order.status != models.OrderStatus.CANCELLED)
+            .group_by(models.OrderItem.menu_item_id)
+            .all()
+        )
+        return {
+            r[0]: {"qty": int(r[1]), "revenue": int(r[2]), "qty_7d": int(r[3]), "qty_8_30d": int(r[4])}
+            for r in rows
+        }
+
+    @property
+    def item_hourly(self) -> dict:
+        """menu_item_id → {local hour: qty}."""
+        return self._get("item_hourly", self._load_item_hourly)
+
+    def _load_item_hourly(self):
+        hour = local_hour(models.Order.created_at)
+        rows = (
+            self.db.query(
+                models.OrderItem.menu_item_id,
+                hour,
+                func.sum(models.OrderItem.quantity),
+            )
+            .join(models.Order)
+            .filter(models.Order.restaurant_id == self.restaurant_id, models.Order.status != models.OrderStatus.CANCELLED)
+            .group_by(models.OrderItem.menu_item_id, hour)
+            .all()
+        )
+        hourly = defaultdict(lambda: defaultdict(int))
+        for item_id, h, qty in rows:
+            hourly[item_id][h] = int(qty)
+        return hourly
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # RESERVATIONS & TABLES
+    # ─────────────────────────────────────────────────────────────────────────
+    @property
+    def reservations(self) -> list:
+        return self._get("reservations", lambda: self.db.query(
+            models.Reservation.id,
+            models.Reservation.table_id,
+            models.Reservation.party_size,
+            models.Reservation.reservation_date,
+            models.Reservation.reservation_time,
+            models.Reservation.status,
+            models.Reservation.deposit_paid,
+            models.Reservation.created_at,
+        ).filter(models.Reservation.restaurant_id == self.restaurant_id).all())
+
+    @property
+    def tables(self) -> list:
+        return self._get("tables", lambda: self.db.query(
+            models.Table.id, models.Table.table_number, models.Table.capacity,
+        ).filter(models.Table.restaurant_id == self.restaurant_id).all())
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # INVENTORY
+    # ─────────────────────────────────────────────────────────────────────────
+    @property
+    def inventory_items(self) -> list:
+        return self._get("inventory_items", lambda: self.db.query(
+            models.InventoryItem.id,
+            models.InventoryItem.item_name,
+            models.InventoryItem.quantity,
+            models.InventoryItem.unit,
+            models.InventoryItem.cost_per_unit,
+            models.InventoryItem.low_stock_threshold,
+            models.InventoryItem.expiry_days,
+        ).filter(models.InventoryItem.restaurant_id == self.restaurant_id).all())
+
+    @property
+    def stock_days(self) -> list:
+        """Daily stock rollup rows (item, day, out/in/waste/adjust qty) for the last 30 local days, today included.
+
+        Callers run rollups.ensure_stock_rollups first.
+        """
+        return self._get("stock_days", lambda: self.db.query(
+            models.StockDailyRollup.inventory_item_id,
+            models.StockDailyRollup.day,
+            models.StockDailyRollup.out_qty,
+            models.StockDailyRollup.in_qty,
+            models.StockDailyRollup.waste_qty,
+            models.StockDailyRollup.adjust_qty,
+        ).filter(
+            models.StockDailyRollup.restaurant_id == self.restaurant_id,
+            models.StockDailyRollup.day > local_today(self.now - timedelta(days=30)),
+        ).all())
+
+    @property
+    def recipes(self) -> list:
+        return self._get("recipes", lambda: self.db.query(
+            models.Recipe.menu_item_id,
+            models.Recipe.inventory_item_id,
+            models.Recipe.quantity,
+        ).filter(models.Recipe.restaurant_id == self.restaurant_id).all())
@@ -11,51 +11,42 @@ Full-depth inventory analytics including:
   7. Optimal reorder quantity (EOQ approximation)
   8. Waste percentage analysis (waste vs. total usage)
   9. Procurement cost analytics (total spend, cost trend)
-  10. Ingredient → menu item dependency mapping
+  10. Ingredient → menu item dependency mapping (from recipes: portions left
+      per dish, dishes blocked by low or out-of-stock ingredients)
   11. Day-of-week usage pattern (which days consume most of each item)
   12. Stock health heatmap data
   13. Multi-tier alerting (critical / warning / info)
 ================================================================================
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import timedelta
+from ai.context import AnalysisContext
+from ai import rollups
+from ai.timebuckets import local_today, to_local
 import math
-import models
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # MAIN ENTRY POINT
 # ─────────────────────────────────────────────────────────────────────────────
-def get_inventory_predictions(db: Session, restaurant_id: int) -> dict:
+def get_inventory_predictions(ctx: AnalysisContext) -> dict:
     """Complete inventory intelligence — exhaustive analysis."""
-    items = db.query(models.InventoryItem).filter(
-        models.InventoryItem.restaurant_id == restaurant_id
-    ).all()
+    items = ctx.inventory_items
 
     if not items:
         return _empty_response()
 
-    now = datetime.utcnow()
+    now = ctx.now
     thirty_days_ago = now - timedelta(days=30)
     seven_days_ago = now - timedelta(days=7)
 
-    # Pre-fetch ALL movements in one query (avoid N+1)
-    all_movements = (
-        db.query(models.StockMovement)
-        .filter(
-            models.StockMovement.inventory_item_id.in_([i.id for i in items]),
-            models.StockMovement.created_at >= thirty_days_ago,
-        )
-        .all()
-    )
-
-    # Group movements by item
-    movements_by_item = defaultdict(list)
-    for m in all_movements:
-        movements_by_item[m.inventory_item_id].append(m)
+    # Up to 31 daily rollup rows per item instead of every movement
+    rollups.ensure_stock_rollups(ctx.db, ctx.restaurant_id)
+    days_by_item = defaultdict(list)
+    for d in ctx.stock_days:
+        days_by_item[d.inventory_item_id].append(d)
+    dependencies = _ingredient_dependencies(ctx.recipes, ctx.menu_items)
 
     predictions = []
     alerts = []
@@ -63,8 +54,9 @@ def get_inventory_predictions(db: Session, restaurant_id: int) -> dict:
     total_monthly_spend = 0
 
     for item in items:
-        movements = movements_by_item.get(item.id, [])
-        analysis = _analyze_single_item(item, movements, now, thirty_days_ago, seven_days_ago)
+        analysis = _analyze_single_item(
+            item, days_by_item.get(item.id, []), dependencies.get(item.id, []), now, thirty_days_ago, seven_days_ago,
+        )
         predictions.append(analysis["prediction"])
         alerts.extend(analysis["alerts"])
         total_inventory_value += analysis["prediction"]["current_value"]
@@ -81,6 +73,9 @@ def get_inventory_predictions(db: Session, restaurant_id: int) -> dict:
     high_spoilage = sum(1 for p in predictions if p["spoilage_risk"] >= 70)
     fast_movers = sum(1 for p in predictions if p["velocity"] == "fast")
     slow_movers = sum(1 for p in predictions if p["velocity"] == "slow")
+    menu_items_at_risk = len({
+        dish["menu_item_id"] for p in predictions if p["status"] in ("critical", "low") for dish in p["used_in"]
+    })
 
     # Sort by urgency
     priority_order = {"critical": 0, "low": 1, "reorder": 2, "ok": 3}
@@ -107,6 +102,7 @@ def get_inventory_predictions(db: Session, restaurant_id: int) -> dict:
             "high_spoilage_items": high_spoilage,
             "fast_movers": fast_movers,
             "slow_movers": slow_movers,
+            "menu_items_at_risk": menu_items_at_risk,
             "alerts_count": len(alerts),
             "abc_breakdown": {
                 "A": sum(1 for p in predictions if p["abc_class"] == "A"),
@@ -122,27 +118,22 @@ def get_inventory_predictions(db: Session, restaurant_id: int) -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # SINGLE-ITEM DEEP ANALYSIS
 # ─────────────────────────────────────────────────────────────────────────────
-def _analyze_single_item(item, movements, now, thirty_days_ago, seven_days_ago):
-    """Exhaustive analysis for a single inventory item."""
+def _analyze_single_item(item, days, used_in, now, thirty_days_ago, seven_days_ago):
+    """Exhaustive analysis for a single inventory item, from its daily stock rollup rows and the dishes using it."""
     alerts = []
 
-    # ── Separate OUT / IN / ADJUST movements ──
-    outs = [m for m in movements if m.movement_type == models.StockMovementType.OUT]
-    ins = [m for m in movements if m.movement_type == models.StockMovementType.IN]
-    adjusts = [m for m in movements if m.movement_type == models.StockMovementType.ADJUST]
-
-    total_out_30d = sum(m.quantity for m in outs)
-    total_in_30d = sum(m.quantity for m in ins)
+    # ── OUT / IN totals ──
+    total_out_30d = sum(d.out_qty for d in days)
+    total_in_30d = sum(d.in_qty for d in days)
     days_tracked = max((now - thirty_days_ago).days, 1)
 
     # ── Daily Usage ──
     daily_usage = total_out_30d / days_tracked
 
     # ── Recent 7-day vs Previous 23-day trend ──
-    recent_outs = [m for m in outs if m.created_at >= seven_days_ago]
-    older_outs = [m for m in outs if m.created_at < seven_days_ago]
-    recent_7d_usage = sum(m.quantity for m in recent_outs)
-    older_23d_usage = sum(m.quantity for m in older_outs)
+    # Last 7 local days, today included
+    recent_7d_usage = sum(d.out_qty for d in days if d.day > local_today(seven_days_ago))
+    older_23d_usage = total_out_30d - recent_7d_usage
 
     daily_usage_recent = recent_7d_usage / 7 if recent_7d_usage else daily_usage
     daily_usage_older = older_23d_usage / 23 if older_23d_usage else daily_usage
@@ -160,7 +151,7 @@ def _analyze_single_item(item, movements, now, thirty_days_ago, seven_days_ago):
     # ── Depletion Forecast ──
     if adjusted_daily > 0:
         days_until_depletion = round(item.quantity / adjusted_daily, 1)
-        depletion_date = (now + timedelta(days=days_until_depletion)).strftime("%Y-%m-%d")
+        depletion_date = (to_local(now) + timedelta(days=days_until_depletion)).strftime("%Y-%m-%d")
     else:
         days_until_depletion = None
         depletion_date = "N/A (no usage)"
@@ -211,8 +202,7 @@ def _analyze_single_item(item, movements, now, thirty_days_ago, seven_days_ago):
         velocity = "medium"
 
     # ── Waste Analysis ──
-    waste_movements = [m for m in outs if m.reason and "waste" in m.reason.lower()]
-    total_waste = sum(m.quantity for m in waste_movements)
+    total_waste = sum(d.waste_qty for d in days)
     waste_pct = round((total_waste / max(total_out_30d, 1)) * 100, 1)
 
     # ── Procurement Cost ──
@@ -221,25 +211,33 @@ def _analyze_single_item(item, movements, now, thirty_days_ago, seven_days_ago):
 
     # ── Day-of-Week Consumption Pattern ──
     dow_usage = defaultdict(float)
-    for m in outs:
-        day_name = m.created_at.strftime("%A")
-        dow_usage[day_name] += m.quantity
     day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    for d in days:
+        dow_usage[day_order[d.day.weekday()]] += d.out_qty
     dow_pattern = [{"day": d, "usage": round(dow_usage.get(d, 0), 1)} for d in day_order]
     peak_usage_day = max(dow_pattern, key=lambda x: x["usage"])["day"] if dow_pattern else "N/A"
 
+    # ── Menu Dependencies ──
+    used_in = [
+        {**dish, "portions_left": max(0, math.floor(item.quantity / dish["qty_per_portion"]))}
+        for dish in used_in
+    ]
+    blocked = ", ".join(dish["name"] for dish in used_in)
+
     # ── Generate Alerts ──
     if status == "critical":
         alerts.append({
             "item": item.item_name,
-            "message": f"OUT OF STOCK — {item.item_name}! Immediately reorder {round(eoq)} {item.unit}.",
+            "message": f"OUT OF STOCK — {item.item_name}! Immediately reorder {round(eoq)} {item.unit}."
+                       + (f" Blocks: {blocked}." if blocked else ""),
             "severity": "critical",
             "action": "reorder_now",
         })
     elif status == "low":
         alerts.append({
             "item": item.item_name,
-            "message": f"Low stock: {item.quantity} {item.unit} remaining (threshold: {item.low_stock_threshold}). Depletes by {depletion_date}.",
+            "message": f"Low stock: {item.quantity} {item.unit} remaining (threshold: {item.low_stock_threshold}). Depletes by {depletion_date}."
+                       + (f" Used in: {blocked}." if blocked else ""),
             "severity": "warning",
             "action": "reorder_soon",
         })
@@ -315,6 +313,9 @@ def _analyze_single_item(item, movements, now, thirty_days_ago, seven_days_ago):
         # Cost metrics
         "monthly_spend": round(monthly_spend, 2),
 
+        # Menu dependencies
+        "used_in": used_in,
+
         # ABC class placeholder (filled by _apply_abc_classification)
         "abc_class": None,
     }
@@ -322,6 +323,24 @@ def _analyze_single_item(item, movements, now, thirty_days_ago, seven_days_ago):
     return {"prediction": prediction, "alerts": alerts}
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# INGREDIENT → MENU ITEM DEPENDENCIES
+# ─────────────────────────────────────────────────────────────────────────────
+def _ingredient_dependencies(recipes, menu_items):
+    """inventory_item_id → dishes whose recipe uses it, by name."""
+    names = {m.id: m.name for m in menu_items}
+    dependencies = defaultdict(list)
+    for line in recipes:
+        dependencies[line.inventory_item_id].append({
+            "menu_item_id": line.menu_item_id,
+            "name": names.get(line.menu_item_id, "Unknown"),
+            "qty_per_portion": line.quantity,
+        })
+    for dishes in dependencies.values():
+        dishes.sort(key=lambda d: d["name"])
+    return dependencies
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # ABC CLASSIFICATION (Pareto Analysis)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -437,7 +456,7 @@ def _empty_response():
         "summary": {
             "total_items": 0, "total_inventory_value": 0, "total_monthly_spend": 0,
             "critical_items": 0, "low_stock_items": 0, "reorder_items": 0, "ok_items": 0,
-            "high_spoilage_items": 0, "fast_movers": 0, "slow_movers": 0,
+            "high_spoilage_items": 0, "fast_movers": 0, "slow_movers": 0, "menu_items_at_risk": 0,
             "alerts_count": 0,
             "abc_breakdown": {"A": 0, "B": 0, "C": 0},
         },
@@ -2,11 +2,12 @@
 KDS (Kitchen Display System) Intelligence — EXHAUSTIVE
 ================================================================================
 Full-depth kitchen analytics including:
-  1. Per-station average, median, p95, min, max prep times
+  1. Per-station average, median, p90, p95, min, max prep times
+     (percentiles from day-level KLL sketches merged per request — ai/sketches.py)
   2. Station load distribution and capacity scoring
   3. Item-level prep time analysis with variance
   4. Bottleneck detection with severity & impact quantification
-  5. Rush period detection (peak kitchen load hours)
+  5. Rush period detection (peak kitchen load hours, last four weeks)
   6. Order queue depth analysis (concurrent orders in kitchen)
   7. Throughput metrics (orders/hour, items/hour, completion rate)
   8. Delay risk scoring (items likely to exceed target time)
@@ -17,62 +18,82 @@ Full-depth kitchen analytics including:
 ================================================================================
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
 from collections import defaultdict
-from datetime import datetime, timedelta
-import math
+from datetime import timedelta
+from sqlalchemy import func
+from ai.context import AnalysisContext
+from ai.timebuckets import day_bounds, local_hour, local_today
+from ai import sketches
 import models
 
+RUSH_WINDOW_DAYS = 28  # Four of each weekday; bounds the prep_times scan to recent orders
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # MAIN ENTRY POINT
 # ─────────────────────────────────────────────────────────────────────────────
-def get_kds_intelligence(db: Session, restaurant_id: int) -> dict:
+def get_kds_intelligence(ctx: AnalysisContext) -> dict:
     """Exhaustive kitchen performance intelligence."""
-    prep_times = (
-        db.query(models.PrepTime)
-        .join(models.OrderItem)
-        .join(models.Order)
-        .filter(models.Order.restaurant_id == restaurant_id)
+    sketches.ensure_timing_sketches(ctx.db, ctx.restaurant_id)
+    # Day rows of prep-time sketches, merged below per station and per item
+    prep_rows = (
+        ctx.db.query(
+            models.TimingSketch.station,
+            models.TimingSketch.day,
+            models.TimingSketch.n,
+            models.TimingSketch.total,
+            models.TimingSketch.total_sq,
+            models.TimingSketch.min_value,
+            models.TimingSketch.max_value,
+            models.TimingSketch.sketch,
+            models.MenuItem.name.label("item_name"),
+            models.MenuItem.avg_prep_minutes.label("expected_minutes"),
+        )
+        .outerjoin(models.MenuItem, models.MenuItem.id == models.TimingSketch.menu_item_id)
+        .filter(
+            models.TimingSketch.restaurant_id == ctx.restaurant_id,
+            models.TimingSketch.metric == "prep",
+            models.TimingSketch.n > 0,
+        )
+        .order_by(models.TimingSketch.day, models.TimingSketch.id)
         .all()
     )
 
-    if not prep_times:
+    if not prep_rows:
         return _empty_response()
 
-    now = datetime.utcnow()
-    seven_days_ago = now - timedelta(days=7)
+    now = ctx.now
+    recent_from = local_today(now - timedelta(days=7))
 
     # ── Station Performance (Deep) ──
-    station_data = defaultdict(lambda: {"times": [], "recent_times": [], "items": []})
-    for pt in prep_times:
-        if pt.actual_minutes is not None:
-            station_data[pt.station]["times"].append(pt.actual_minutes)
-            if pt.started_at and pt.started_at >= seven_days_ago:
-                station_data[pt.station]["recent_times"].append(pt.actual_minutes)
-            if pt.order_item and pt.order_item.menu_item:
-                station_data[pt.station]["items"].append(pt.order_item.menu_item.name)
+    station_data = defaultdict(lambda: {"all": sketches.Summary(), "recent": sketches.Summary(), "items": set()})
+    for row in prep_rows:
+        data = station_data[row.station]
+        data["all"].merge_row(row)
+        if row.day >= recent_from:
+            data["recent"].merge_row(row)
+        if row.item_name is not None:
+            data["items"].add(row.item_name)
 
     station_performance = []
-    total_items_all = sum(len(d["times"]) for d in station_data.values())
+    total_items_all = sum(d["all"].n for d in station_data.values())
 
     for station, data in station_data.items():
-        times = sorted(data["times"])
-        n = len(times)
-        avg_time = sum(times) / n
-        median_time = times[n // 2] if n > 0 else 0
-        p95_time = times[int(n * 0.95)] if n > 0 else 0
-        std_dev = math.sqrt(sum((t - avg_time) ** 2 for t in times) / n) if n > 1 else 0
+        times = data["all"]
+        n = times.n
+        avg_time = times.mean
+        median_time = times.quantile(0.5)
+        p95_time = times.quantile(0.95)
+        std_dev = times.std_dev
 
         # Recent trend
-        recent = data["recent_times"]
-        recent_avg = sum(recent) / len(recent) if recent else avg_time
+        recent = data["recent"]
+        recent_avg = recent.mean if recent.n else avg_time
         trend_pct = round(((recent_avg - avg_time) / max(avg_time, 1)) * 100, 1)
         trend = "slowing" if trend_pct > 10 else ("improving" if trend_pct < -10 else "stable")
 
         # Unique items processed
-        unique_items = len(set(data["items"]))
+        unique_items = len(data["items"])
 
         station_performance.append({
             "station": station,
@@ -81,8 +102,9 @@ def get_kds_intelligence(db: Session, restaurant_id: int) -> dict:
             "avg_minutes": round(avg_time, 1),
             "median_minutes": round(median_time, 1),
             "p95_minutes": round(p95_time, 1),
-            "min_minutes": round(min(times), 1),
-            "max_minutes": round(max(times), 1),
+            "p90_minutes": round(times.quantile(0.9), 1),
+            "min_minutes": round(times.min, 1),
+            "max_minutes": round(times.max, 1),
             "std_dev": round(std_dev, 1),
             "consistency_score": round(max(0, 100 - std_dev * 10), 1),
             "unique_items": unique_items,
@@ -92,22 +114,21 @@ def get_kds_intelligence(db: Session, restaurant_id: int) -> dict:
         })
 
     # ── Item Prep Times (Deep) ──
-    item_data = defaultdict(lambda: {"times": [], "station": None, "expected": None})
-    for pt in prep_times:
-        if pt.actual_minutes is not None and pt.order_item and pt.order_item.menu_item:
-            mi = pt.order_item.menu_item
-            item_data[mi.name]["times"].append(pt.actual_minutes)
-            item_data[mi.name]["station"] = pt.station
-            item_data[mi.name]["expected"] = mi.avg_prep_minutes
+    item_data = defaultdict(lambda: {"times": sketches.Summary(), "station": None, "expected": None})
+    for row in prep_rows:
+        if row.item_name is not None:
+            item_data[row.item_name]["times"].merge_row(row)
+            item_data[row.item_name]["station"] = row.station  # Most recent day's station
+            item_data[row.item_name]["expected"] = row.expected_minutes
 
     item_prep_times = []
     for name, data in item_data.items():
-        times = sorted(data["times"])
-        n = len(times)
-        avg = sum(times) / n
+        times = data["times"]
+        n = times.n
+        avg = times.mean
         expected = data["expected"] or avg
         efficiency = round((expected / max(avg, 0.1)) * 100, 1)
-        std_dev = math.sqrt(sum((t - avg) ** 2 for t in times) / n) if n > 1 else 0
+        std_dev = times.std_dev
 
         # Delay risk: probability of exceeding expected time
         if std_dev > 0:
@@ -124,16 +145,15 @@ def get_kds_intelligence(db: Session, restaurant_id: int) -> dict:
             "expected_minutes": expected,
             "efficiency_pct": efficiency,
             "std_dev": round(std_dev, 1),
-            "min_minutes": round(min(times), 1),
-            "max_minutes": round(max(times), 1),
+            "min_minutes": round(times.min, 1),
+            "max_minutes": round(times.max, 1),
             "delay_risk_pct": delay_risk,
         })
 
     item_prep_times.sort(key=lambda x: x["avg_minutes"], reverse=True)
 
     # ── Bottleneck Detection (Enhanced) ──
-    all_times = [t.actual_minutes for t in prep_times if t.actual_minutes is not None]
-    avg_overall = sum(all_times) / max(len(all_times), 1)
+    avg_overall = sum(d["all"].total for d in station_data.values()) / max(total_items_all, 1)
 
     bottlenecks = []
     for sp in station_performance:
@@ -151,19 +171,29 @@ def get_kds_intelligence(db: Session, restaurant_id: int) -> dict:
             })
 
     # ── Rush Period Detection ──
-    hourly_load = defaultdict(lambda: {"count": 0, "avg_prep": []})
-    for pt in prep_times:
-        if pt.started_at and pt.actual_minutes:
-            hour = pt.started_at.hour
-            hourly_load[hour]["count"] += 1
-            hourly_load[hour]["avg_prep"].append(pt.actual_minutes)
+    rush_from, _ = day_bounds(local_today(now) - timedelta(days=RUSH_WINDOW_DAYS - 1))
+    hour = local_hour(models.PrepTime.started_at)
+    hourly_load = {
+        h: {"count": count, "avg_prep": avg_prep}
+        for h, count, avg_prep in ctx.db.query(hour, func.count(), func.avg(models.PrepTime.actual_minutes))
+        .join(models.OrderItem, models.OrderItem.id == models.PrepTime.order_item_id)
+        .join(models.Order, models.Order.id == models.OrderItem.order_id)
+        .filter(
+            models.Order.restaurant_id == ctx.restaurant_id,
+            models.Order.created_at >= rush_from,
+            models.PrepTime.started_at.isnot(None),
+            models.PrepTime.actual_minutes.isnot(None),
+            models.PrepTime.actual_minutes != 0,
+        )
+        .group_by(hour)
+    }
 
     rush_periods = []
     avg_hourly_load = sum(d["count"] for d in hourly_load.values()) / max(len(hourly_load), 1)
     for hour in range(24):
-        data = hourly_load[hour]
-        if data["count"] > 0:
-            avg_prep = sum(data["avg_prep"]) / len(data["avg_prep"])
+        data = hourly_load.get(hour)
+        if data:
+            avg_prep = data["avg_prep"]
             is_rush = data["count"] > avg_hourly_load * 1.3
             rush_periods.append({
                 "hour": hour,
@@ -175,41 +205,34 @@ def get_kds_intelligence(db: Session, restaurant_id: int) -> dict:
             })
 
     # ── Throughput Metrics ──
-    completed_orders = db.query(models.Order).filter(
-        models.Order.restaurant_id == restaurant_id,
-        models.Order.status.in_([models.OrderStatus.SERVED, models.OrderStatus.READY]),
-    ).all()
-
-    order_completion_times = []
-    for order in completed_orders:
-        if order.completed_at and order.created_at:
-            diff = (order.completed_at - order.created_at).total_seconds() / 60
-            order_completion_times.append(diff)
-
-    if order_completion_times:
-        sorted_ct = sorted(order_completion_times)
-        avg_completion = sum(sorted_ct) / len(sorted_ct)
-        median_completion = sorted_ct[len(sorted_ct) // 2]
-        p95_completion = sorted_ct[int(len(sorted_ct) * 0.95)]
-    else:
-        avg_completion = median_completion = p95_completion = 0
+    completed_count, _ = ctx.order_totals(statuses=[models.OrderStatus.SERVED, models.OrderStatus.READY])
+    total_orders, _ = ctx.order_totals()
+
+    completion = sketches.Summary()
+    for row in ctx.db.query(models.TimingSketch).filter(
+        models.TimingSketch.restaurant_id == ctx.restaurant_id,
+        models.TimingSketch.metric == "completion",
+        models.TimingSketch.n > 0,
+    ).order_by(models.TimingSketch.day, models.TimingSketch.id):
+        completion.merge_row(row)
+    avg_completion = completion.mean
+    median_completion = completion.quantile(0.5)
+    p95_completion = completion.quantile(0.95)
 
     # Calculate throughput per day
-    first_order = db.query(func.min(models.Order.created_at)).filter(
-        models.Order.restaurant_id == restaurant_id
-    ).scalar()
+    first_order = ctx.first_order_at
     active_days = max((now - first_order).days, 1) if first_order else 30
 
     throughput = {
-        "total_completed": len(completed_orders),
-        "orders_per_day": round(len(completed_orders) / active_days, 1),
+        "total_completed": completed_count,
+        "orders_per_day": round(completed_count / active_days, 1),
         "items_per_day": round(total_items_all / active_days, 1),
         "avg_order_completion_minutes": round(avg_completion, 1),
         "median_completion_minutes": round(median_completion, 1),
         "p95_completion_minutes": round(p95_completion, 1),
         "avg_prep_minutes": round(avg_overall, 1),
         "stations_active": len(station_data),
-        "completion_rate": round(len(completed_orders) / max(db.query(models.Order).filter(models.Order.restaurant_id == restaurant_id).count(), 1) * 100, 1),
+        "completion_rate": round(completed_count / max(total_orders, 1) * 100, 1),
     }
 
     # ── Station Efficiency Ratings ──
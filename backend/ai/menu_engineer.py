@@ -17,94 +17,33 @@ Full-depth menu analytics including:
 ================================================================================
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
 from collections import Counter, defaultdict
-from datetime import datetime, timedelta
+from sqlalchemy import and_, select
+from sqlalchemy.orm import aliased
+from ai.context import AnalysisContext, NOT_CANCELLED
+from ai import rollups
 import models
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # MAIN ENTRY POINT
 # ─────────────────────────────────────────────────────────────────────────────
-def get_menu_engineering(db: Session, restaurant_id: int) -> dict:
+def get_menu_engineering(ctx: AnalysisContext) -> dict:
     """Exhaustive menu engineering analysis."""
-    items = db.query(models.MenuItem).filter(
-        models.MenuItem.restaurant_id == restaurant_id
-    ).all()
+    items = ctx.menu_items
 
     if not items:
         return _empty_response()
 
-    now = datetime.utcnow()
-    seven_days_ago = now - timedelta(days=7)
-    thirty_days_ago = now - timedelta(days=30)
-
-    # ── Pre-fetch all order data in bulk ──
-    order_data = (
-        db.query(
-            models.OrderItem.menu_item_id,
-            func.sum(models.OrderItem.quantity).label("qty"),
-            func.sum(models.OrderItem.quantity * models.OrderItem.unit_price).label("revenue"),
-        )
-        .join(models.Order)
-        .filter(models.Order.restaurant_id == restaurant_id, models.Order.status != models.OrderStatus.CANCELLED)
-        .group_by(models.OrderItem.menu_item_id)
-        .all()
-    )
-    order_counts = {r[0]: int(r[1]) for r in order_data}
-    revenue_map = {r[0]: int(r[2]) for r in order_data}
-
-    # Recent 7-day data for trend detection
-    recent_data = (
-        db.query(
-            models.OrderItem.menu_item_id,
-            func.sum(models.OrderItem.quantity).label("qty"),
-        )
-        .join(models.Order)
-        .filter(
-            models.Order.restaurant_id == restaurant_id,
-            models.Order.status != models.OrderStatus.CANCELLED,
-            models.Order.created_at >= seven_days_ago,
-        )
-        .group_by(models.OrderItem.menu_item_id)
-        .all()
-    )
-    recent_counts = {r[0]: int(r[1]) for r in recent_data}
-
-    # Older data (days 8-30) for comparison
-    older_data = (
-        db.query(
-            models.OrderItem.menu_item_id,
-            func.sum(models.OrderItem.quantity).label("qty"),
-        )
-        .join(models.Order)
-        .filter(
-            models.Order.restaurant_id == restaurant_id,
-            models.Order.status != models.OrderStatus.CANCELLED,
-            models.Order.created_at >= thirty_days_ago,
-            models.Order.created_at < seven_days_ago,
-        )
-        .group_by(models.OrderItem.menu_item_id)
-        .all()
-    )
-    older_counts = {r[0]: int(r[1]) for r in older_data}
-
-    # Hour-of-day data for time-of-day analysis
-    hourly_data = (
-        db.query(
-            models.OrderItem.menu_item_id,
-            func.strftime("%H", models.Order.created_at).label("hour"),
-            func.sum(models.OrderItem.quantity).label("qty"),
-        )
-        .join(models.Order)
-        .filter(models.Order.restaurant_id == restaurant_id, models.Order.status != models.OrderStatus.CANCELLED)
-        .group_by(models.OrderItem.menu_item_id, "hour")
-        .all()
-    )
-    hourly_map = defaultdict(lambda: defaultdict(int))
-    for row in hourly_data:
-        hourly_map[row[0]][int(row[1])] = int(row[2])
+    now = ctx.now
+
+    # ── Order data from the shared snapshot (all-time, 7d, 8-30d, hourly) ──
+    sales = ctx.item_sales
+    order_counts = {iid: s["qty"] for iid, s in sales.items()}
+    revenue_map = {iid: s["revenue"] for iid, s in sales.items()}
+    recent_counts = {iid: s["qty_7d"] for iid, s in sales.items()}
+    older_counts = {iid: s["qty_8_30d"] for iid, s in sales.items()}
+    hourly_map = ctx.item_hourly
 
     # ── Calculate Averages ──
     total_qty_sold = sum(order_counts.values()) if order_counts else 1
@@ -113,9 +52,7 @@ def get_menu_engineering(db: Session, restaurant_id: int) -> dict:
     avg_margin = sum(all_margins) / max(len(all_margins), 1)
 
     # Days in dataset
-    first_order = db.query(func.min(models.Order.created_at)).filter(
-        models.Order.restaurant_id == restaurant_id
-    ).scalar()
+    first_order = ctx.first_order_at
     total_days = max((now - first_order).days, 1) if first_order else 30
 
     # ── Build Item Matrix ──
@@ -232,49 +169,44 @@ def get_menu_engineering(db: Session, restaurant_id: int) -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # UPSELL PAIR DETECTION
 # ─────────────────────────────────────────────────────────────────────────────
-def get_upsell_pairs(db: Session, restaurant_id: int, top_n: int = 10) -> list:
-    """Find items frequently ordered together, with lift score for strength."""
-    orders = db.query(models.Order).filter(
-        models.Order.restaurant_id == restaurant_id,
-        models.Order.status != models.OrderStatus.CANCELLED,
-    ).all()
-
-    if not orders:
+def get_upsell_pairs(ctx: AnalysisContext, top_n: int = 10) -> list:
+    """Find items frequently ordered together, with lift score for strength.
+
+    Reads the co-occurrence counts that order writes maintain (ai/rollups.py),
+    so this is a top-N index read however long the order history is.
+    """
+    # Orders without line items still count towards support
+    total_orders, _ = ctx.order_totals(statuses=NOT_CANCELLED)
+    if not total_orders:
         return []
 
-    item_freq = Counter()
-    pair_counts = Counter()
-    total_orders = len(orders)
-
-    for order in orders:
-        item_ids = list(set(oi.menu_item_id for oi in order.items))
-        for iid in item_ids:
-            item_freq[iid] += 1
-        for i in range(len(item_ids)):
-            for j in range(i + 1, len(item_ids)):
-                pair = tuple(sorted([item_ids[i], item_ids[j]]))
-                pair_counts[pair] += 1
+    rollups.ensure_pair_counts(ctx.db, ctx.restaurant_id)
+    freq_a = aliased(models.ItemOrderCount)
+    freq_b = aliased(models.ItemOrderCount)
+    pair = models.ItemPairCount
+    pairs = (
+        select(pair.item_a, pair.item_b, pair.orders, freq_a.orders, freq_b.orders)
+        .join(freq_a, and_(freq_a.restaurant_id == pair.restaurant_id, freq_a.menu_item_id == pair.item_a))
+        .join(freq_b, and_(freq_b.restaurant_id == pair.restaurant_id, freq_b.menu_item_id == pair.item_b))
+        .filter(pair.restaurant_id == ctx.restaurant_id, pair.orders > 0)
+        # Ties go to the pair seen first (rows are inserted in first-seen order)
+        .order_by(pair.orders.desc(), pair.id)
+        .limit(top_n)
+    )
 
     # Resolve names
-    items_map = {
-        item.id: item.name
-        for item in db.query(models.MenuItem).filter(
-            models.MenuItem.restaurant_id == restaurant_id
-        ).all()
-    }
+    items_map = {item.id: item.name for item in ctx.menu_items}
 
     results = []
-    for pair, count in pair_counts.most_common(top_n):
-        freq_a = item_freq.get(pair[0], 1)
-        freq_b = item_freq.get(pair[1], 1)
+    for item_a, item_b, count, freq_a_orders, freq_b_orders in ctx.db.execute(pairs):
         # Lift: how much more likely they co-occur than expected
-        expected = (freq_a / total_orders) * (freq_b / total_orders) * total_orders
+        expected = (freq_a_orders / total_orders) * (freq_b_orders / total_orders) * total_orders
         lift = round(count / max(expected, 0.01), 2)
         support = round((count / total_orders) * 100, 1)
 
         results.append({
-            "item_a": items_map.get(pair[0], "Unknown"),
-            "item_b": items_map.get(pair[1], "Unknown"),
+            "item_a": items_map.get(item_a, "Unknown"),
+            "item_b": items_map.get(item_b, "Unknown"),
             "co_occurrence": count,
             "support_pct": support,
             "lift": lift,
@@ -12,31 +12,66 @@ Pulls deep insights from all AI services and produces:
   7. Risk matrix (what could go wrong today?)
   8. Opportunity radar (where to capture more revenue)
   9. Operational recommendations ranked by revenue impact
+
+The five analyzers run either one after another on the request's Session, or
+concurrently on a bounded thread pool with one Session each (the default), so
+dashboard latency tracks the slowest analyzer rather than their sum. Either way
+they share one AnalysisContext, so each snapshot query runs once per request.
 ================================================================================
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from datetime import timedelta
+import os
+import threading
+import time
+import metrics
 import models
+from database import AnalyzerSessionLocal, AI_ANALYZER_WORKERS
+from middleware import timing
+from ai.context import AnalysisContext, NOT_CANCELLED
 from ai import menu_engineer, revenue_forecaster, kds_intelligence, inventory_predictor, reservation_optimizer
 
+ANALYZERS = {
+    "menu_engineering": menu_engineer.get_menu_engineering,
+    "revenue_forecast": revenue_forecaster.get_revenue_forecast,
+    "kds_intelligence": kds_intelligence.get_kds_intelligence,
+    "inventory_predictions": inventory_predictor.get_inventory_predictions,
+    "reservation_insights": reservation_optimizer.get_reservation_insights,
+}
+
+# Concurrent mode holds one connection per analyzer thread, from database.analyzer_engine's pool
+# (AI_ANALYZER_WORKERS connections, no overflow), which the thread pool below is sized to. The
+# request pool is never touched, but the database must allow AI_ANALYZER_WORKERS extra connections
+# per worker process — set AI_DASHBOARD_CONCURRENT=0 where it doesn't.
+CONCURRENT = os.getenv("AI_DASHBOARD_CONCURRENT", "1") == "1"
+MAX_WORKERS = AI_ANALYZER_WORKERS
+
+_executor = None
+_executor_lock = threading.Lock()
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # MAIN ENTRY POINT
 # ─────────────────────────────────────────────────────────────────────────────
-def get_operations_dashboard(db: Session, restaurant_id: int) -> dict:
+def get_operations_dashboard(ctx: AnalysisContext, concurrent: bool = None) -> dict:
     """Complete AI Operations Manager dashboard — exhaustive."""
-    now = datetime.utcnow()
-    today = now.date()
+    today = ctx.today
     yesterday = today - timedelta(days=1)
 
-    # Gather data from all AI services
-    menu_data = menu_engineer.get_menu_engineering(db, restaurant_id)
-    revenue_data = revenue_forecaster.get_revenue_forecast(db, restaurant_id)
-    kds_data = kds_intelligence.get_kds_intelligence(db, restaurant_id)
-    inventory_data = inventory_predictor.get_inventory_predictions(db, restaurant_id)
-    reservation_data = reservation_optimizer.get_reservation_insights(db, restaurant_id)
+    # Gather data from all AI services (they share the context's snapshot)
+    if concurrent is None:
+        concurrent = CONCURRENT
+    if concurrent:
+        results, timings = _run_concurrent(ctx)
+    else:
+        results, timings = _run_sequential(ctx)
+    menu_data = results["menu_engineering"]
+    revenue_data = results["revenue_forecast"]
+    kds_data = results["kds_intelligence"]
+    inventory_data = results["inventory_predictions"]
+    reservation_data = results["reservation_insights"]
 
     # ─────────────────────────────────────────────
     # 1. MULTI-DIMENSIONAL HEALTH SCORE
@@ -109,27 +144,10 @@ def get_operations_dashboard(db: Session, restaurant_id: int) -> dict:
     # ─────────────────────────────────────────────
     # 2. QUICK STATS (Today Snapshot)
     # ─────────────────────────────────────────────
-    today_orders = db.query(models.Order).filter(
-        models.Order.restaurant_id == restaurant_id,
-        func.date(models.Order.created_at) == today,
-    ).count()
-
-    today_revenue = db.query(func.sum(models.Order.total)).filter(
-        models.Order.restaurant_id == restaurant_id,
-        func.date(models.Order.created_at) == today,
-        models.Order.status != models.OrderStatus.CANCELLED,
-    ).scalar() or 0
-
-    yesterday_revenue = db.query(func.sum(models.Order.total)).filter(
-        models.Order.restaurant_id == restaurant_id,
-        func.date(models.Order.created_at) == yesterday,
-        models.Order.status != models.OrderStatus.CANCELLED,
-    ).scalar() or 0
-
-    pending_orders = db.query(models.Order).filter(
-        models.Order.restaurant_id == restaurant_id,
-        models.Order.status.in_([models.OrderStatus.PENDING, models.OrderStatus.PREP]),
-    ).count()
+    today_orders, _ = ctx.order_totals(day=today)
+    _, today_revenue = ctx.order_totals(statuses=NOT_CANCELLED, day=today)
+    _, yesterday_revenue = ctx.order_totals(statuses=NOT_CANCELLED, day=yesterday)
+    pending_orders, _ = ctx.order_totals(statuses=[models.OrderStatus.PENDING, models.OrderStatus.PREP])
 
     quick_stats = {
         "today_orders": today_orders,
@@ -221,7 +239,60 @@ def get_operations_dashboard(db: Session, restaurant_id: int) -> dict:
         "risks": risks,
         "opportunities": opportunities,
         "ai_modules": ai_modules,
+        "analyzer_timings_ms": timings,
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ANALYZER EXECUTION
+# ─────────────────────────────────────────────────────────────────────────────
+def _run_sequential(ctx):
+    """Run every analyzer on the caller's Session, one after another."""
+    results, timings = {}, {}
+    for name, analyzer in ANALYZERS.items():
+        results[name], timings[name] = _timed(name, analyzer, ctx)
+    timings["total"] = round(sum(timings.values()), 1)
+    return results, timings
+
+
+def _run_concurrent(ctx):
+    """Fan the analyzers out over the thread pool, each on its own Session."""
+    start = time.perf_counter()
+    # Each task runs in a copy of the request's context, so its queries and span count toward the request
+    futures = {
+        name: _get_executor().submit(contextvars.copy_context().run, _run_isolated, name, analyzer, ctx)
+        for name, analyzer in ANALYZERS.items()
     }
+    results, timings = {}, {}
+    for name, future in futures.items():
+        results[name], timings[name] = future.result()
+    timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+    return results, timings
+
+
+def _run_isolated(name, analyzer, ctx):
+    db = AnalyzerSessionLocal()
+    try:
+        return _timed(name, analyzer, ctx.with_session(db))
+    finally:
+        db.close()
+
+
+def _timed(name, analyzer, ctx):
+    start = time.perf_counter()
+    result = analyzer(ctx)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    timing.record(f"ai.{name}", elapsed_ms)
+    metrics.observe_analyzer(name, elapsed_ms / 1000)
+    return result, round(elapsed_ms, 1)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ai-analyzer")
+        return _executor
 
 
 # ─────────────────────────────────────────────────────────────────────────────
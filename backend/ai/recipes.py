@@ -0,0 +1,68 @@
+"""
+Recipe Stock Consumption
+================================================================================
+Turns sold portions into inventory movements using the `Recipe` bill of
+materials (menu item → inventory item, quantity per portion).
+
+Order create paths call `consume` inside their own transaction. Whatever the
+size of the ticket (or bulk import) it costs a fixed number of statements:
+  1. one SELECT of the recipe lines for the ticket's menu items
+  2. one UPDATE of inventory_items: quantity - CASE id WHEN .. THEN .. END
+  3. one batched INSERT of OUT StockMovements (one per order × ingredient)
+  4. the stock rollup upsert (rollups.record_stock_movements)
+Menu items without a recipe cost only the SELECT.
+
+Stock may go negative (sold before the delivery was booked) — the predictor
+flags it as critical. Cancelling an order does not return stock; the food may
+already be made, so corrections go through /inventory/{id}/adjust.
+================================================================================
+"""
+
+from collections import defaultdict, namedtuple
+from sqlalchemy import case, insert, select
+from sqlalchemy.orm import Session
+import models
+from ai import rollups
+
+Movement = namedtuple("Movement", "inventory_item_id movement_type quantity reason created_at")
+
+
+def consume(db: Session, orders: list):
+    """Decrement stock for the ingredients of newly created orders and log the movements.
+
+    Orders must be flushed (id and created_at set) with `items` attached, and
+    all belong to one restaurant.
+    """
+    menu_item_ids = {oi.menu_item_id for order in orders for oi in order.items}
+    if not menu_item_ids:
+        return
+    lines = defaultdict(list)
+    for menu_item_id, inventory_item_id, quantity in db.execute(select(
+        models.Recipe.menu_item_id, models.Recipe.inventory_item_id, models.Recipe.quantity,
+    ).where(models.Recipe.menu_item_id.in_(menu_item_ids))):
+        lines[menu_item_id].append((inventory_item_id, quantity))
+    if not lines:
+        return
+
+    deltas = defaultdict(float)
+    movements = []
+    for order in orders:
+        used = defaultdict(float)
+        for oi in order.items:
+            for inventory_item_id, quantity in lines.get(oi.menu_item_id, ()):
+                used[inventory_item_id] += quantity * oi.quantity
+        for inventory_item_id, quantity in used.items():
+            deltas[inventory_item_id] += quantity
+            movements.append(Movement(
+                inventory_item_id, models.StockMovementType.OUT, quantity,
+                f"Sale (order #{order.id})", order.created_at,
+            ))
+
+    restaurant_id = orders[0].restaurant_id
+    table = models.InventoryItem.__table__
+    db.execute(table.update().where(
+        table.c.id.in_(sorted(deltas)),
+        table.c.restaurant_id == restaurant_id,
+    ).values(quantity=table.c.quantity - case(dict(sorted(deltas.items())), value=table.c.id)))
+    db.execute(insert(models.StockMovement), [m._asdict() for m in movements])
+    rollups.record_stock_movements(db, restaurant_id, movements)
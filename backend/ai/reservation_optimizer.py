@@ -19,30 +19,23 @@ Full-depth reservation analytics including:
 ================================================================================
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
 from collections import defaultdict
-from datetime import datetime, timedelta
+from ai.context import AnalysisContext, NOT_CANCELLED
 import models
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # MAIN ENTRY POINT
 # ─────────────────────────────────────────────────────────────────────────────
-def get_reservation_insights(db: Session, restaurant_id: int) -> dict:
+def get_reservation_insights(ctx: AnalysisContext) -> dict:
     """Exhaustive reservation intelligence."""
-    reservations = db.query(models.Reservation).filter(
-        models.Reservation.restaurant_id == restaurant_id
-    ).all()
-
-    tables = db.query(models.Table).filter(
-        models.Table.restaurant_id == restaurant_id
-    ).all()
+    reservations = ctx.reservations
+    tables = ctx.tables
 
     if not reservations:
         return _empty_response()
 
-    now = datetime.utcnow()
+    now = ctx.now
 
     # ── Core Counts ──
     total = len(reservations)
@@ -152,12 +145,7 @@ def get_reservation_insights(db: Session, restaurant_id: int) -> dict:
     # ─────────────────────────────────────────────
     # 2. REVENUE IMPACT
     # ─────────────────────────────────────────────
-    dine_in_orders = db.query(models.Order).filter(
-        models.Order.restaurant_id == restaurant_id,
-        models.Order.order_type == models.OrderType.DINE_IN,
-        models.Order.status != models.OrderStatus.CANCELLED,
-    ).all()
-    total_dine_revenue = sum(o.total or 0 for o in dine_in_orders)
+    _, total_dine_revenue = ctx.order_totals(statuses=NOT_CANCELLED, order_type=models.OrderType.DINE_IN)
     avg_spend_per_guest = int(total_dine_revenue / max(sum(r.party_size for r in completed), 1))
 
     # Revenue lost to no-shows
@@ -202,8 +190,8 @@ def get_reservation_insights(db: Session, restaurant_id: int) -> dict:
     # ─────────────────────────────────────────────
     total_capacity = sum(t.capacity for t in tables) or 1
     operating_hours = 12  # Assume 12 hours of operation/day
-    first_res = min(r.reservation_date for r in reservations) if reservations else now.date()
-    days_span = max((now.date() - first_res).days, 1) if isinstance(first_res, type(now.date())) else 30
+    first_res = min(r.reservation_date for r in reservations) if reservations else ctx.today
+    days_span = max((ctx.today - first_res).days, 1) if isinstance(first_res, type(ctx.today)) else 30
     total_seat_hours = total_capacity * operating_hours * days_span
 
     revpash = {
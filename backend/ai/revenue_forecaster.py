@@ -12,145 +12,170 @@ Full-depth revenue analytics including:
   8. Average check / basket size analysis
   9. Customer spending segments (high/medium/low spenders)
   10. Anomaly detection (days significantly above/below average)
-  11. 7-day forward forecast with confidence intervals
+  11. Daily and hourly forward forecast (seasonal model, default 7 days)
   12. Peak/off-peak period identification
   13. Revenue velocity (orders per hour)
 ================================================================================
 """
 
-from sqlalchemy.orm import Session
 from sqlalchemy import func
-from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 import math
+import numpy as np
 import models
+from ai import rollups, seasonal_model
+from ai.context import AnalysisContext
+
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # MAIN ENTRY POINT
 # ─────────────────────────────────────────────────────────────────────────────
-def get_revenue_forecast(db: Session, restaurant_id: int) -> dict:
-    """Exhaustive revenue intelligence."""
-    orders = db.query(models.Order).filter(
-        models.Order.restaurant_id == restaurant_id,
-        models.Order.status != models.OrderStatus.CANCELLED,
+def get_revenue_forecast(ctx: AnalysisContext, horizon_days: int = 7) -> dict:
+    """Exhaustive revenue intelligence — reads the incremental rollups, never raw orders."""
+    db, restaurant_id = ctx.db, ctx.restaurant_id
+    rollups.ensure_revenue_rollups(db, restaurant_id)
+
+    revenue_rows = db.query(
+        models.RevenueRollup.day,
+        models.RevenueRollup.hour,
+        models.RevenueRollup.order_type,
+        models.RevenueRollup.revenue,
+        models.RevenueRollup.orders,
+        models.RevenueRollup.items,
+    ).filter(
+        models.RevenueRollup.restaurant_id == restaurant_id,
+        models.RevenueRollup.orders > 0,
     ).all()
 
-    if not orders:
+    if not revenue_rows:
         return _empty_response()
 
-    now = datetime.utcnow()
-    thirty_days_ago = now - timedelta(days=30)
+    category_rows = (
+        db.query(
+            models.CategoryRollup.category,
+            func.sum(models.CategoryRollup.revenue),
+            func.sum(models.CategoryRollup.qty),
+        )
+        .filter(models.CategoryRollup.restaurant_id == restaurant_id)
+        .group_by(models.CategoryRollup.category)
+        .having(func.sum(models.CategoryRollup.qty) > 0)
+        .all()
+    )
+
+    # (total, order count) pairs sorted by total — the check-size distribution
+    check_rows = db.query(
+        models.CheckSizeRollup.total, models.CheckSizeRollup.orders,
+    ).filter(
+        models.CheckSizeRollup.restaurant_id == restaurant_id,
+        models.CheckSizeRollup.orders > 0,
+    ).order_by(models.CheckSizeRollup.total).all()
 
     # ── Build Time Series ──
-    daily = defaultdict(lambda: {"revenue": 0, "orders": 0, "items": 0})
-    hourly = defaultdict(lambda: {"revenue": 0, "orders": 0})
-    weekly = defaultdict(lambda: {"revenue": 0, "orders": 0, "days_seen": set()})
-    by_type = defaultdict(lambda: {"revenue": 0, "orders": 0})
-    by_category = defaultdict(lambda: {"revenue": 0, "qty": 0})
-    check_sizes = []
-
-    for order in orders:
-        date_str = order.created_at.strftime("%Y-%m-%d")
-        revenue = order.total or 0
-        daily[date_str]["revenue"] += revenue
-        daily[date_str]["orders"] += 1
-        daily[date_str]["items"] += sum(oi.quantity for oi in order.items)
-
-        hour = order.created_at.hour
-        hourly[hour]["revenue"] += revenue
-        hourly[hour]["orders"] += 1
-
-        weekday = order.created_at.strftime("%A")
-        weekly[weekday]["revenue"] += revenue
-        weekly[weekday]["orders"] += 1
-        weekly[weekday]["days_seen"].add(date_str)
-
-        # By order type
-        otype = order.order_type.value if order.order_type else "dine_in"
-        by_type[otype]["revenue"] += revenue
-        by_type[otype]["orders"] += 1
-
-        # By category (from order items)
-        for oi in order.items:
-            cat = oi.menu_item.category if oi.menu_item else "Unknown"
-            by_category[cat]["revenue"] += oi.quantity * oi.unit_price
-            by_category[cat]["qty"] += oi.quantity
-
-        check_sizes.append(revenue)
-
-    # Sort time series
-    sorted_daily = sorted(daily.items())
-    total_days = max(len(sorted_daily), 1)
+    # One array slot per active day (sorted), hour and weekday; rows are summed into them
+    days, hours, otypes, revenue, order_counts, item_counts = (np.asarray(col) for col in zip(*revenue_rows))
+    revenue, order_counts, item_counts = (a.astype(np.int64) for a in (revenue, order_counts, item_counts))
+    day_ordinals, day_idx = np.unique(
+        np.fromiter((d.toordinal() for d in days), dtype=np.int64, count=len(days)), return_inverse=True,
+    )
+    n_days = len(day_ordinals)
+    daily_rev = _sum_by(day_idx, revenue, n_days)
+    daily_orders = _sum_by(day_idx, order_counts, n_days)
+    daily_items = _sum_by(day_idx, item_counts, n_days)
+
+    hours = hours.astype(np.int64)
+    hourly_rev = _sum_by(hours, revenue, 24)
+    hourly_orders = _sum_by(hours, order_counts, 24)
+
+    day_weekdays = (day_ordinals - 1) % 7  # date.fromordinal(1) is a Monday
+    weekly_rev = _sum_by(day_weekdays, daily_rev, 7)
+    weekly_orders = _sum_by(day_weekdays, daily_orders, 7)
+    weekly_days = np.bincount(day_weekdays, minlength=7)
+
+    type_names, type_idx = np.unique(otypes, return_inverse=True)
+    type_rev = _sum_by(type_idx, revenue, len(type_names))
+    type_orders = _sum_by(type_idx, order_counts, len(type_names))
+
+    by_category = {cat: {"revenue": int(rev), "qty": int(qty)} for cat, rev, qty in category_rows}
+    check_totals = np.array([t for t, _ in check_rows], dtype=np.int64)
+    check_counts = np.array([n for _, n in check_rows], dtype=np.int64)
+    total_orders = int(check_counts.sum())
 
     # ── Daily Revenue Data ──
-    daily_revenue = []
-    revenues = [r for _, r in [(d, daily[d]["revenue"]) for d in sorted(daily.keys())]]
-
-    # Compute 7-day and 14-day moving averages
-    for i, (d, data) in enumerate(sorted_daily):
-        rev = data["revenue"]
-        ma7 = int(sum(revenues[max(0, i-6):i+1]) / min(i+1, 7)) if i >= 0 else rev
-        ma14 = int(sum(revenues[max(0, i-13):i+1]) / min(i+1, 14)) if i >= 0 else rev
+    # 7-day and 14-day trailing moving averages (shorter windows at the start of the series)
+    ma7 = _moving_average(daily_rev, 7)
+    ma14 = _moving_average(daily_rev, 14)
+    avg_checks = (daily_rev / np.maximum(daily_orders, 1)).astype(np.int64)
 
-        daily_revenue.append({
-            "date": d,
+    daily_revenue = [
+        {
+            "date": date.fromordinal(o).strftime("%Y-%m-%d"),
             "revenue": rev,
-            "orders": data["orders"],
-            "items": data["items"],
-            "avg_check": int(rev / max(data["orders"], 1)),
-            "ma_7": ma7,
-            "ma_14": ma14,
-        })
+            "orders": orders,
+            "items": items,
+            "avg_check": check,
+            "ma_7": m7,
+            "ma_14": m14,
+        }
+        for o, rev, orders, items, check, m7, m14 in zip(
+            day_ordinals.tolist(), daily_rev.tolist(), daily_orders.tolist(), daily_items.tolist(),
+            avg_checks.tolist(), ma7.tolist(), ma14.tolist(),
+        )
+    ]
 
     # ── Hourly Heatmap ──
-    total_active_days = max(len(sorted_daily), 1)
-    hourly_pattern = []
-    for h in range(24):
-        data = hourly[h]
-        avg_rev = int(data["revenue"] / total_active_days)
-        avg_orders = round(data["orders"] / total_active_days, 1)
-        hourly_pattern.append({
+    total_active_days = max(n_days, 1)
+    hourly_avg_rev = (hourly_rev / total_active_days).astype(np.int64)
+    peak_threshold = int(hourly_avg_rev.sum()) / 24 * 1.5
+    hourly_pattern = [
+        {
             "hour": h,
             "label": f"{h:02d}:00",
             "avg_revenue": avg_rev,
-            "avg_orders": avg_orders,
-            "total_revenue": data["revenue"],
-            "total_orders": data["orders"],
-        })
-
-    # Peak/off-peak identification
-    peak_threshold = sum(h["avg_revenue"] for h in hourly_pattern) / 24 * 1.5
-    for h in hourly_pattern:
-        h["is_peak"] = h["avg_revenue"] >= peak_threshold
-        h["period"] = _classify_period(h["hour"])
+            "avg_orders": round(orders / total_active_days, 1),
+            "total_revenue": rev,
+            "total_orders": orders,
+            # Peak/off-peak identification
+            "is_peak": avg_rev >= peak_threshold,
+            "period": _classify_period(h),
+        }
+        for h, avg_rev, rev, orders in zip(
+            range(24), hourly_avg_rev.tolist(), hourly_rev.tolist(), hourly_orders.tolist(),
+        )
+    ]
 
     # ── Weekly Pattern ──
-    day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    weekly_pattern = []
-    for day in day_order:
-        data = weekly[day]
-        num_days = max(len(data["days_seen"]), 1)
-        weekly_pattern.append({
+    weekly_days = np.maximum(weekly_days, 1)
+    weekly_avg_rev = (weekly_rev / weekly_days).astype(np.int64)
+    weekly_pattern = [
+        {
             "day": day,
-            "avg_revenue": int(data["revenue"] / num_days),
-            "avg_orders": round(data["orders"] / num_days, 1),
-            "total_revenue": data["revenue"],
-            "total_orders": data["orders"],
+            "avg_revenue": avg_rev,
+            "avg_orders": round(orders / num_days, 1),
+            "total_revenue": rev,
+            "total_orders": orders,
             "days_sampled": num_days,
-        })
+        }
+        for day, avg_rev, rev, orders, num_days in zip(
+            DAY_NAMES, weekly_avg_rev.tolist(), weekly_rev.tolist(), weekly_orders.tolist(), weekly_days.tolist(),
+        )
+    ]
 
     # ── Revenue by Order Type ──
-    total_rev = sum(d["revenue"] for d in by_type.values()) or 1
+    total_rev = int(type_rev.sum()) or 1
     revenue_by_type = [
         {
             "type": t,
-            "revenue": data["revenue"],
-            "orders": data["orders"],
-            "share_pct": round((data["revenue"] / total_rev) * 100, 1),
-            "avg_check": int(data["revenue"] / max(data["orders"], 1)),
+            "revenue": rev,
+            "orders": orders,
+            "share_pct": round((rev / total_rev) * 100, 1),
+            "avg_check": int(rev / max(orders, 1)),
         }
-        for t, data in sorted(by_type.items(), key=lambda x: x[1]["revenue"], reverse=True)
+        for t, rev, orders in sorted(
+            zip(type_names.tolist(), type_rev.tolist(), type_orders.tolist()), key=lambda x: x[1], reverse=True,
+        )
     ]
 
     # ── Revenue by Category ──
@@ -166,12 +191,11 @@ def get_revenue_forecast(db: Session, restaurant_id: int) -> dict:
     ]
 
     # ── Check Size Distribution ──
-    if check_sizes:
-        sorted_checks = sorted(check_sizes)
-        avg_check = int(sum(check_sizes) / len(check_sizes))
-        median_check = sorted_checks[len(sorted_checks) // 2]
-        p25 = sorted_checks[int(len(sorted_checks) * 0.25)]
-        p75 = sorted_checks[int(len(sorted_checks) * 0.75)]
+    if total_orders:
+        avg_check = int(int((check_totals * check_counts).sum()) / total_orders)
+        median_check, p25, p75 = _nth_checks(
+            check_totals, check_counts, [total_orders // 2, int(total_orders * 0.25), int(total_orders * 0.75)],
+        )
     else:
         avg_check = median_check = p25 = p75 = 0
 
@@ -180,30 +204,47 @@ def get_revenue_forecast(db: Session, restaurant_id: int) -> dict:
         "median_check": median_check,
         "p25": p25,
         "p75": p75,
-        "min_check": min(check_sizes) if check_sizes else 0,
-        "max_check": max(check_sizes) if check_sizes else 0,
+        "min_check": int(check_totals[0]) if check_rows else 0,
+        "max_check": int(check_totals[-1]) if check_rows else 0,
     }
 
     # ── Customer Spending Segments ──
-    if check_sizes:
+    if total_orders:
         high_spend_threshold = int(p75 * 1.5)
         low_spend_threshold = int(p25 * 0.8)
         segments = {
-            "high_spenders": {"count": sum(1 for c in check_sizes if c >= high_spend_threshold), "threshold": high_spend_threshold},
-            "medium_spenders": {"count": sum(1 for c in check_sizes if low_spend_threshold < c < high_spend_threshold)},
-            "low_spenders": {"count": sum(1 for c in check_sizes if c <= low_spend_threshold), "threshold": low_spend_threshold},
+            "high_spenders": {"count": int(check_counts[check_totals >= high_spend_threshold].sum()), "threshold": high_spend_threshold},
+            "medium_spenders": {"count": int(check_counts[(check_totals > low_spend_threshold) & (check_totals < high_spend_threshold)].sum())},
+            "low_spenders": {"count": int(check_counts[check_totals <= low_spend_threshold].sum()), "threshold": low_spend_threshold},
         }
     else:
         segments = {}
 
     # ── Anomaly Detection ──
-    anomalies = _detect_anomalies(daily_revenue)
+    anomalies = _detect_anomalies(daily_revenue, daily_rev)
 
     # ── Trend Analysis ──
-    trends = _compute_trends(sorted_daily, orders, hourly_pattern, weekly_pattern, check_analysis, daily_revenue)
+    trends = _compute_trends(daily_rev, total_orders, hourly_pattern, weekly_pattern, check_analysis, daily_revenue)
+
+    # ── Forecast ──
+    # Holt-Winters on the complete days (today is still filling up); weekday
+    # averages until there are two weeks of history to fit it on
+    today = ctx.today
+    start = today + timedelta(days=1)
+    complete = day_ordinals < today.toordinal()
+    model = None
+    if complete.any():
+        first = int(day_ordinals[0])
+        series = np.zeros(today.toordinal() - first, dtype=np.int64)
+        series[day_ordinals[complete] - first] = daily_rev[complete]
+        model = seasonal_model.get_model(db, restaurant_id, date.fromordinal(first), series)
+    if model is not None:
+        forecast = _forecast_seasonal(model, start, horizon_days)
+    else:
+        forecast = _forecast_weekday_average(weekly_avg_rev, weekly_days, daily_rev, trends, start, horizon_days)
 
-    # ── 7-Day Forecast ──
-    forecast = _forecast_next_7(weekly_pattern, daily_revenue, trends)
+    profile = seasonal_model.hourly_profile(day_weekdays[day_idx], hours, revenue)
+    hourly_forecast = _forecast_hourly(forecast, profile)
 
     return {
         "daily_revenue": daily_revenue[-30:],
@@ -215,6 +256,8 @@ def get_revenue_forecast(db: Session, restaurant_id: int) -> dict:
         "spending_segments": segments,
         "anomalies": anomalies,
         "forecast": forecast,
+        "hourly_forecast": hourly_forecast,
+        "forecast_model": _model_summary(model),
         "trends": trends,
     }
 
@@ -222,29 +265,27 @@ def get_revenue_forecast(db: Session, restaurant_id: int) -> dict:
 # ─────────────────────────────────────────────────────────────────────────────
 # TREND CALCULATIONS
 # ─────────────────────────────────────────────────────────────────────────────
-def _compute_trends(sorted_daily, orders, hourly_pattern, weekly_pattern, check_analysis, daily_revenue):
-    """Compute comprehensive trend metrics."""
-    revs = [d[1]["revenue"] for d in sorted_daily]
-    total_revenue = sum(revs)
-    total_orders = len(orders)
-    avg_daily = total_revenue / max(len(sorted_daily), 1)
+def _compute_trends(revs, total_orders, hourly_pattern, weekly_pattern, check_analysis, daily_revenue):
+    """Compute comprehensive trend metrics. `revs` is the daily revenue array, oldest first."""
+    total_revenue = int(revs.sum())
+    avg_daily = total_revenue / max(len(revs), 1)
 
     # WoW growth
     if len(revs) >= 14:
-        recent_7 = sum(revs[-7:])
-        previous_7 = sum(revs[-14:-7])
+        recent_7 = int(revs[-7:].sum())
+        previous_7 = int(revs[-14:-7].sum())
         wow_growth = round(((recent_7 - previous_7) / max(previous_7, 1)) * 100, 1)
     elif len(revs) >= 7:
-        recent_7 = sum(revs[-7:])
+        recent_7 = int(revs[-7:].sum())
         wow_growth = 0
     else:
-        recent_7 = sum(revs)
+        recent_7 = total_revenue
         wow_growth = 0
 
     # MoM growth (if enough data)
     if len(revs) >= 28:
-        recent_14 = sum(revs[-14:])
-        previous_14 = sum(revs[-28:-14])
+        recent_14 = int(revs[-14:].sum())
+        previous_14 = int(revs[-28:-14].sum())
         mom_growth = round(((recent_14 - previous_14) / max(previous_14, 1)) * 100, 1)
     else:
         mom_growth = None
@@ -255,10 +296,10 @@ def _compute_trends(sorted_daily, orders, hourly_pattern, weekly_pattern, check_
         sum(h["avg_orders"] for h in peak_hours) / max(len(peak_hours), 1), 1
     ) if peak_hours else 0
 
-    # Best/worst days
+    # Best/worst days (first on ties)
     if daily_revenue:
-        best_day = max(daily_revenue, key=lambda x: x["revenue"])
-        worst_day = min(daily_revenue, key=lambda x: x["revenue"])
+        best_day = daily_revenue[int(np.argmax(revs))]
+        worst_day = daily_revenue[int(np.argmin(revs))]
     else:
         best_day = worst_day = {"date": "N/A", "revenue": 0}
 
@@ -282,77 +323,112 @@ def _compute_trends(sorted_daily, orders, hourly_pattern, weekly_pattern, check_
 # ─────────────────────────────────────────────────────────────────────────────
 # ANOMALY DETECTION
 # ─────────────────────────────────────────────────────────────────────────────
-def _detect_anomalies(daily_revenue):
+def _detect_anomalies(daily_revenue, revs):
     """Flag days with revenue significantly above or below the norm (2 std devs)."""
-    if len(daily_revenue) < 7:
+    if len(revs) < 7:
         return []
 
-    revs = [d["revenue"] for d in daily_revenue]
-    mean = sum(revs) / len(revs)
-    variance = sum((r - mean) ** 2 for r in revs) / len(revs)
-    std_dev = math.sqrt(variance) if variance > 0 else 1
+    mean, std_dev = _mean_std(revs)
+    z_scores = (revs - mean) / (std_dev or 1)
+    flagged = np.flatnonzero(np.abs(z_scores) >= 2)
 
     anomalies = []
-    for d in daily_revenue:
-        z_score = (d["revenue"] - mean) / std_dev
-        if abs(z_score) >= 2:
-            anomalies.append({
-                "date": d["date"],
-                "revenue": d["revenue"],
-                "expected": int(mean),
-                "deviation_pct": round(((d["revenue"] - mean) / mean) * 100, 1),
-                "type": "spike" if z_score > 0 else "dip",
-                "z_score": round(z_score, 2),
-            })
+    for i, z_score in zip(flagged.tolist(), z_scores[flagged].tolist()):
+        d = daily_revenue[i]
+        anomalies.append({
+            "date": d["date"],
+            "revenue": d["revenue"],
+            "expected": int(mean),
+            "deviation_pct": round(((d["revenue"] - mean) / mean) * 100, 1),
+            "type": "spike" if z_score > 0 else "dip",
+            "z_score": round(z_score, 2),
+        })
 
     return sorted(anomalies, key=lambda x: abs(x["z_score"]), reverse=True)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 7-DAY FORECAST
+# FORECAST
 # ─────────────────────────────────────────────────────────────────────────────
-def _forecast_next_7(weekly_pattern, daily_revenue, trends):
-    """Enhanced forecast with confidence intervals."""
-    today = datetime.utcnow()
-    day_map = {p["day"]: p["avg_revenue"] for p in weekly_pattern}
+def _forecast_seasonal(model, start, horizon):
+    """Holt-Winters daily forecast; confidence narrows with the 80% interval relative to the prediction."""
+    forecast = []
+    for f in seasonal_model.forecast_daily(model, start, horizon):
+        predicted = int(f["predicted"])
+        half_width = (f["high"] - f["low"]) / 2
+        confidence = 95 - int(half_width / max(predicted, 1) * 50)
+        forecast.append({
+            "date": f["date"].strftime("%Y-%m-%d"),
+            "day": DAY_NAMES[f["date"].weekday()],
+            "predicted_revenue": predicted,
+            "confidence_low": int(f["low"]),
+            "confidence_high": int(f["high"]),
+            "confidence_pct": min(95, max(50, confidence)),
+        })
+    return forecast
+
 
+def _forecast_weekday_average(weekly_avg_rev, weekly_days, revs, trends, start, horizon):
+    """Fallback for short histories: weekday averages with dampened growth. Weekly arrays are indexed Monday=0."""
     # Calculate daily variance for confidence intervals
-    revs = [d["revenue"] for d in daily_revenue]
-    if revs:
-        mean_rev = sum(revs) / len(revs)
-        std_dev = math.sqrt(sum((r - mean_rev) ** 2 for r in revs) / len(revs)) if len(revs) > 1 else mean_rev * 0.1
+    if len(revs):
+        mean_rev, std_dev = _mean_std(revs)
+        if len(revs) == 1:
+            std_dev = mean_rev * 0.1
     else:
-        mean_rev = 0
         std_dev = 0
 
     # Apply growth trend to forecast
     growth_factor = 1 + (trends.get("week_over_week_growth", 0) / 100 * 0.3)  # Dampened growth
 
-    forecast = []
-    for i in range(1, 8):
-        future_date = today + timedelta(days=i)
-        day_name = future_date.strftime("%A")
-        base_prediction = day_map.get(day_name, int(mean_rev))
-        adjusted = int(base_prediction * growth_factor)
+    dates = [start + timedelta(days=i) for i in range(horizon)]
+    weekdays = np.array([d.weekday() for d in dates])
+    adjusted = (weekly_avg_rev[weekdays] * growth_factor).astype(np.int64)
 
-        # Confidence interval (±1 std dev)
-        ci_low = max(0, int(adjusted - std_dev * 0.7))
-        ci_high = int(adjusted + std_dev * 0.7)
+    # Confidence interval (±0.7 std dev)
+    ci_low = np.maximum(0, (adjusted - std_dev * 0.7).astype(np.int64))
+    ci_high = (adjusted + std_dev * 0.7).astype(np.int64)
 
-        # Confidence score based on data quality
-        data_points = next((p["days_sampled"] for p in weekly_pattern if p["day"] == day_name), 0)
-        confidence = min(95, 60 + data_points * 8)
+    # Confidence score based on data quality
+    confidence = np.minimum(95, 60 + weekly_days[weekdays] * 8)
 
-        forecast.append({
-            "date": future_date.strftime("%Y-%m-%d"),
-            "day": day_name,
-            "predicted_revenue": adjusted,
-            "confidence_low": ci_low,
-            "confidence_high": ci_high,
-            "confidence_pct": confidence,
-        })
+    return [
+        {
+            "date": d.strftime("%Y-%m-%d"),
+            "day": DAY_NAMES[wd],
+            "predicted_revenue": pred,
+            "confidence_low": low,
+            "confidence_high": high,
+            "confidence_pct": conf,
+        }
+        for d, wd, pred, low, high, conf in zip(
+            dates, weekdays.tolist(), adjusted.tolist(), ci_low.tolist(), ci_high.tolist(), confidence.tolist(),
+        )
+    ]
 
-    return forecast
+
+def _forecast_hourly(forecast, profile):
+    """Split each forecast day over the hours by that weekday's revenue profile (hours with no history omitted)."""
+    hourly = []
+    for f in forecast:
+        shares = profile[DAY_NAMES.index(f["day"])]
+        amounts = (f["predicted_revenue"] * shares).astype(np.int64)
+        for h in np.flatnonzero(shares).tolist():
+            hourly.append({"date": f["date"], "hour": h, "predicted_revenue": int(amounts[h])})
+    return hourly
+
+
+def _model_summary(model):
+    if model is None:
+        return {"method": "weekday_average"}
+    return {
+        "method": "holt_winters",
+        "alpha": model.alpha,
+        "beta": model.beta,
+        "gamma": model.gamma,
+        "fitted_through": model.last_day.strftime("%Y-%m-%d"),
+        "residual_std": int(math.sqrt(model.sse / model.n_errors)) if model.n_errors else 0,
+    }
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -371,10 +447,37 @@ def _classify_period(hour):
         return "off-peak"
 
 
+def _nth_checks(totals, counts, ns):
+    """The n-th smallest order totals (0-based) from sorted totals and their order counts."""
+    idx = np.searchsorted(np.cumsum(counts), ns, side="right")
+    return totals[np.minimum(idx, len(totals) - 1)].tolist() if len(totals) else [0] * len(ns)
+
+
+def _sum_by(index, values, size):
+    """Sum `values` into `size` slots by `index` (exact integer sums)."""
+    out = np.zeros(size, dtype=np.int64)
+    np.add.at(out, index, values)
+    return out
+
+
+def _moving_average(values, window):
+    """Trailing mean over up to `window` values, truncated to int like the daily figures."""
+    sums = np.concatenate(([0], np.cumsum(values)))
+    i = np.arange(len(values))
+    return ((sums[i + 1] - sums[np.maximum(0, i - window + 1)]) / np.minimum(i + 1, window)).astype(np.int64)
+
+
+def _mean_std(values):
+    """Population mean and standard deviation."""
+    mean = int(values.sum()) / len(values)
+    return mean, math.sqrt(float(((values - mean) ** 2).sum()) / len(values))
+
+
 def _empty_response():
     return {
         "daily_revenue": [], "hourly_pattern": [], "weekly_pattern": [],
         "revenue_by_type": [], "revenue_by_category": [],
         "check_analysis": {}, "spending_segments": {},
-        "anomalies": [], "forecast": [], "trends": {},
+        "anomalies": [], "forecast": [], "hourly_forecast": [],
+        "forecast_model": _model_summary(None), "trends": {},
     }
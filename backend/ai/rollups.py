@@ -0,0 +1,368 @@
+"""
+Analytics Rollups
+================================================================================
+Incrementally maintained aggregates that let the AI services read a few rows
+per day instead of rescanning the full order history:
+  1. Revenue rollup (restaurant × day × hour × order type)
+  2. Category rollup (restaurant × day × hour × order type × menu category)
+  3. Check-size histogram (restaurant × order total)
+  4. Item co-occurrence (restaurant × item pair) and per-item order counts
+  5. Stock movements (restaurant × inventory item × day: out / in / waste / adjust)
+
+Days and hours are restaurant-local (ai/timebuckets.py). Order write paths call `record_orders` inside their own transaction (sign=-1
+reverses an order, e.g. on cancellation); stock writes call
+`record_stock_movements`. The `ensure_*` functions backfill restaurants whose
+history predates the tables.
+================================================================================
+"""
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from collections import defaultdict
+from itertools import combinations
+import models
+from ai.timebuckets import to_local
+
+BATCH_SIZE = 500  # Rows per multi-VALUES statement (keeps SQLite under its bind-parameter limit)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# UPSERT HELPER
+# ─────────────────────────────────────────────────────────────────────────────
+def increment(db: Session, model, key_columns: list, rows: list):
+    """Add each row's non-key values onto the existing row with the same key, inserting it if missing.
+
+    Runs as a single INSERT .. ON CONFLICT DO UPDATE so concurrent workers never
+    race on a new key. Keys must be unique within `rows`.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    value_columns = [c for c in rows[0] if c not in key_columns]
+    for start in range(0, len(rows), BATCH_SIZE):
+        stmt = insert(table).values(rows[start:start + BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={c: table.c[c] + stmt.excluded[c] for c in value_columns},
+        )
+        db.execute(stmt)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ORDER WRITE PATH
+# ─────────────────────────────────────────────────────────────────────────────
+def record_orders(db: Session, orders: list, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) orders from the rollups.
+
+    Orders must be flushed (created_at set) with `items` and `items.menu_item`
+    loaded or attached; cancelled orders are never passed here with sign=1.
+    """
+    if orders:
+        _record_revenue(db, orders, sign)
+        _record_pairs(db, orders, sign)
+
+
+def _record_revenue(db: Session, orders: list, sign: int):
+    """Revenue, category and check-size rollups.
+
+    Skipped until the restaurant's rollups have been backfilled, like the pair
+    counts: otherwise the first order would create rows and the backfill, seeing
+    them, would never load the history before it.
+    """
+    restaurant_id = orders[0].restaurant_id
+    if not _has_revenue_rollups(db, restaurant_id):
+        return
+    revenue = defaultdict(lambda: {"revenue": 0, "orders": 0, "items": 0})
+    category = defaultdict(lambda: {"revenue": 0, "qty": 0})
+    checks = defaultdict(int)
+
+    for order in orders:
+        otype = order.order_type.value if order.order_type else "dine_in"
+        local = to_local(order.created_at)
+        key = (local.date(), local.hour, otype)
+        total = order.total or 0
+        revenue[key]["revenue"] += sign * total
+        revenue[key]["orders"] += sign
+        checks[total] += sign
+        for oi in order.items:
+            revenue[key]["items"] += sign * oi.quantity
+            cat = (oi.menu_item.category if oi.menu_item else None) or "Unknown"
+            category[key + (cat,)]["revenue"] += sign * oi.quantity * oi.unit_price
+            category[key + (cat,)]["qty"] += sign * oi.quantity
+
+    for model, key_columns, rows in _rollup_rows(restaurant_id, revenue, category, checks):
+        increment(db, model, key_columns, rows)
+
+
+def _record_pairs(db: Session, orders: list, sign: int):
+    """Co-occurrence counts: O(k²) upserts for a ticket with k distinct items.
+
+    Skipped until the restaurant's counts have been backfilled — the backfill
+    reads raw orders, so it picks these up and nothing is counted twice.
+    """
+    restaurant_id = orders[0].restaurant_id
+    if not _has_pair_counts(db, restaurant_id):
+        return
+    item_counts = defaultdict(int)
+    pair_counts = defaultdict(int)
+    for order in orders:
+        item_ids = sorted({oi.menu_item_id for oi in order.items if oi.menu_item_id is not None})
+        for item_id in item_ids:
+            item_counts[item_id] += sign
+        for pair in combinations(item_ids, 2):
+            pair_counts[pair] += sign
+
+    increment(db, models.ItemOrderCount, ["restaurant_id", "menu_item_id"], [
+        {"restaurant_id": restaurant_id, "menu_item_id": item_id, "orders": n}
+        for item_id, n in item_counts.items()
+    ])
+    increment(db, models.ItemPairCount, ["restaurant_id", "item_a", "item_b"], [
+        {"restaurant_id": restaurant_id, "item_a": a, "item_b": b, "orders": n}
+        for (a, b), n in pair_counts.items()
+    ])
+
+
+def _rollup_rows(restaurant_id, revenue, category, checks):
+    """Flatten the in-memory aggregates into (model, key columns, rows) per rollup table."""
+    return [
+        (models.RevenueRollup, ["restaurant_id", "day", "hour", "order_type"], [
+            {"restaurant_id": restaurant_id, "day": d, "hour": h, "order_type": t, **v}
+            for (d, h, t), v in revenue.items()
+        ]),
+        (models.CategoryRollup, ["restaurant_id", "day", "hour", "order_type", "category"], [
+            {"restaurant_id": restaurant_id, "day": d, "hour": h, "order_type": t, "category": c, **v}
+            for (d, h, t, c), v in category.items()
+        ]),
+        (models.CheckSizeRollup, ["restaurant_id", "total"], [
+            {"restaurant_id": restaurant_id, "total": total, "orders": n}
+            for total, n in checks.items()
+        ]),
+    ]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# STOCK WRITE PATH
+# ─────────────────────────────────────────────────────────────────────────────
+def record_stock_movements(db: Session, restaurant_id: int, movements: list):
+    """Add flushed StockMovements (created_at set) to the daily stock rollups.
+
+    Skipped until the restaurant's rollups have been backfilled — the backfill
+    reads raw movements, so it picks these up and nothing is counted twice.
+    """
+    if movements and _has_stock_rollups(db, restaurant_id):
+        increment(db, models.StockDailyRollup, ["restaurant_id", "inventory_item_id", "day"],
+                  _stock_rows(restaurant_id, movements))
+
+
+def _stock_rows(restaurant_id, movements):
+    """(inventory_item_id, movement_type, quantity, reason, created_at) rows → one rollup row per item × day."""
+    totals = defaultdict(lambda: {"out_qty": 0.0, "in_qty": 0.0, "waste_qty": 0.0, "adjust_qty": 0.0})
+    for m in movements:
+        day = totals[(m.inventory_item_id, to_local(m.created_at).date())]
+        if m.movement_type == models.StockMovementType.OUT:
+            day["out_qty"] += m.quantity
+            if m.reason and "waste" in m.reason.lower():
+                day["waste_qty"] += m.quantity
+        elif m.movement_type == models.StockMovementType.IN:
+            day["in_qty"] += m.quantity
+        elif m.movement_type == models.StockMovementType.ADJUST:
+            day["adjust_qty"] += m.quantity
+    return [
+        {"restaurant_id": restaurant_id, "inventory_item_id": item_id, "day": d, **v}
+        for (item_id, d), v in totals.items()
+    ]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BACKFILL
+# ─────────────────────────────────────────────────────────────────────────────
+def ensure_revenue_rollups(db: Session, restaurant_id: int):
+    """Build the rollups from raw orders the first time a restaurant is analysed."""
+    if _has_revenue_rollups(db, restaurant_id):
+        return
+    has_orders = db.query(models.Order.id).filter(
+        models.Order.restaurant_id == restaurant_id,
+        models.Order.status != models.OrderStatus.CANCELLED,
+    ).first()
+    if not has_orders:
+        return
+    try:
+        rebuild_revenue_rollups(db, restaurant_id)
+        db.commit()
+    except IntegrityError:
+        # Another worker backfilled the same restaurant first — keep theirs
+        db.rollback()
+
+
+def rebuild_revenue_rollups(db: Session, restaurant_id: int):
+    """Recompute all revenue rollups for a restaurant from its order history."""
+    for model in (models.RevenueRollup, models.CategoryRollup, models.CheckSizeRollup):
+        db.query(model).filter(model.restaurant_id == restaurant_id).delete(synchronize_session=False)
+
+    active = (
+        models.Order.restaurant_id == restaurant_id,
+        models.Order.status != models.OrderStatus.CANCELLED,
+    )
+    order_rows = db.query(
+        models.Order.id, models.Order.created_at, models.Order.order_type, models.Order.total,
+    ).filter(*active).all()
+    item_rows = (
+        db.query(
+            models.OrderItem.order_id, models.OrderItem.quantity,
+            models.OrderItem.unit_price, models.MenuItem.category,
+        )
+        .join(models.Order, models.Order.id == models.OrderItem.order_id)
+        .outerjoin(models.MenuItem, models.MenuItem.id == models.OrderItem.menu_item_id)
+        .filter(*active)
+        .all()
+    )
+
+    keys = {}
+    revenue = defaultdict(lambda: {"revenue": 0, "orders": 0, "items": 0})
+    checks = defaultdict(int)
+    for oid, created_at, order_type, total in order_rows:
+        local = to_local(created_at)
+        key = (local.date(), local.hour, order_type.value if order_type else "dine_in")
+        keys[oid] = key
+        revenue[key]["revenue"] += total or 0
+        revenue[key]["orders"] += 1
+        checks[total or 0] += 1
+
+    category = defaultdict(lambda: {"revenue": 0, "qty": 0})
+    for oid, qty, unit_price, cat in item_rows:
+        key = keys[oid]
+        revenue[key]["items"] += qty
+        category[key + (cat or "Unknown",)]["revenue"] += qty * unit_price
+        category[key + (cat or "Unknown",)]["qty"] += qty
+
+    # Plain INSERTs (not upserts) so a concurrent backfill fails instead of double counting
+    for model, _, rows in _rollup_rows(restaurant_id, revenue, category, checks):
+        for start in range(0, len(rows), BATCH_SIZE):
+            db.execute(model.__table__.insert(), rows[start:start + BATCH_SIZE])
+    db.flush()
+
+
+def _has_revenue_rollups(db: Session, restaurant_id: int) -> bool:
+    return db.query(models.RevenueRollup.id).filter(
+        models.RevenueRollup.restaurant_id == restaurant_id
+    ).first() is not None
+
+
+def _has_pair_counts(db: Session, restaurant_id: int) -> bool:
+    return db.query(models.ItemOrderCount.id).filter(
+        models.ItemOrderCount.restaurant_id == restaurant_id
+    ).first() is not None
+
+
+def ensure_pair_counts(db: Session, restaurant_id: int):
+    """Build the co-occurrence counts from raw orders the first time a restaurant is analysed."""
+    if _has_pair_counts(db, restaurant_id):
+        return
+    try:
+        if rebuild_pair_counts(db, restaurant_id):
+            db.commit()
+    except IntegrityError:
+        # Another worker backfilled the same restaurant first — keep theirs
+        db.rollback()
+
+
+def rebuild_pair_counts(db: Session, restaurant_id: int) -> bool:
+    """Recompute item and pair counts from order history. Returns False if there was nothing to count.
+
+    Pairs come from a self-join of each order's distinct items, grouped by
+    (a, b), and are inserted in first-seen order so row ids keep that order.
+    """
+    for model in (models.ItemOrderCount, models.ItemPairCount):
+        db.query(model).filter(model.restaurant_id == restaurant_id).delete(synchronize_session=False)
+
+    # One row per (order, item), however many lines the item has in the order
+    basket = (
+        select(models.OrderItem.order_id, models.OrderItem.menu_item_id)
+        .join(models.Order)
+        .filter(
+            models.Order.restaurant_id == restaurant_id,
+            models.Order.status != models.OrderStatus.CANCELLED,
+            models.OrderItem.menu_item_id.isnot(None),
+        )
+        .distinct()
+        .cte("basket")
+    )
+    item_rows = [
+        {"restaurant_id": restaurant_id, "menu_item_id": item_id, "orders": n}
+        for item_id, n in db.execute(
+            select(basket.c.menu_item_id, func.count())
+            .group_by(basket.c.menu_item_id)
+            .order_by(basket.c.menu_item_id)
+        )
+    ]
+    if not item_rows:
+        return False
+
+    a, b = basket.alias("a"), basket.alias("b")
+    pair_rows = [
+        {"restaurant_id": restaurant_id, "item_a": item_a, "item_b": item_b, "orders": n}
+        for item_a, item_b, n in db.execute(
+            select(a.c.menu_item_id, b.c.menu_item_id, func.count())
+            .select_from(a)
+            .join(b, and_(b.c.order_id == a.c.order_id, b.c.menu_item_id > a.c.menu_item_id))
+            .group_by(a.c.menu_item_id, b.c.menu_item_id)
+            .order_by(func.min(a.c.order_id), a.c.menu_item_id, b.c.menu_item_id)
+        )
+    ]
+
+    # Plain INSERTs (not upserts) so a concurrent backfill fails instead of double counting
+    for model, rows in ((models.ItemOrderCount, item_rows), (models.ItemPairCount, pair_rows)):
+        for start in range(0, len(rows), BATCH_SIZE):
+            db.execute(model.__table__.insert(), rows[start:start + BATCH_SIZE])
+    db.flush()
+    return True
+
+
+def _has_stock_rollups(db: Session, restaurant_id: int) -> bool:
+    return db.query(models.StockDailyRollup.id).filter(
+        models.StockDailyRollup.restaurant_id == restaurant_id
+    ).first() is not None
+
+
+def ensure_stock_rollups(db: Session, restaurant_id: int):
+    """Build the daily stock rollups from raw movements the first time a restaurant is analysed."""
+    if _has_stock_rollups(db, restaurant_id):
+        return
+    try:
+        if rebuild_stock_rollups(db, restaurant_id):
+            db.commit()
+    except IntegrityError:
+        # Another worker backfilled the same restaurant first — keep theirs
+        db.rollback()
+
+
+def rebuild_stock_rollups(db: Session, restaurant_id: int) -> bool:
+    """Recompute the daily stock rollups from movement history. Returns False if there were no movements."""
+    db.query(models.StockDailyRollup).filter(
+        models.StockDailyRollup.restaurant_id == restaurant_id
+    ).delete(synchronize_session=False)
+    movements = (
+        db.query(
+            models.StockMovement.inventory_item_id, models.StockMovement.movement_type,
+            models.StockMovement.quantity, models.StockMovement.reason, models.StockMovement.created_at,
+        )
+        .join(models.InventoryItem)
+        .filter(models.InventoryItem.restaurant_id == restaurant_id, models.StockMovement.created_at.isnot(None))
+        .order_by(models.StockMovement.id)
+        .all()
+    )
+    rows = _stock_rows(restaurant_id, movements)
+    if not rows:
+        return False
+    # Plain INSERTs (not upserts) so a concurrent backfill fails instead of double counting
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(models.StockDailyRollup.__table__.insert(), rows[start:start + BATCH_SIZE])
+    db.flush()
+    return True
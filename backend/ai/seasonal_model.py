@@ -0,0 +1,182 @@
+"""
+Seasonal Revenue Model
+================================================================================
+Additive Holt-Winters (level + trend + weekly seasonality) on the daily revenue
+series, with its fitted state persisted per restaurant in `ForecastModel`:
+  1. First fit: smoothing parameters tuned by grid search on one-step errors
+     (all candidates run side by side as NumPy arrays), state from that run
+  2. New complete days: the stored state is stepped forward over just those
+     days — O(new days), not a refit
+  3. Full refit when past days changed under the model (backdated imports,
+     late cancellations) or the parameters are FORECAST_RETUNE_DAYS old
+  4. Daily forecasts over any horizon with widening prediction intervals;
+     hourly forecasts split each day by the weekday × hour revenue profile
+================================================================================
+"""
+
+from datetime import date, datetime, timedelta
+from itertools import product
+import json
+import math
+import os
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+import models
+
+SEASON = 7              # Weekly seasonality on a daily series
+MIN_DAYS = 2 * SEASON   # Two full weeks to initialise level, trend and season
+RETUNE_DAYS = int(os.getenv("FORECAST_RETUNE_DAYS", 28))
+INTERVAL_Z = 1.2816     # 80% prediction interval
+
+ALPHAS = (0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+BETAS = (0.0, 0.02, 0.05, 0.1, 0.2)
+GAMMAS = (0.05, 0.1, 0.2, 0.3, 0.5)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# FIT / UPDATE
+# ─────────────────────────────────────────────────────────────────────────────
+def get_model(db: Session, restaurant_id: int, first_day: date, revenues: np.ndarray):
+    """The restaurant's model, brought up to date with `revenues` (one value per day from `first_day`).
+
+    Returns None while there are fewer than MIN_DAYS days. Commits the session
+    when the stored model changes.
+    """
+    if len(revenues) < MIN_DAYS:
+        return None
+    last_day = first_day + timedelta(days=len(revenues) - 1)
+    row = _load(db, restaurant_id)
+
+    if row is not None and row.first_day == first_day and row.last_day <= last_day:
+        fitted = (row.last_day - first_day).days + 1
+        unchanged = int(revenues[:fitted].sum()) == row.fitted_revenue
+        if unchanged and (last_day - row.tuned_on).days < RETUNE_DAYS:
+            if row.last_day < last_day:
+                _step_forward(row, revenues[fitted:], first_day)
+                db.commit()
+            return row
+
+    params, state = _fit(revenues)
+    if row is None:
+        row = models.ForecastModel(restaurant_id=restaurant_id)
+        db.add(row)
+    row.alpha, row.beta, row.gamma = params
+    row.first_day = first_day
+    row.tuned_on = last_day
+    _store_state(row, state, first_day, last_day, int(revenues.sum()))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker fitted the same restaurant first — use theirs
+        db.rollback()
+        row = _load(db, restaurant_id)
+    return row
+
+
+def _load(db: Session, restaurant_id: int):
+    return db.query(models.ForecastModel).filter(models.ForecastModel.restaurant_id == restaurant_id).first()
+
+
+def _fit(y: np.ndarray):
+    """Grid-search (alpha, beta, gamma) on one-step SSE; returns (params, state of the best run)."""
+    grid = np.array(list(product(ALPHAS, BETAS, GAMMAS)))
+    level, trend, season = _initial_state(y, len(grid))
+    state = _run(y[SEASON:], SEASON, grid[:, 0], grid[:, 1], grid[:, 2], level, trend, season,
+                 np.zeros(len(grid)), np.zeros(len(grid), dtype=np.int64))
+    best = int(np.argmin(state[3]))
+    return tuple(grid[best].tolist()), tuple(s[best] for s in state)
+
+
+def _initial_state(y: np.ndarray, n: int):
+    """Level and trend from the first two weeks; season from the first week's deviations (by series position)."""
+    week1, week2 = y[:SEASON].astype(float), y[SEASON:MIN_DAYS].astype(float)
+    level = week1.mean()
+    trend = (week2.mean() - week1.mean()) / SEASON
+    season = week1 - level
+    return np.full(n, level), np.full(n, trend), np.tile(season, (n, 1))
+
+
+def _run(y, start, alpha, beta, gamma, level, trend, season, sse, n_errors):
+    """Holt-Winters recursion over `y` (series positions start, start+1, ...), vectorised over candidates.
+
+    `season` is (candidates, 7), indexed by series position mod 7. One-step
+    errors count once a full season of updates has run.
+    """
+    season = season.copy()
+    for t, value in enumerate(y.tolist(), start):
+        k = t % SEASON
+        s = season[:, k]
+        error = value - (level + trend + s)
+        if t >= MIN_DAYS:
+            sse = sse + error ** 2
+            n_errors = n_errors + 1
+        new_level = alpha * (value - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[:, k] = gamma * (value - new_level) + (1 - gamma) * s
+        level = new_level
+    return level, trend, season, sse, n_errors
+
+
+def _step_forward(row, new_values: np.ndarray, first_day: date):
+    """Advance a stored model over days after its last fitted day."""
+    fitted = (row.last_day - first_day).days + 1
+    season = np.array([json.loads(row.seasonal)])
+    state = _run(
+        new_values, fitted,
+        np.array([row.alpha]), np.array([row.beta]), np.array([row.gamma]),
+        np.array([row.level]), np.array([row.trend]), season,
+        np.array([row.sse]), np.array([row.n_errors]),
+    )
+    last_day = row.last_day + timedelta(days=len(new_values))
+    _store_state(row, tuple(s[0] for s in state), first_day, last_day,
+                 row.fitted_revenue + int(new_values.sum()))
+
+
+def _store_state(row, state, first_day: date, last_day: date, fitted_revenue: int):
+    level, trend, season, sse, n_errors = state
+    row.level = float(level)
+    row.trend = float(trend)
+    row.seasonal = json.dumps([float(s) for s in season])
+    row.sse = float(sse)
+    row.n_errors = int(n_errors)
+    row.last_day = last_day
+    row.fitted_revenue = fitted_revenue
+    row.fitted_at = datetime.utcnow()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# FORECAST
+# ─────────────────────────────────────────────────────────────────────────────
+def forecast_daily(row, start: date, horizon: int) -> list:
+    """Daily forecasts for `horizon` days from `start` (after the model's last fitted day)."""
+    season = np.array(json.loads(row.seasonal))
+    fitted = (row.last_day - row.first_day).days + 1
+    h = np.arange((start - row.last_day).days, (start - row.last_day).days + horizon)
+    predicted = np.maximum(0, row.level + h * row.trend + season[(fitted - 1 + h) % SEASON])
+
+    # h-step variance of additive Holt-Winters: sigma² (1 + sum_{j<h} c_j²)
+    sigma = math.sqrt(row.sse / row.n_errors) if row.n_errors else 0.0
+    j = np.arange(1, h[-1])
+    c = row.alpha * (1 + j * row.beta) + row.gamma * (j % SEASON == 0)
+    widths = INTERVAL_Z * sigma * np.sqrt(1 + np.concatenate(([0.0], np.cumsum(c ** 2)))[h - 1])
+
+    return [
+        {
+            "date": row.last_day + timedelta(days=i),
+            "predicted": p,
+            "low": max(0.0, p - w),
+            "high": p + w,
+        }
+        for i, p, w in zip(h.tolist(), predicted.tolist(), widths.tolist())
+    ]
+
+
+def hourly_profile(weekdays: np.ndarray, hours: np.ndarray, revenue: np.ndarray) -> np.ndarray:
+    """(7, 24) share of each weekday's revenue by hour; weekdays without history use the overall shape."""
+    totals = np.zeros((SEASON, 24))
+    np.add.at(totals, (weekdays, hours), revenue)
+    overall = totals.sum(axis=0)
+    overall = overall / overall.sum() if overall.sum() else np.full(24, 1 / 24)
+    day_totals = totals.sum(axis=1, keepdims=True)
+    return np.where(day_totals > 0, totals / np.where(day_totals > 0, day_totals, 1), overall)
@@ -0,0 +1,259 @@
+"""
+Kitchen Timing Sketches
+================================================================================
+Mergeable quantile sketches (KLL) of kitchen timings, one row per
+restaurant × metric × station × menu item × local day:
+  - prep         per-item prep minutes, from PrepTime rows (written by the
+                 seed scripts; the backfill picks them up)
+  - completion   order created → served minutes (station "", item 0)
+
+Each row also keeps n / sum / sum of squares / min / max, so means and
+standard deviations stay exact; only percentiles are approximate. KDS
+merges the day rows at query time, so p50/p90/p95 cost the same whatever
+the length of the history.
+
+Like the rollups, rows are only updated once a restaurant has been
+backfilled (`ensure_timing_sketches`) — the backfill reads PrepTime and
+orders, so nothing is counted twice. Sketches are insert-only: an order
+cancelled after it was served stays in the completion sketch.
+================================================================================
+"""
+
+from collections import defaultdict
+import json
+import math
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+import models
+from ai.timebuckets import to_local
+
+SKETCH_K = 200     # Top-level capacity; exact up to K values, rank error under ~1.7% at K=200
+MIN_CAPACITY = 8
+BATCH_SIZE = 500
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# KLL SKETCH
+# ─────────────────────────────────────────────────────────────────────────────
+class KLL:
+    """KLL quantile sketch: level h holds values of weight 2**h, each level a
+    fraction (2/3) of the one above in capacity. Compaction sorts a full level
+    and promotes every other value, alternating the offset per level so the
+    result is deterministic."""
+
+    def __init__(self, k: int = SKETCH_K):
+        self.k = k
+        self.n = 0
+        self.levels = [[]]
+        self.flips = 0  # Bit h: offset of level h's next compaction
+
+    def update(self, value: float):
+        self.levels[0].append(value)
+        self.n += 1
+        self._compress()
+
+    def merge(self, other: "KLL"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, values in zip(self.levels, other.levels):
+            level.extend(values)
+        self.n += other.n
+        self._compress()
+
+    def quantile(self, q: float) -> float:
+        """Value at 0-based rank int(q * n) — times[int(n * q)] on the sorted values when exact."""
+        weighted = sorted((v, 1 << h) for h, level in enumerate(self.levels) for v in level)
+        rank = min(int(q * self.n), self.n - 1)
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen > rank:
+                return value
+        return weighted[-1][0] if weighted else 0.0
+
+    def _capacity(self, h: int) -> int:
+        return max(MIN_CAPACITY, math.ceil(self.k * (2 / 3) ** (len(self.levels) - h - 1)))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) <= self._capacity(h):
+                h += 1
+                continue
+            if h + 1 == len(self.levels):
+                self.levels.append([])
+            level.sort()
+            kept = [level.pop()] if len(level) % 2 else []  # Odd count: one value stays at this weight
+            offset = (self.flips >> h) & 1
+            self.flips ^= 1 << h
+            self.levels[h + 1].extend(level[offset::2])
+            self.levels[h] = kept
+            h = 0  # Capacities shift when a level is added
+
+    def to_json(self) -> str:
+        return json.dumps({"k": self.k, "n": self.n, "f": self.flips, "l": self.levels})
+
+    @classmethod
+    def from_json(cls, text: str) -> "KLL":
+        data = json.loads(text)
+        sketch = cls(data["k"])
+        sketch.n, sketch.flips, sketch.levels = data["n"], data["f"], data["l"]
+        return sketch
+
+
+class Summary:
+    """Exact moments plus a KLL sketch — what one sketch row (or a merge of them) describes."""
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = None
+        self.max = None
+        self.sketch = KLL()
+
+    def add(self, value: float):
+        self.n += 1
+        self.total += value
+        self.total_sq += value * value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.sketch.update(value)
+
+    def merge_row(self, row):
+        """Fold in a TimingSketch row (or a row of its columns)."""
+        self.n += row.n
+        self.total += row.total
+        self.total_sq += row.total_sq
+        self.min = row.min_value if self.min is None else min(self.min, row.min_value)
+        self.max = row.max_value if self.max is None else max(self.max, row.max_value)
+        self.sketch.merge(KLL.from_json(row.sketch))
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    @property
+    def std_dev(self) -> float:
+        """Population standard deviation (0 for a single value)."""
+        if self.n < 2:
+            return 0.0
+        return math.sqrt(max(0.0, self.total_sq / self.n - self.mean ** 2))
+
+    def quantile(self, q: float) -> float:
+        return self.sketch.quantile(q) if self.n else 0.0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# WRITE PATH
+# ─────────────────────────────────────────────────────────────────────────────
+def record_completion(db: Session, order):
+    """Sketch an order's created → completed minutes (call once, when completed_at is first set)."""
+    minutes = (order.completed_at - order.created_at).total_seconds() / 60
+    _record(db, order.restaurant_id, "completion", [(("", 0, to_local(order.created_at).date()), minutes)])
+
+
+def _record(db: Session, restaurant_id: int, metric: str, values: list):
+    """Add ((station, menu_item_id, day), value) pairs to their rows, creating rows as needed."""
+    if not values or not _has_sketches(db, restaurant_id):
+        return
+    by_key = defaultdict(list)
+    for key, value in values:
+        by_key[key].append(value)
+
+    table = models.TimingSketch.__table__
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    empty = KLL().to_json()
+    for (station, menu_item_id, day), new_values in by_key.items():
+        key = {"restaurant_id": restaurant_id, "metric": metric, "station": station,
+               "menu_item_id": menu_item_id, "day": day}
+        # Make sure the row exists, then lock it for the read-modify-write
+        db.execute(insert(table).values(
+            **key, n=0, total=0.0, total_sq=0.0, min_value=new_values[0], max_value=new_values[0], sketch=empty,
+        ).on_conflict_do_nothing(index_elements=list(key)))
+        row = db.query(models.TimingSketch).filter_by(**key).with_for_update().populate_existing().one()
+        summary = Summary()
+        summary.merge_row(row)
+        for value in new_values:
+            summary.add(value)
+        row.n, row.total, row.total_sq = summary.n, summary.total, summary.total_sq
+        row.min_value, row.max_value = summary.min, summary.max
+        row.sketch = summary.sketch.to_json()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BACKFILL
+# ─────────────────────────────────────────────────────────────────────────────
+def _has_sketches(db: Session, restaurant_id: int) -> bool:
+    return db.query(models.TimingSketch.id).filter(
+        models.TimingSketch.restaurant_id == restaurant_id
+    ).first() is not None
+
+
+def ensure_timing_sketches(db: Session, restaurant_id: int):
+    """Build the sketches from PrepTime and orders the first time a restaurant is analysed."""
+    if _has_sketches(db, restaurant_id):
+        return
+    try:
+        if rebuild_timing_sketches(db, restaurant_id):
+            db.commit()
+    except IntegrityError:
+        # Another worker backfilled the same restaurant first — keep theirs
+        db.rollback()
+
+
+def rebuild_timing_sketches(db: Session, restaurant_id: int) -> bool:
+    """Recompute every sketch row for a restaurant. Returns False if there was nothing to sketch."""
+    db.query(models.TimingSketch).filter(
+        models.TimingSketch.restaurant_id == restaurant_id
+    ).delete(synchronize_session=False)
+
+    summaries = defaultdict(Summary)
+    prep_rows = (
+        db.query(
+            models.PrepTime.station, models.OrderItem.menu_item_id,
+            models.PrepTime.started_at, models.PrepTime.actual_minutes,
+        )
+        .join(models.OrderItem, models.OrderItem.id == models.PrepTime.order_item_id)
+        .join(models.Order, models.Order.id == models.OrderItem.order_id)
+        .filter(
+            models.Order.restaurant_id == restaurant_id,
+            models.PrepTime.started_at.isnot(None),
+            models.PrepTime.actual_minutes.isnot(None),
+        )
+        .order_by(models.PrepTime.id)
+    )
+    for station, menu_item_id, started_at, minutes in prep_rows:
+        summaries[("prep", station or "main", menu_item_id or 0, to_local(started_at).date())].add(minutes)
+
+    completion_rows = db.query(models.Order.created_at, models.Order.completed_at).filter(
+        models.Order.restaurant_id == restaurant_id,
+        models.Order.status.in_([models.OrderStatus.SERVED, models.OrderStatus.READY]),
+        models.Order.created_at.isnot(None),
+        models.Order.completed_at.isnot(None),
+    ).order_by(models.Order.id)
+    for created_at, completed_at in completion_rows:
+        summaries[("completion", "", 0, to_local(created_at).date())].add(
+            (completed_at - created_at).total_seconds() / 60
+        )
+
+    if not summaries:
+        return False
+    rows = [
+        {
+            "restaurant_id": restaurant_id, "metric": metric, "station": station,
+            "menu_item_id": menu_item_id, "day": day,
+            "n": s.n, "total": s.total, "total_sq": s.total_sq,
+            "min_value": s.min, "max_value": s.max, "sketch": s.sketch.to_json(),
+        }
+        for (metric, station, menu_item_id, day), s in summaries.items()
+    ]
+    # Plain INSERTs (not upserts) so a concurrent backfill fails instead of double counting
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(models.TimingSketch.__table__.insert(), rows[start:start + BATCH_SIZE])
+    db.flush()
+    return True
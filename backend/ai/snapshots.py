@@ -0,0 +1,198 @@
+"""
+Analysis Snapshots
+================================================================================
+Stored results of the /ai/* analyzers (`AnalysisSnapshot`), so the first
+request of the day reads one row instead of running every full analysis:
+  - scheduler.py runs `refresh_all` on one worker every
+    AI_SNAPSHOT_INTERVAL_SECONDS; a restaurant's snapshots are recomputed when
+    its DataVersion moved or they are AI_SNAPSHOT_MAX_AGE_SECONDS old (which
+    bounds drift in "today"-relative figures)
+  - routes call `serve`, which returns the stored result while it matches the
+    data version. Otherwise, or with `fresh=True`, the analysis runs in the
+    request and the snapshot is replaced.
+  - AI_SNAPSHOT_MAX_STALE_SECONDS (default 0, off) trades freshness for
+    latency: a snapshot older than the latest write, but younger than this,
+    is still served while the scheduler holds its lease, i.e. while a
+    refresh that will pick up the write is due. Reads can then miss recent
+    writes for up to that long.
+
+Parsed snapshots are held in ai/cache.py, so repeat reads skip the JSON decode.
+================================================================================
+"""
+
+from datetime import date, datetime
+import json
+import os
+import time
+from sqlalchemy.orm import Session
+import metrics
+import models
+from ai import cache, menu_engineer, revenue_forecaster, kds_intelligence, inventory_predictor
+from ai import reservation_optimizer, ops_manager
+from ai.context import AnalysisContext
+from middleware import timing
+
+INTERVAL_SECONDS = float(os.getenv("AI_SNAPSHOT_INTERVAL_SECONDS", 300))  # 0 disables the scheduler
+MAX_STALE_SECONDS = float(os.getenv("AI_SNAPSHOT_MAX_STALE_SECONDS", 0))
+LEASE_JOB = "ai_snapshots"  # scheduler.py's job lease for refresh_all
+MAX_AGE_SECONDS = float(os.getenv("AI_SNAPSHOT_MAX_AGE_SECONDS", 3600))
+
+
+def _menu_engineering(ctx: AnalysisContext) -> dict:
+    data = menu_engineer.get_menu_engineering(ctx)
+    data["upsell_pairs"] = menu_engineer.get_upsell_pairs(ctx)
+    return data
+
+
+def _revenue_forecast(ctx: AnalysisContext, horizon: int = 7) -> dict:
+    return revenue_forecaster.get_revenue_forecast(ctx, horizon_days=horizon)
+
+
+ANALYZERS = {
+    "dashboard": ops_manager.get_operations_dashboard,
+    "menu_engineering": _menu_engineering,
+    "revenue_forecast": _revenue_forecast,
+    "kds_intelligence": kds_intelligence.get_kds_intelligence,
+    "inventory_predictions": inventory_predictor.get_inventory_predictions,
+    "reservation_insights": reservation_optimizer.get_reservation_insights,
+}
+
+# What the scheduler precomputes — each route's default parameters
+SCHEDULED = [
+    ("menu_engineering", {}),
+    ("revenue_forecast", {"horizon": 7}),
+    ("kds_intelligence", {}),
+    ("inventory_predictions", {}),
+    ("reservation_insights", {}),
+    ("dashboard", {}),
+]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# READ SIDE
+# ─────────────────────────────────────────────────────────────────────────────
+def serve(db: Session, restaurant_id: int, analyzer: str, fresh: bool = False, **params) -> tuple:
+    """(result, computed_at) for an analyzer — the stored snapshot when usable, else computed now.
+
+    Results are shared between requests — callers must not mutate them.
+    """
+    key = _params_key(params)
+    version = cache.current_version(db, restaurant_id)
+    if not fresh:
+        row = db.query(
+            models.AnalysisSnapshot.id, models.AnalysisSnapshot.data_version, models.AnalysisSnapshot.computed_at,
+        ).filter(
+            models.AnalysisSnapshot.restaurant_id == restaurant_id,
+            models.AnalysisSnapshot.analyzer == analyzer,
+            models.AnalysisSnapshot.params == key,
+        ).first()
+        usable = row is not None and _usable(db, row, version, datetime.utcnow())
+        metrics.cache_lookup("snapshot", analyzer, hit=usable)
+        if usable:
+            result = cache.cached(
+                db, restaurant_id, analyzer, lambda: _load_result(db, row.id),
+                computed_at=row.computed_at, **params,
+            )
+            return result, row.computed_at
+
+    ctx = AnalysisContext(db, restaurant_id)
+    result = _refresh(db, restaurant_id, analyzer, params, version, ctx)
+    return result, ctx.now
+
+
+def _usable(db: Session, row, version: int, now: datetime) -> bool:
+    age = (now - row.computed_at).total_seconds()
+    if row.data_version == version:
+        return age < MAX_AGE_SECONDS
+    return age < MAX_STALE_SECONDS and _refresh_due(db, now)
+
+
+def _refresh_due(db: Session, now: datetime) -> bool:
+    """Whether a worker holds the snapshot job's lease, so a refresh runs by its expiry."""
+    return db.query(models.JobLease.id).filter(
+        models.JobLease.job == LEASE_JOB,
+        models.JobLease.expires_at > now,
+    ).first() is not None
+
+
+def _load_result(db: Session, snapshot_id: int):
+    return json.loads(db.query(models.AnalysisSnapshot.result).filter(
+        models.AnalysisSnapshot.id == snapshot_id
+    ).scalar())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# WRITE SIDE
+# ─────────────────────────────────────────────────────────────────────────────
+def refresh_all(db: Session, renew=None):
+    """Bring every restaurant's scheduled snapshots up to date.
+
+    `renew` is called between restaurants; returning False (the caller lost
+    its job lease) stops the run.
+    """
+    restaurant_ids = [rid for (rid,) in db.query(models.Restaurant.id).order_by(models.Restaurant.id)]
+    for restaurant_id in restaurant_ids:
+        refresh_restaurant(db, restaurant_id)
+        if renew is not None and not renew():
+            return
+
+
+def refresh_restaurant(db: Session, restaurant_id: int):
+    """Recompute the restaurant's out-of-date snapshots; they share one AnalysisContext."""
+    version = cache.current_version(db, restaurant_id)
+    stored = {
+        (row.analyzer, row.params): row
+        for row in db.query(
+            models.AnalysisSnapshot.analyzer, models.AnalysisSnapshot.params,
+            models.AnalysisSnapshot.data_version, models.AnalysisSnapshot.computed_at,
+        ).filter(models.AnalysisSnapshot.restaurant_id == restaurant_id)
+    }
+    ctx = None
+    for analyzer, params in SCHEDULED:
+        row = stored.get((analyzer, _params_key(params)))
+        if row and row.data_version == version and (datetime.utcnow() - row.computed_at).total_seconds() < MAX_AGE_SECONDS:
+            continue
+        ctx = ctx or AnalysisContext(db, restaurant_id)
+        try:
+            _refresh(db, restaurant_id, analyzer, params, version, ctx)
+        except Exception as e:
+            db.rollback()
+            print(f"[WARN] Snapshot {analyzer} failed for restaurant {restaurant_id}: {e}")
+
+
+def _refresh(db: Session, restaurant_id: int, analyzer: str, params: dict, version: int, ctx: AnalysisContext):
+    """Run an analyzer and store its result as the snapshot for `version`. Commits."""
+    started = time.perf_counter()
+    result = ANALYZERS[analyzer](ctx, **params)
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    timing.record(f"ai.{analyzer}", duration_ms)
+    metrics.observe_analyzer(analyzer, duration_ms / 1000)
+
+    table = models.AnalysisSnapshot.__table__
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table).values(
+        restaurant_id=restaurant_id, analyzer=analyzer, params=_params_key(params),
+        data_version=version, result=json.dumps(result, default=_json_default),
+        duration_ms=duration_ms, computed_at=ctx.now,
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["restaurant_id", "analyzer", "params"],
+        set_={c: stmt.excluded[c] for c in ("data_version", "result", "duration_ms", "computed_at")},
+        # A slow run must not overwrite a snapshot computed from newer data
+        where=table.c.data_version <= stmt.excluded.data_version,
+    ))
+    db.commit()
+    return result
+
+
+def _params_key(params: dict) -> str:
+    return "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
@@ -0,0 +1,92 @@
+"""
+Time Buckets
+================================================================================
+Restaurant-local hour / date as SQL expressions that compile on
+both backends, so analyzers group in the database instead of in Python:
+  - SQLite:      strftime() / date() with a '+N minutes' modifier
+  - PostgreSQL:  extract() / date_trunc() on `col + interval 'N minutes'`
+
+Timestamps are stored as naive UTC; RESTAURANT_UTC_OFFSET_MINUTES (default 0)
+shifts them to local time. Rollups are bucketed the same way, so after
+changing the offset rebuild them (rollups.rebuild_revenue_rollups).
+
+Day filters use `day_bounds`, a half-open range on the raw column
+(start <= col < end), which an index on the column can serve — wrapping the
+column in date() cannot.
+================================================================================
+"""
+
+from datetime import date, datetime, time, timedelta
+import os
+from sqlalchemy import Date, Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+UTC_OFFSET_MINUTES = int(os.getenv("RESTAURANT_UTC_OFFSET_MINUTES", 0))
+UTC_OFFSET = timedelta(minutes=UTC_OFFSET_MINUTES)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PYTHON SIDE
+# ─────────────────────────────────────────────────────────────────────────────
+def to_local(ts: datetime) -> datetime:
+    """Naive UTC timestamp → naive restaurant-local timestamp."""
+    return ts + UTC_OFFSET
+
+
+def local_today(now: datetime) -> date:
+    return to_local(now).date()
+
+
+def day_bounds(day: date) -> tuple:
+    """Naive UTC [start, end) covering one local day."""
+    start = datetime.combine(day, time()) - UTC_OFFSET
+    return start, start + timedelta(days=1)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SQL EXPRESSIONS
+# ─────────────────────────────────────────────────────────────────────────────
+class local_hour(FunctionElement):
+    """Local hour of day, 0-23."""
+    type = Integer()
+    inherit_cache = True
+
+
+class local_date(FunctionElement):
+    """Local calendar date (a `date` on both backends)."""
+    type = Date()
+    inherit_cache = True
+
+
+# The offset is rendered as a literal, not a bound parameter, so the same
+# expression in SELECT and GROUP BY compiles to identical SQL (PostgreSQL
+# rejects the GROUP BY otherwise).
+def _sqlite_args(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    return f"{column}, '{UTC_OFFSET_MINUTES:+d} minutes'" if UTC_OFFSET_MINUTES else column
+
+
+def _postgres_local(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    return f"({column} + INTERVAL '{UTC_OFFSET_MINUTES} minutes')" if UTC_OFFSET_MINUTES else column
+
+
+@compiles(local_hour)
+def _hour_sqlite(element, compiler, **kw):
+    return f"CAST(strftime('%H', {_sqlite_args(element, compiler, **kw)}) AS INTEGER)"
+
+
+@compiles(local_hour, "postgresql")
+def _hour_postgres(element, compiler, **kw):
+    return f"CAST(EXTRACT(HOUR FROM {_postgres_local(element, compiler, **kw)}) AS INTEGER)"
+
+
+@compiles(local_date)
+def _date_sqlite(element, compiler, **kw):
+    return f"date({_sqlite_args(element, compiler, **kw)})"
+
+
+@compiles(local_date, "postgresql")
+def _date_postgres(element, compiler, **kw):
+    return f"CAST(date_trunc('day', {_postgres_local(element, compiler, **kw)}) AS DATE)"
@@ -0,0 +1,53 @@
+"""add composite indexes for analytics access paths
+
+Revision ID: c67b8e7377c5
+Revises: 
+Create Date: 2026-10-17 04:44:40.617582
+
+Tables are created by `database.init_db()` (create_all), which only builds
+indexes for tables it creates — existing databases get them here. Every
+index is IF NOT EXISTS, so this is safe on databases where create_all
+already made them. On PostgreSQL they are built CONCURRENTLY so live order
+writes aren't blocked.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c67b8e7377c5'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Mirrors the Index() entries in models.py
+INDEXES = [
+    ("ix_restaurants_tenant", "restaurants", ["tenant_id"]),
+    ("ix_tables_restaurant", "tables", ["restaurant_id"]),
+    ("ix_menu_items_restaurant", "menu_items", ["restaurant_id"]),
+    ("ix_orders_restaurant_status_created", "orders", ["restaurant_id", "status", "created_at"]),
+    ("ix_orders_restaurant_created", "orders", ["restaurant_id", "created_at", "id"]),
+    ("ix_order_items_order", "order_items", ["order_id", "menu_item_id"]),
+    ("ix_order_items_menu_item", "order_items", ["menu_item_id"]),
+    ("ix_prep_times_order_item", "prep_times", ["order_item_id"]),
+    ("ix_inventory_items_restaurant", "inventory_items", ["restaurant_id"]),
+    ("ix_stock_movements_item_created", "stock_movements", ["inventory_item_id", "created_at"]),
+    ("ix_reservations_restaurant_date", "reservations", ["restaurant_id", "reservation_date", "reservation_time"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    concurrently = op.get_context().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=concurrently)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    concurrently = op.get_context().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=concurrently)
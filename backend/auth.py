@@ -2,12 +2,17 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 import os
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import event, select, inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached, selectinload
+from collections import OrderedDict
+import threading
+import time
+from database import get_async_db, AsyncSessionLocal
 import models
 
 # Load env from backend directory to ensure consistency
@@ -17,6 +22,12 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key_here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Resolved users (per token subject) and restaurants (per tenant) are cached so authenticated
+# requests skip the User/Tenant/Restaurant lookups. Changes made through the ORM in this worker
+# invalidate immediately; the TTL bounds how long another worker can serve a stale row.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 1024))
+
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -36,7 +47,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    return await _user_from_token(token, db)
+
+async def get_current_user_from_query(token: str = Query(...), db: AsyncSession = Depends(get_async_db)):
+    """Same as get_current_user, for clients that can't set headers (EventSource)."""
+    return await _user_from_token(token, db)
+
+async def _user_from_token(token: str, db: AsyncSession):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -50,8 +68,136 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
         
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = await _cached_user(db, email)
     if user is None:
-        raise credentials_exception
-        
+        user = await db.scalar(
+            select(models.User).options(selectinload(models.User.tenant)).filter(models.User.email == email)
+        )
+        if user is None:
+            raise credentials_exception
+        tenant_cols = _columns(user.tenant) if user.tenant is not None else None
+        _user_cache.put(email, (_columns(user), tenant_cols))
+
     return user
+
+async def get_current_restaurant(current_user: models.User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    """The restaurant of the current user's tenant, for routes that work on one restaurant."""
+    return await resolve_restaurant(db, current_user)
+
+async def resolve_restaurant(db: AsyncSession, user: models.User) -> models.Restaurant:
+    """Tenant → restaurant, cached per tenant. Never commits the caller's session.
+
+    Tenants registered before restaurants were created at sign-up get one
+    provisioned here, once, in a session of its own.
+    """
+    columns = _restaurant_cache.get(user.tenant_id)
+    if columns is None:
+        restaurant = await _first_restaurant(db, user.tenant_id)
+        if restaurant is None:
+            await _provision_restaurant(user.tenant_id)
+            restaurant = await _first_restaurant(db, user.tenant_id)
+        columns = _columns(restaurant)
+        _restaurant_cache.put(user.tenant_id, columns)
+    return await _attach(db, models.Restaurant, columns)
+
+async def _first_restaurant(db: AsyncSession, tenant_id: int):
+    return await db.scalar(
+        select(models.Restaurant).filter(models.Restaurant.tenant_id == tenant_id).order_by(models.Restaurant.id).limit(1)
+    )
+
+async def _provision_restaurant(tenant_id: int):
+    async with AsyncSessionLocal() as db:
+        tenant = await db.get(models.Tenant, tenant_id)
+        db.add(models.Restaurant(name=f"{tenant.name}'s Restaurant", tenant_id=tenant_id))
+        await db.commit()
+
+# ── Caches ──
+
+class _TTLCache:
+    """Thread-safe LRU with a per-entry TTL."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, predicate):
+        """Drop every entry whose (key, value) matches."""
+        with self._lock:
+            for key in [k for k, (_, v) in self._entries.items() if predicate(k, v)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+_user_cache = _TTLCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES)        # email -> (user cols, tenant cols)
+_restaurant_cache = _TTLCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES)  # tenant_id -> restaurant cols
+
+def _columns(obj) -> dict:
+    return {attr.key: getattr(obj, attr.key) for attr in sa_inspect(obj).mapper.column_attrs}
+
+async def _attach(db: AsyncSession, model, columns: dict):
+    """Rebuild a cached row as a persistent instance in `db` without querying."""
+    obj = model(**columns)
+    make_transient_to_detached(obj)
+    return await db.merge(obj, load=False)
+
+async def _cached_user(db: AsyncSession, email: str):
+    entry = _user_cache.get(email)
+    if entry is None:
+        return None
+    user_cols, tenant_cols = entry
+    if tenant_cols is not None:
+        await _attach(db, models.Tenant, tenant_cols)  # user.tenant then resolves from the identity map
+    return await _attach(db, models.User, user_cols)
+
+def invalidate_user_cache(email: str = None, tenant_id: int = None):
+    """Drop one user, every user and the restaurant of a tenant, or (no arguments) everything."""
+    if email is None and tenant_id is None:
+        _user_cache.clear()
+        _restaurant_cache.clear()
+        return
+    _user_cache.discard(lambda key, value: key == email or (tenant_id is not None and value[0]["tenant_id"] == tenant_id))
+    if tenant_id is not None:
+        _restaurant_cache.discard(lambda key, value: key == tenant_id)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _user_changed(mapper, connection, target):
+    # Covers email changes too: the old key is found through the committed email
+    history = sa_inspect(target).attrs.email.history
+    for email in {target.email, *(history.deleted or ())}:
+        invalidate_user_cache(email=email)
+
+@event.listens_for(models.Tenant, "after_update")
+@event.listens_for(models.Tenant, "after_delete")
+def _tenant_changed(mapper, connection, target):
+    invalidate_user_cache(tenant_id=target.id)
+
+@event.listens_for(models.Restaurant, "after_update")
+@event.listens_for(models.Restaurant, "after_delete")
+def _restaurant_changed(mapper, connection, target):
+    _restaurant_cache.discard(lambda key, value: key == target.tenant_id or value["id"] == target.id)
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
@@ -31,6 +33,40 @@ else:
 engine = create_engine(DATABASE_URL, connect_args=connect_args, **engine_kwargs)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The dashboard's concurrent analyzers (ai/ops_manager.py) run on their own pool: one connection
+# per analyzer thread and no overflow, so however many dashboards load at once they never take
+# connections from `engine`'s pool, which the request handlers need.
+# Per worker process that is up to AI_ANALYZER_WORKERS more connections to the database.
+AI_ANALYZER_WORKERS = int(os.getenv("AI_ANALYZER_WORKERS", 5))
+analyzer_engine = create_engine(
+    DATABASE_URL, connect_args=connect_args, pool_size=AI_ANALYZER_WORKERS, max_overflow=0, **engine_kwargs,
+)
+AnalyzerSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=analyzer_engine)
+
+
+def _async_url(url: str):
+    """Same database through its async driver: aiosqlite for SQLite, asyncpg for PostgreSQL.
+
+    asyncpg takes TLS as an `ssl` connect arg rather than libpq's `sslmode`, and
+    doesn't understand Neon's `channel_binding`, so those are translated/dropped.
+    """
+    u = make_url(url)
+    if u.get_backend_name() == "sqlite":
+        return u.set(drivername="sqlite+aiosqlite"), {}
+    query = dict(u.query)
+    sslmode = query.pop("sslmode", None)
+    query.pop("channel_binding", None)
+    args = {"ssl": sslmode} if sslmode and sslmode not in ("disable", "allow", "prefer") else {}
+    return u.set(drivername="postgresql+asyncpg", query=query), args
+
+
+# Async engine for the `async def` route handlers, so DB round trips don't block the event loop.
+# The AI analyzers stay on the sync engine, run from sync routes in the threadpool.
+ASYNC_DATABASE_URL, async_connect_args = _async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, connect_args=async_connect_args, **engine_kwargs)
+# expire_on_commit=False: response models read attributes after commit, which must not trigger lazy IO
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -38,6 +74,10 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Call this explicitly to create tables (don't run at import time)
 def init_db():
     from models import Base
@@ -0,0 +1,28 @@
+"""
+Gunicorn settings, picked up automatically from the working directory by the
+`gunicorn main:app ...` commands in Procfile, Dockerfile and nixpacks.toml.
+
+Prometheus multiprocess mode (metrics.py): the workers share one directory of
+metric files, emptied when the master starts so a restart doesn't resurrect
+old counts, and a dead worker's live gauges are dropped in `child_exit`.
+"""
+
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "restaurant-agent-metrics"))
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
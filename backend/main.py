@@ -1,7 +1,7 @@
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import orders, inventory, health, webhooks, auth, menu, analytics, reservations
+from routers import orders, inventory, health, webhooks, auth, menu, analytics, reservations, metrics
 import auth as auth_utils
 from middleware.timing import TimingMiddleware
 
@@ -27,6 +27,17 @@ def on_startup():
         # Log but don't crash — the port must open for Render health checks
         print(f"[WARN] DB init deferred: {e}")
 
+# Precompute AI snapshots in the background (one worker per interval — see scheduler.py)
+@app.on_event("startup")
+async def start_scheduler():
+    import scheduler
+    scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    import scheduler
+    await scheduler.stop()
+
 # CORS — allow frontend to call backend
 # Configure via CORS_ORIGINS env var (comma-separated) or use defaults
 default_origins = "http://localhost:3000,http://127.0.0.1:3000,http://192.168.100.4:3000"
@@ -38,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Computed-At"],  # Paged listings (pagination.py), AI snapshots
 )
 
 app.add_middleware(TimingMiddleware)
@@ -50,6 +62,7 @@ app.include_router(health.router)
 app.include_router(webhooks.router)
 app.include_router(analytics.router)
 app.include_router(reservations.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def read_root():
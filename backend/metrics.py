@@ -0,0 +1,132 @@
+"""
+Prometheus metrics, served at GET /metrics (routers/metrics.py).
+
+Under gunicorn each worker has its own counters, so gunicorn.conf.py sets
+PROMETHEUS_MULTIPROC_DIR before the workers start: every worker writes its
+samples to mmap files there, a scrape of any worker aggregates all of them,
+and `child_exit` drops a dead worker's live gauges. Without the variable
+(plain `uvicorn main:app`) the process's own registry is served.
+
+Series:
+  http_request_duration_seconds{method,route,status}   route template, not raw path
+  http_requests_in_progress{method}
+  db_pool_checked_out / db_pool_overflow / db_pool_size{engine}
+  db_pool_checkouts_total{engine}
+  ai_analyzer_duration_seconds{analyzer}               requests and the scheduler
+  ai_cache_lookups_total{cache,analyzer,result}        cache="result" (ai/cache.py) or
+                                                       "snapshot" (ai/snapshots.py); result=hit|miss
+
+Optional like Sentry: without prometheus_client installed the helpers below
+do nothing and /metrics answers 503.
+"""
+
+import os
+
+from sqlalchemy import event
+
+from database import engine, async_engine, analyzer_engine
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:
+    prometheus_client = None
+
+ENABLED = prometheus_client is not None
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+CONTENT_TYPE = prometheus_client.CONTENT_TYPE_LATEST if ENABLED else "text/plain"
+
+UNMATCHED_ROUTE = "<unmatched>"  # 404s etc. — keeps arbitrary paths out of the label set
+
+if ENABLED:
+    REQUEST_SECONDS = Histogram(
+        "http_request_duration_seconds", "Request latency by route template and status",
+        ["method", "route", "status"],
+    )
+    IN_PROGRESS = Gauge(
+        "http_requests_in_progress", "Requests being handled", ["method"],
+        multiprocess_mode="livesum",
+    )
+    POOL_CHECKED_OUT = Gauge(
+        "db_pool_checked_out", "Connections checked out of the pool", ["engine"],
+        multiprocess_mode="livesum",
+    )
+    POOL_OVERFLOW = Gauge(
+        "db_pool_overflow", "Connections open beyond pool_size", ["engine"],
+        multiprocess_mode="livesum",
+    )
+    POOL_SIZE = Gauge(
+        "db_pool_size", "Configured pool size", ["engine"],
+        multiprocess_mode="livesum",
+    )
+    POOL_CHECKOUTS = Counter("db_pool_checkouts", "Pool checkouts", ["engine"])
+    ANALYZER_SECONDS = Histogram(
+        "ai_analyzer_duration_seconds", "AI analyzer compute time", ["analyzer"],
+        buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    )
+    CACHE_LOOKUPS = Counter("ai_cache_lookups", "AI cache lookups", ["cache", "analyzer", "result"])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# RECORDING
+# ─────────────────────────────────────────────────────────────────────────────
+def request_started(method: str):
+    if ENABLED:
+        IN_PROGRESS.labels(method).inc()
+
+
+def request_finished(method: str, route: str, status: int, seconds: float):
+    if ENABLED:
+        IN_PROGRESS.labels(method).dec()
+        REQUEST_SECONDS.labels(method, route or UNMATCHED_ROUTE, str(status)).observe(seconds)
+
+
+def observe_analyzer(analyzer: str, seconds: float):
+    if ENABLED:
+        ANALYZER_SECONDS.labels(analyzer).observe(seconds)
+
+
+def cache_lookup(cache: str, analyzer: str, hit: bool):
+    if ENABLED:
+        CACHE_LOOKUPS.labels(cache, analyzer, "hit" if hit else "miss").inc()
+
+
+def _instrument_pool(name: str, pool):
+    checked_out, overflow = POOL_CHECKED_OUT.labels(name), POOL_OVERFLOW.labels(name)
+    checkouts = POOL_CHECKOUTS.labels(name)
+    # QueuePool (the default for both drivers) reports pool_size; other pool classes 0
+    size = getattr(pool, "size", None)
+    POOL_SIZE.labels(name).set(size() if callable(size) else 0)
+
+    def _overflow():
+        return max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out.inc()
+        checkouts.inc()
+        overflow.set(_overflow())
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out.dec()
+        overflow.set(_overflow())
+
+
+if ENABLED:
+    _instrument_pool("sync", engine.pool)
+    _instrument_pool("async", async_engine.sync_engine.pool)
+    _instrument_pool("analyzer", analyzer_engine.pool)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# EXPOSITION
+# ─────────────────────────────────────────────────────────────────────────────
+def render() -> bytes:
+    """Text exposition of every worker's metrics (or this process's, outside gunicorn)."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry)
@@ -1,19 +1,137 @@
+"""
+Per-request timing.
+
+Each request gets a RequestTimings in a contextvar. SQLAlchemy cursor events on
+every engine (sync, the async engine's sync core, the analyzer pool) add each
+statement's count and duration to it. `timed(name)` / `record(name, ms)` add named spans,
+e.g. one per AI analyzer. Worker threads see the request's timings only when
+started with contextvars.copy_context(), as ai/ops_manager does.
+
+The totals go out as a Server-Timing header (visible in the browser devtools'
+Timing tab) and as one JSON log line per request.
+"""
+
+import contextvars
+import json
+import logging
+import threading
 import time
+from contextlib import contextmanager
+from typing import Optional
+from sqlalchemy import event
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-import logging
+from database import engine, async_engine, analyzer_engine
+import metrics
 
 logger = logging.getLogger("uvicorn")
 
+
+class RequestTimings:
+    """SQL and span totals for one request. Shared by every thread working on it."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add_query(self, ms: float):
+        with self._lock:
+            self.queries += 1
+            self.db_ms += ms
+
+    def add_span(self, name: str, ms: float):
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + ms
+
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+def current() -> Optional[RequestTimings]:
+    """The running request's timings, or None outside a request (scheduler, scripts)."""
+    return _current.get()
+
+
+def record(name: str, ms: float):
+    """Add `ms` to the current request's span `name`; a no-op outside a request."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add_span(name, ms)
+
+
+@contextmanager
+def timed(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SQL EVENTS
+# ─────────────────────────────────────────────────────────────────────────────
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._timing_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _current.get()
+    start = getattr(context, "_timing_start", None)
+    if timings is not None and start is not None:
+        timings.add_query((time.perf_counter() - start) * 1000)
+
+
+for _engine in (engine, async_engine.sync_engine, analyzer_engine):
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# MIDDLEWARE
+# ─────────────────────────────────────────────────────────────────────────────
 class TimingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        
-        # Log the processing time
-        logger.info(f"Request: {request.method} {request.url.path} - Duration: {process_time:.4f}s")
-        
-        # Add custom header
+        timings = RequestTimings()
+        # Set before call_next: the endpoint's task and threadpool calls copy this context
+        token = _current.set(timings)
+        metrics.request_started(request.method)
+        start_time = time.perf_counter()
+        response = None
+        try:
+            response = await call_next(request)
+        finally:
+            _current.reset(token)
+            process_time = time.perf_counter() - start_time
+            # Router fills in the matched route on the shared scope
+            route = getattr(request.scope.get("route"), "path", None)
+            metrics.request_finished(
+                request.method, route, response.status_code if response is not None else 500, process_time,
+            )
+        total_ms = process_time * 1000
+
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.url.path,
+            "route": route,
+            "status": response.status_code,
+            "duration_ms": round(total_ms, 1),
+            "db_queries": timings.queries,
+            "db_ms": round(timings.db_ms, 1),
+            "spans_ms": {name: round(ms, 1) for name, ms in timings.spans.items()},
+        }))
+
+        response.headers["Server-Timing"] = server_timing(timings, total_ms)
         response.headers["X-Process-Time"] = str(process_time)
         return response
+
+
+def server_timing(timings: RequestTimings, total_ms: float) -> str:
+    """Server-Timing value: db (summed over connections, so it can exceed total), spans, total."""
+    entries = [f'db;dur={timings.db_ms:.1f};desc="{timings.queries} queries"']
+    entries += [f"{name};dur={ms:.1f}" for name, ms in timings.spans.items()]
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
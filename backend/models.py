@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Enum as SqEnum, DateTime, Float, Text, Date, Time
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Enum as SqEnum, DateTime, Float, Text, Date, Time, UniqueConstraint, Index
 from sqlalchemy.orm import relationship, declarative_base
 import datetime
 import enum
@@ -83,6 +83,7 @@ class User(Base):
 # ──────────────────────────────────────────────
 class Restaurant(Base):
     __tablename__ = "restaurants"
+    __table_args__ = (Index("ix_restaurants_tenant", "tenant_id"),)
     id = Column(Integer, primary_key=True, index=True)
     tenant_id = Column(Integer, ForeignKey("tenants.id"))
     name = Column(String)
@@ -98,6 +99,7 @@ class Restaurant(Base):
 class Table(Base):
     """Physical tables in the restaurant — required for reservation intelligence."""
     __tablename__ = "tables"
+    __table_args__ = (Index("ix_tables_restaurant", "restaurant_id"),)
     id = Column(Integer, primary_key=True, index=True)
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"))
     table_number = Column(Integer)
@@ -112,6 +114,7 @@ class Table(Base):
 # ──────────────────────────────────────────────
 class MenuItem(Base):
     __tablename__ = "menu_items"
+    __table_args__ = (Index("ix_menu_items_restaurant", "restaurant_id"),)
     id = Column(Integer, primary_key=True, index=True)
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"))
     name = Column(String)
@@ -132,6 +135,10 @@ class MenuItem(Base):
 # ──────────────────────────────────────────────
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_restaurant_status_created", "restaurant_id", "status", "created_at"),  # AI analyzers, KDS
+        Index("ix_orders_restaurant_created", "restaurant_id", "created_at", "id"),  # Listing keyset, date ranges
+    )
     id = Column(Integer, primary_key=True, index=True)
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"))
     status = Column(SqEnum(OrderStatus), default=OrderStatus.PENDING)
@@ -153,6 +160,10 @@ class Order(Base):
 class OrderItem(Base):
     """Links orders to menu items — critical for menu performance analysis."""
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order", "order_id", "menu_item_id"),
+        Index("ix_order_items_menu_item", "menu_item_id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"))
     menu_item_id = Column(Integer, ForeignKey("menu_items.id"))
@@ -169,6 +180,7 @@ class OrderItem(Base):
 class PrepTime(Base):
     """Tracks actual kitchen prep time per order item — powers KDS intelligence."""
     __tablename__ = "prep_times"
+    __table_args__ = (Index("ix_prep_times_order_item", "order_item_id"),)
     id = Column(Integer, primary_key=True, index=True)
     order_item_id = Column(Integer, ForeignKey("order_items.id"))
     station = Column(String, default="main")  # grill, fryer, salad, drinks, main
@@ -183,6 +195,7 @@ class PrepTime(Base):
 # ──────────────────────────────────────────────
 class InventoryItem(Base):
     __tablename__ = "inventory_items"
+    __table_args__ = (Index("ix_inventory_items_restaurant", "restaurant_id"),)
     id = Column(Integer, primary_key=True, index=True)
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"))
     item_name = Column(String)
@@ -198,6 +211,7 @@ class InventoryItem(Base):
 class StockMovement(Base):
     """Tracks inventory in/out — powers depletion prediction and reorder intelligence."""
     __tablename__ = "stock_movements"
+    __table_args__ = (Index("ix_stock_movements_item_created", "inventory_item_id", "created_at"),)
     id = Column(Integer, primary_key=True, index=True)
     inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"))
     movement_type = Column(SqEnum(StockMovementType))
@@ -207,12 +221,28 @@ class StockMovement(Base):
     
     inventory_item = relationship("InventoryItem", back_populates="movements")
 
+class Recipe(Base):
+    """Bill of materials: how much of an inventory item one portion of a menu item uses (ai/recipes.py)."""
+    __tablename__ = "recipes"
+    __table_args__ = (
+        UniqueConstraint("menu_item_id", "inventory_item_id"),  # Also serves the order-time lookup by menu item
+        Index("ix_recipes_restaurant", "restaurant_id"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), nullable=False)
+    inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False)
+    quantity = Column(Float, nullable=False)  # Per portion, in the inventory item's unit
+
 # ──────────────────────────────────────────────
 # RESERVATIONS (New for AI)
 # ──────────────────────────────────────────────
 class Reservation(Base):
     """Reservation system — powers no-show prediction and revenue-per-seat optimization."""
     __tablename__ = "reservations"
+    __table_args__ = (
+        Index("ix_reservations_restaurant_date", "restaurant_id", "reservation_date", "reservation_time"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"))
     table_id = Column(Integer, ForeignKey("tables.id"), nullable=True)
@@ -230,3 +260,156 @@ class Reservation(Base):
     
     restaurant = relationship("Restaurant", back_populates="reservations")
     table = relationship("Table", back_populates="reservations")
+
+# ──────────────────────────────────────────────
+# ANALYTICS ROLLUPS (maintained by ai/rollups.py on order writes)
+# ──────────────────────────────────────────────
+class RevenueRollup(Base):
+    """Order-level revenue per restaurant × day × hour × order type — powers revenue forecasting."""
+    __tablename__ = "revenue_rollups"
+    __table_args__ = (UniqueConstraint("restaurant_id", "day", "hour", "order_type"),)
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    hour = Column(Integer, nullable=False)
+    order_type = Column(String, nullable=False)
+    revenue = Column(Integer, default=0)  # Sum of order totals in cents
+    orders = Column(Integer, default=0)
+    items = Column(Integer, default=0)    # Sum of line quantities
+
+class CategoryRollup(Base):
+    """Line-level revenue per restaurant × day × hour × order type × menu category."""
+    __tablename__ = "category_rollups"
+    __table_args__ = (UniqueConstraint("restaurant_id", "day", "hour", "order_type", "category"),)
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    hour = Column(Integer, nullable=False)
+    order_type = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+    revenue = Column(Integer, default=0)  # Sum of quantity × unit_price in cents
+    qty = Column(Integer, default=0)
+
+class CheckSizeRollup(Base):
+    """Histogram of order totals per restaurant — exact check-size percentiles without scanning orders."""
+    __tablename__ = "check_size_rollups"
+    __table_args__ = (UniqueConstraint("restaurant_id", "total"),)
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    total = Column(Integer, nullable=False)
+    orders = Column(Integer, default=0)
+
+class ItemOrderCount(Base):
+    """Non-cancelled orders containing each menu item — the per-item frequency behind upsell lift."""
+    __tablename__ = "item_order_counts"
+    __table_args__ = (UniqueConstraint("restaurant_id", "menu_item_id"),)
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), nullable=False)
+    orders = Column(Integer, default=0)
+
+class ItemPairCount(Base):
+    """Non-cancelled orders containing both items (item_a < item_b) — sparse co-occurrence for upsell pairs.
+
+    Rows are inserted the first time a pair is seen, so id order is first-seen order (the tie-break).
+    """
+    __tablename__ = "item_pair_counts"
+    __table_args__ = (
+        UniqueConstraint("restaurant_id", "item_a", "item_b"),
+        Index("ix_item_pair_counts_top", "restaurant_id", "orders"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    item_a = Column(Integer, ForeignKey("menu_items.id"), nullable=False)
+    item_b = Column(Integer, ForeignKey("menu_items.id"), nullable=False)
+    orders = Column(Integer, default=0)
+
+class StockDailyRollup(Base):
+    """Stock movement totals per restaurant × inventory item × local day — what the inventory predictor reads."""
+    __tablename__ = "stock_daily_rollups"
+    __table_args__ = (UniqueConstraint("restaurant_id", "inventory_item_id", "day"),)
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    out_qty = Column(Float, default=0)
+    in_qty = Column(Float, default=0)
+    waste_qty = Column(Float, default=0)   # OUT movements with "waste" in the reason (part of out_qty)
+    adjust_qty = Column(Float, default=0)  # Positive ADJUST movements
+
+class TimingSketch(Base):
+    """KLL quantile sketch of kitchen timings per restaurant × metric × station × item × local day (ai/sketches.py)."""
+    __tablename__ = "timing_sketches"
+    __table_args__ = (UniqueConstraint("restaurant_id", "metric", "station", "menu_item_id", "day"),)
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    metric = Column(String, nullable=False)      # prep (per station × item), completion (per order)
+    station = Column(String, nullable=False)     # "" for completion
+    menu_item_id = Column(Integer, nullable=False)  # 0 when there is no item — keys can't hold NULL
+    day = Column(Date, nullable=False)
+    n = Column(Integer, default=0)
+    total = Column(Float, default=0)             # Sum of minutes
+    total_sq = Column(Float, default=0)          # Sum of squared minutes, for the std dev
+    min_value = Column(Float)
+    max_value = Column(Float)
+    sketch = Column(Text, nullable=False)        # JSON-encoded KLL levels
+
+class ForecastModel(Base):
+    """Fitted Holt-Winters state for a restaurant's daily revenue (ai/seasonal_model.py) — stepped forward as days complete."""
+    __tablename__ = "forecast_models"
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), unique=True, nullable=False)
+    alpha = Column(Float, nullable=False)   # Level smoothing
+    beta = Column(Float, nullable=False)    # Trend smoothing
+    gamma = Column(Float, nullable=False)   # Seasonal smoothing
+    level = Column(Float, nullable=False)
+    trend = Column(Float, nullable=False)
+    seasonal = Column(Text, nullable=False)  # JSON list of 7 offsets, by series position mod 7
+    sse = Column(Float, default=0)           # One-step squared errors, for the prediction interval
+    n_errors = Column(Integer, default=0)
+    first_day = Column(Date, nullable=False)
+    last_day = Column(Date, nullable=False)  # Last complete day folded into the state
+    fitted_revenue = Column(Integer, default=0)  # Series total through last_day — a change means history was edited
+    tuned_on = Column(Date, nullable=False)  # Parameters last grid-searched with data through this day
+    fitted_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class AnalysisSnapshot(Base):
+    """Latest stored result of one /ai/* analyzer per restaurant × parameters (ai/snapshots.py), refreshed by scheduler.py."""
+    __tablename__ = "analysis_snapshots"
+    __table_args__ = (UniqueConstraint("restaurant_id", "analyzer", "params"),)
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    analyzer = Column(String, nullable=False)
+    params = Column(String, nullable=False, default="")  # Canonical query string, e.g. "horizon=7"
+    data_version = Column(Integer, nullable=False)        # DataVersion when computed — a mismatch means newer writes
+    result = Column(Text, nullable=False)                 # JSON response body
+    duration_ms = Column(Float, default=0)
+    computed_at = Column(DateTime, nullable=False)
+
+class JobLease(Base):
+    """Cross-worker lock for a scheduled job: whoever holds an unexpired lease runs it (scheduler.py)."""
+    __tablename__ = "job_leases"
+    id = Column(Integer, primary_key=True, index=True)
+    job = Column(String, unique=True, nullable=False)
+    holder = Column(String, default="")  # host:pid of the worker running the job
+    expires_at = Column(DateTime, nullable=False)
+
+class DataVersion(Base):
+    """Per-restaurant write counter — bumped by every write that can change an AI analysis (see ai/cache.py)."""
+    __tablename__ = "data_versions"
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), unique=True, nullable=False)
+    version = Column(Integer, default=0)
+
+# ──────────────────────────────────────────────
+# KDS EVENT LOG (written with each order change, streamed by order_events.py)
+# ──────────────────────────────────────────────
+class OrderEvent(Base):
+    """Order created/status-changed event — a short-lived outbox that fans KDS updates out across workers."""
+    __tablename__ = "order_events"
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    event_type = Column(String, nullable=False)  # created, status
+    payload = Column(Text, nullable=False)       # JSON-encoded OrderOut
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
@@ -0,0 +1,164 @@
+"""
+KDS event stream.
+
+Order write paths call `publish()` inside their transaction, which appends an
+OrderEvent row, and `notify()` after commit. Each worker runs one poller that
+reads new events for the restaurants it has subscribers for and fans them out
+to their queues — `notify()` wakes the local poller immediately, other workers
+pick the event up on their next poll. Old events are pruned as the poller runs.
+
+Polls re-read a short window of recent events and skip the ids already sent,
+since ids are not committed in order (a slow transaction can commit id 10
+after id 11 is visible).
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import SessionLocal
+import models
+
+POLL_SECONDS = float(os.getenv("KDS_STREAM_POLL_SECONDS", "1"))
+RETENTION = timedelta(minutes=int(os.getenv("KDS_EVENT_RETENTION_MINUTES", "60")))
+PRUNE_EVERY = timedelta(minutes=1)
+OVERLAP = timedelta(seconds=5)  # How far back each poll re-reads for late commits
+KEEPALIVE_SECONDS = 15  # Comment frames keep proxies from closing an idle stream
+QUEUE_SIZE = 1000  # A subscriber this far behind is dropped and reconnects for a fresh snapshot
+
+
+def publish(db: Session, restaurant_id: int, order: dict, event_type: str):
+    """Record an event for `order` (an OrderOut-shaped dict) in the caller's transaction."""
+    db.add(models.OrderEvent(
+        restaurant_id=restaurant_id,
+        order_id=order["id"],
+        event_type=event_type,
+        payload=_dumps({"type": event_type, "order": order}),
+    ))
+
+
+def notify():
+    """Wake this worker's poller after a commit that published events."""
+    broker.wake()
+
+
+def sse(event: str, data) -> str:
+    """One server-sent-events frame; `data` is a JSON string or a JSON-able object."""
+    if not isinstance(data, str):
+        data = _dumps(data)
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, default=_json_default)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+class Subscriber:
+    def __init__(self, restaurant_id: int):
+        self.restaurant_id = restaurant_id
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = False
+
+
+class Broker:
+    """Per-worker fan-out from the order_events table to SSE subscribers."""
+
+    def __init__(self):
+        self._subscribers = {}  # restaurant_id → set of Subscriber
+        self._seen = {}         # event id → created_at, for events inside the overlap window
+        self._since = None
+        self._last_prune = datetime.min
+        self._task = None
+        self._wake = None
+        self._loop = None
+
+    async def subscribe(self, restaurant_id: int) -> Subscriber:
+        if self._task is None or self._task.done():
+            # Anything older is covered by the caller's snapshot
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._since = datetime.utcnow() - OVERLAP
+            self._seen.clear()
+            self._task = self._loop.create_task(self._run())
+        sub = Subscriber(restaurant_id)
+        self._subscribers.setdefault(restaurant_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        subs = self._subscribers.get(sub.restaurant_id)
+        if subs:
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.restaurant_id]
+
+    def wake(self):
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        while self._subscribers:
+            try:
+                await asyncio.wait_for(self._wake.wait(), POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            polled_at = datetime.utcnow()
+            try:
+                events = await run_in_threadpool(_fetch_events, self._since, list(self._subscribers))
+                if datetime.utcnow() - self._last_prune >= PRUNE_EVERY:
+                    self._last_prune = datetime.utcnow()
+                    await run_in_threadpool(_prune_events)
+            except Exception as e:
+                print(f"[WARN] KDS event poll failed: {e}")
+                continue
+            for event_id, restaurant_id, payload, created_at in events:
+                if event_id in self._seen:
+                    continue
+                self._seen[event_id] = created_at
+                for sub in list(self._subscribers.get(restaurant_id, ())):
+                    try:
+                        sub.queue.put_nowait(payload)
+                    except asyncio.QueueFull:
+                        sub.dropped = True
+                        self.unsubscribe(sub)
+            # Only events inside the next poll's window can be read again
+            self._since = polled_at - OVERLAP
+            self._seen = {i: t for i, t in self._seen.items() if t >= self._since}
+
+
+def _fetch_events(since: datetime, restaurant_ids: list) -> list:
+    db = SessionLocal()
+    try:
+        return db.query(
+            models.OrderEvent.id, models.OrderEvent.restaurant_id,
+            models.OrderEvent.payload, models.OrderEvent.created_at,
+        ).filter(
+            models.OrderEvent.created_at >= since,
+            models.OrderEvent.restaurant_id.in_(restaurant_ids),
+        ).order_by(models.OrderEvent.id).all()
+    finally:
+        db.close()
+
+
+def _prune_events():
+    db = SessionLocal()
+    try:
+        db.query(models.OrderEvent).filter(
+            models.OrderEvent.created_at < datetime.utcnow() - RETENTION
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+broker = Broker()
@@ -0,0 +1,53 @@
+"""
+Keyset (cursor) pagination for the listing endpoints.
+
+A cursor is the sort key of the last row on the previous page, so each page
+is an index range scan that starts where the last one stopped — no OFFSET,
+and the same latency on page 500 as on page 1. Cursors are opaque to
+clients: base64url JSON, returned in the `X-Next-Cursor` header (absent on
+the last page) so the response bodies stay plain lists.
+"""
+
+import base64
+import json
+from datetime import date, datetime, time
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 500
+
+_PARSERS = {
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    time: time.fromisoformat,
+    int: int,
+}
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([v.isoformat() if hasattr(v, "isoformat") else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """Inverse of encode_cursor; `types` gives the type of each key column. Bad input is a 400."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(_PARSERS[t](v) for t, v in zip(types, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, rows: list, limit: int, key) -> list:
+    """Trim a limit+1 fetch to one page and, if there was a next row, set the cursor header.
+
+    `key(row)` returns the sort-key values of a row, in cursor order.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(rows[-1]))
+    return rows
@@ -1,77 +1,91 @@
 """
 AI Analytics Router
 Exposes all AI intelligence services as API endpoints.
+
+Responses come from the latest precomputed snapshot (ai/snapshots.py) where
+one is usable; `?fresh=1` recomputes. X-Computed-At says when the data was read.
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 from database import get_db
-from auth import get_current_user
+from auth import get_current_restaurant
 import models
-from ai import menu_engineer, revenue_forecaster, kds_intelligence, inventory_predictor, reservation_optimizer, ops_manager
+from ai import snapshots
 
 router = APIRouter(prefix="/ai", tags=["AI Intelligence"])
 
-
-def _get_restaurant_id(db: Session, user: models.User) -> int:
-    """Get the restaurant ID for the current user's tenant."""
-    restaurant = db.query(models.Restaurant).filter(
-        models.Restaurant.tenant_id == user.tenant_id
-    ).first()
-    return restaurant.id if restaurant else 0
+FRESH = Query(False, description="Recompute now instead of serving the stored snapshot")
 
 
 @router.get("/dashboard")
-def ai_dashboard(db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
+def ai_dashboard(
+    response: Response,
+    fresh: bool = FRESH,
+    db: Session = Depends(get_db),
+    restaurant: models.Restaurant = Depends(get_current_restaurant),
+):
     """AI Operations Manager — central intelligence dashboard."""
-    rid = _get_restaurant_id(db, user)
-    if not rid:
-        return {"error": "No restaurant found"}
-    return ops_manager.get_operations_dashboard(db, rid)
+    return _serve(db, restaurant.id, response, "dashboard", fresh)
 
 
 @router.get("/menu-engineering")
-def menu_engineering(db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
+def menu_engineering(
+    response: Response,
+    fresh: bool = FRESH,
+    db: Session = Depends(get_db),
+    restaurant: models.Restaurant = Depends(get_current_restaurant),
+):
     """Menu Engineering Matrix — Star/Plowhorse/Puzzle/Dog classification."""
-    rid = _get_restaurant_id(db, user)
-    if not rid:
-        return {"error": "No restaurant found"}
-    data = menu_engineer.get_menu_engineering(db, rid)
-    data["upsell_pairs"] = menu_engineer.get_upsell_pairs(db, rid)
-    return data
+    return _serve(db, restaurant.id, response, "menu_engineering", fresh)
 
 
 @router.get("/revenue-forecast")
-def revenue_forecast(db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
-    """Revenue forecasting with trends and predictions."""
-    rid = _get_restaurant_id(db, user)
-    if not rid:
-        return {"error": "No restaurant found"}
-    return revenue_forecaster.get_revenue_forecast(db, rid)
+def revenue_forecast(
+    response: Response,
+    horizon: int = Query(7, ge=1, le=28),
+    fresh: bool = FRESH,
+    db: Session = Depends(get_db),
+    restaurant: models.Restaurant = Depends(get_current_restaurant),
+):
+    """Revenue forecasting with trends and predictions; `horizon` days of daily and hourly forecast."""
+    return _serve(db, restaurant.id, response, "revenue_forecast", fresh, horizon=horizon)
 
 
 @router.get("/kds-intelligence")
-def kds_intel(db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
+def kds_intel(
+    response: Response,
+    fresh: bool = FRESH,
+    db: Session = Depends(get_db),
+    restaurant: models.Restaurant = Depends(get_current_restaurant),
+):
     """Kitchen Display System intelligence — prep times, bottlenecks, throughput."""
-    rid = _get_restaurant_id(db, user)
-    if not rid:
-        return {"error": "No restaurant found"}
-    return kds_intelligence.get_kds_intelligence(db, rid)
+    return _serve(db, restaurant.id, response, "kds_intelligence", fresh)
 
 
 @router.get("/inventory-predictions")
-def inventory_intel(db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
+def inventory_intel(
+    response: Response,
+    fresh: bool = FRESH,
+    db: Session = Depends(get_db),
+    restaurant: models.Restaurant = Depends(get_current_restaurant),
+):
     """Inventory intelligence — depletion forecasts, reorder alerts, spoilage risk."""
-    rid = _get_restaurant_id(db, user)
-    if not rid:
-        return {"error": "No restaurant found"}
-    return inventory_predictor.get_inventory_predictions(db, rid)
+    return _serve(db, restaurant.id, response, "inventory_predictions", fresh)
 
 
 @router.get("/reservation-insights")
-def reservation_intel(db: Session = Depends(get_db), user: models.User = Depends(get_current_user)):
+def reservation_intel(
+    response: Response,
+    fresh: bool = FRESH,
+    db: Session = Depends(get_db),
+    restaurant: models.Restaurant = Depends(get_current_restaurant),
+):
     """Reservation intelligence — no-show analysis, table utilization, revenue per seat."""
-    rid = _get_restaurant_id(db, user)
-    if not rid:
-        return {"error": "No restaurant found"}
-    return reservation_optimizer.get_reservation_insights(db, rid)
+    return _serve(db, restaurant.id, response, "reservation_insights", fresh)
+
+
+def _serve(db: Session, rid: int, response: Response, analyzer: str, fresh: bool, **params):
+    result, computed_at = snapshots.serve(db, rid, analyzer, fresh=fresh, **params)
+    response.headers["X-Computed-At"] = computed_at.isoformat() + "Z"
+    return result
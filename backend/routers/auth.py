@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 import models, auth
 from pydantic import BaseModel
 
@@ -17,16 +18,16 @@ class Token(BaseModel):
     token_type: str
 
 @router.post("/register", response_model=Token)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user exists
-    if db.query(models.User).filter(models.User.email == user_data.email).first():
+    if await db.scalar(select(models.User).filter(models.User.email == user_data.email)):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create Tenant
     tenant = models.Tenant(name=user_data.tenant_name)
     db.add(tenant)
-    db.commit()
-    db.refresh(tenant)
+    await db.commit()
+    await db.refresh(tenant)
     
     # Create User
     hashed_password = auth.get_password_hash(user_data.password)
@@ -37,15 +38,16 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         tenant_id=tenant.id
     )
     db.add(new_user)
-    db.commit()
+    db.add(models.Restaurant(name=f"{tenant.name}'s Restaurant", tenant_id=tenant.id))
+    await db.commit()
     
     # Create Token
     access_token = auth.create_access_token(data={"sub": new_user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(models.User).filter(models.User.email == form_data.username))
     if not user or not auth.verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 # from database import get_db # Assuming db setup is done or will be done
 import os
 
@@ -14,13 +14,13 @@ async def health_check():
     return {"status": "ok", "message": "Service is healthy"}
 
 from sqlalchemy import text
-from database import get_db
+from database import get_async_db
 
 @router.get("/db")
-async def db_health_check(db: Session = Depends(get_db)):
+async def db_health_check(db: AsyncSession = Depends(get_async_db)):
     try:
         # Execute a simple query to check connection
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return {"status": "ok", "database": "connected"}
     except Exception as e:
         # Log the error (Sentry will catch it if configured)
@@ -1,49 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime
 
-from database import get_db
+from database import get_async_db
 import models
 import schemas
 import auth
+from ai import cache, rollups
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
 
-def _get_restaurant(db: Session, user: models.User):
-    rest = db.query(models.Restaurant).filter(
-        models.Restaurant.tenant_id == user.tenant_id
-    ).first()
-    if not rest:
-        rest = models.Restaurant(
-            name=f"{user.tenant.name}'s Restaurant",
-            tenant_id=user.tenant_id,
-        )
-        db.add(rest)
-        db.commit()
-        db.refresh(rest)
-    return rest
-
-
 @router.get("/", response_model=List[schemas.InventoryItemOut])
 async def get_inventory(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    restaurant: models.Restaurant = Depends(auth.get_current_restaurant),
 ):
-    restaurant = _get_restaurant(db, current_user)
-    return db.query(models.InventoryItem).filter(
+    return (await db.scalars(select(models.InventoryItem).filter(
         models.InventoryItem.restaurant_id == restaurant.id
-    ).order_by(models.InventoryItem.item_name).all()
+    ).order_by(models.InventoryItem.item_name))).all()
 
 
 @router.post("/", response_model=schemas.InventoryItemOut)
 async def create_inventory_item(
     item: schemas.InventoryItemCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    restaurant: models.Restaurant = Depends(auth.get_current_restaurant),
 ):
-    restaurant = _get_restaurant(db, current_user)
     db_item = models.InventoryItem(
         restaurant_id=restaurant.id,
         item_name=item.item_name,
@@ -54,8 +39,9 @@ async def create_inventory_item(
         expiry_days=item.expiry_days,
     )
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.run_sync(cache.bump_version, restaurant.id)
+    await db.commit()
+    await db.refresh(db_item)
     return db_item
 
 
@@ -63,20 +49,19 @@ async def create_inventory_item(
 async def update_inventory_item(
     item_id: int,
     item_update: schemas.InventoryItemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
-    db_item = db.query(models.InventoryItem).filter(
-        models.InventoryItem.id == item_id
-    ).first()
+    db_item = await db.get(models.InventoryItem, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
 
     for key, value in item_update.dict(exclude_unset=True).items():
         setattr(db_item, key, value)
 
-    db.commit()
-    db.refresh(db_item)
+    await db.run_sync(cache.bump_version, db_item.restaurant_id)
+    await db.commit()
+    await db.refresh(db_item)
     return db_item
 
 
@@ -84,19 +69,18 @@ async def update_inventory_item(
 async def receive_stock(
     item_id: int,
     receive: schemas.StockReceive,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
     """Record stock received from supplier — increases quantity."""
-    db_item = db.query(models.InventoryItem).filter(
-        models.InventoryItem.id == item_id
-    ).first()
+    db_item = await db.get(models.InventoryItem, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    db_item.quantity += receive.quantity
+    values = {"quantity": models.InventoryItem.quantity + receive.quantity}
     if receive.cost_per_unit is not None:
-        db_item.cost_per_unit = receive.cost_per_unit
+        values["cost_per_unit"] = receive.cost_per_unit
+    await _update_item(db, db_item, values)
 
     movement = models.StockMovement(
         inventory_item_id=db_item.id,
@@ -105,8 +89,11 @@ async def receive_stock(
         reason=f"Received from {receive.supplier}" if receive.supplier else "Stock received",
     )
     db.add(movement)
-    db.commit()
-    db.refresh(db_item)
+    await db.flush()
+    await db.run_sync(rollups.record_stock_movements, db_item.restaurant_id, [movement])
+    await db.run_sync(cache.bump_version, db_item.restaurant_id)
+    await db.commit()
+    await db.refresh(db_item)
     return {"message": f"Received {receive.quantity} {db_item.unit} of {db_item.item_name}", "new_quantity": db_item.quantity}
 
 
@@ -114,17 +101,16 @@ async def receive_stock(
 async def adjust_stock(
     item_id: int,
     adjust: schemas.StockAdjust,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
     """Adjust stock for waste, breakage, or corrections."""
-    db_item = db.query(models.InventoryItem).filter(
-        models.InventoryItem.id == item_id
-    ).first()
+    db_item = await db.get(models.InventoryItem, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    db_item.quantity += adjust.quantity  # Can be negative
+    # Can be negative
+    await _update_item(db, db_item, {"quantity": models.InventoryItem.quantity + adjust.quantity})
 
     movement = models.StockMovement(
         inventory_item_id=db_item.id,
@@ -133,23 +119,42 @@ async def adjust_stock(
         reason=adjust.reason or "Manual adjustment",
     )
     db.add(movement)
-    db.commit()
-    db.refresh(db_item)
+    await db.flush()
+    await db.run_sync(rollups.record_stock_movements, db_item.restaurant_id, [movement])
+    await db.run_sync(cache.bump_version, db_item.restaurant_id)
+    await db.commit()
+    await db.refresh(db_item)
     return {"message": f"Adjusted {db_item.item_name}", "new_quantity": db_item.quantity}
 
 
 @router.delete("/{item_id}")
 async def delete_inventory_item(
     item_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
-    db_item = db.query(models.InventoryItem).filter(
-        models.InventoryItem.id == item_id
-    ).first()
+    db_item = await db.get(models.InventoryItem, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    db.delete(db_item)
-    db.commit()
+    await db.execute(delete(models.StockDailyRollup).where(models.StockDailyRollup.inventory_item_id == item_id))
+    await db.execute(delete(models.Recipe).where(models.Recipe.inventory_item_id == item_id))
+    await db.delete(db_item)
+    await db.run_sync(cache.bump_version, db_item.restaurant_id)
+    await db.commit()
     return {"message": "Item deleted"}
+
+
+async def _update_item(db: AsyncSession, db_item: models.InventoryItem, values: dict):
+    """Apply `values` in one UPDATE so concurrent stock changes (recipes.consume
+    decrements in SQL too) add up instead of overwriting each other. The caller
+    refreshes `db_item` after commit to read the new quantity."""
+    await db.execute(
+        update(models.InventoryItem)
+        .where(
+            models.InventoryItem.id == db_item.id,
+            models.InventoryItem.restaurant_id == db_item.restaurant_id,
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List
-from database import get_db
+from database import get_async_db
 import models
 import schemas
 import auth
+from ai import cache
 
 router = APIRouter(prefix="/menu", tags=["menu"])
 
@@ -12,50 +15,36 @@ router = APIRouter(prefix="/menu", tags=["menu"])
 async def read_menu_items(
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    restaurant: models.Restaurant = Depends(auth.get_current_restaurant)
 ):
-    restaurant = db.query(models.Restaurant).filter(models.Restaurant.tenant_id == current_user.tenant_id).first()
-    if not restaurant:
-        return []
-        
-    items = db.query(models.MenuItem).filter(models.MenuItem.restaurant_id == restaurant.id).offset(skip).limit(limit).all()
+    items = (await db.scalars(
+        select(models.MenuItem).filter(models.MenuItem.restaurant_id == restaurant.id).offset(skip).limit(limit)
+    )).all()
     return items
 
 @router.post("/", response_model=schemas.MenuItem)
 async def create_menu_item(
     item: schemas.MenuItemCreate, 
-    db: Session = Depends(get_db), 
-    current_user: models.User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    restaurant: models.Restaurant = Depends(auth.get_current_restaurant)
 ):
-    # Ensure user has a restaurant (or tenant context)
-    # For MVP, we assign to the first restaurant of the tenant or create one if missing?
-    # Better: User -> Tenant -> Restaurant.
-    # We need to find the restaurant associated with the user's tenant.
-    
-    restaurant = db.query(models.Restaurant).filter(models.Restaurant.tenant_id == current_user.tenant_id).first()
-    if not restaurant:
-        # Auto-create a restaurant for the tenant if none exists (for MVP speed)
-        restaurant = models.Restaurant(name=f"{current_user.tenant.name}'s Restaurant", tenant_id=current_user.tenant_id)
-        db.add(restaurant)
-        db.commit()
-        db.refresh(restaurant)
-        
     db_item = models.MenuItem(**item.dict(), restaurant_id=restaurant.id)
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.run_sync(cache.bump_version, restaurant.id)
+    await db.commit()
+    await db.refresh(db_item)
     return db_item
 
 @router.put("/{item_id}", response_model=schemas.MenuItem)
 async def update_menu_item(
     item_id: int, 
     item_update: schemas.MenuItemUpdate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Verify ownership (TODO: Strict permission checks)
-    db_item = db.query(models.MenuItem).filter(models.MenuItem.id == item_id).first()
+    db_item = await db.get(models.MenuItem, item_id, options=[joinedload(models.MenuItem.restaurant)])
     if not db_item:
         raise HTTPException(status_code=404, detail="Menu item not found")
         
@@ -67,39 +56,111 @@ async def update_menu_item(
     for key, value in item_update.dict(exclude_unset=True).items():
         setattr(db_item, key, value)
         
-    db.commit()
-    db.refresh(db_item)
+    await db.run_sync(cache.bump_version, db_item.restaurant_id)
+    await db.commit()
+    await db.refresh(db_item)
     return db_item
 
 @router.delete("/{item_id}")
 async def delete_menu_item(
     item_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    db_item = db.query(models.MenuItem).filter(models.MenuItem.id == item_id).first()
+    db_item = await db.get(models.MenuItem, item_id, options=[joinedload(models.MenuItem.restaurant)])
     if not db_item:
         raise HTTPException(status_code=404, detail="Menu item not found")
         
     if db_item.restaurant.tenant_id != current_user.tenant_id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this item")
         
-    db.delete(db_item)
-    db.commit()
+    await db.execute(delete(models.Recipe).where(models.Recipe.menu_item_id == item_id))
+    await db.delete(db_item)
+    await db.run_sync(cache.bump_version, db_item.restaurant_id)
+    await db.commit()
     return {"message": "Item deleted successfully"}
 
 
+# ── Recipe (bill of materials) — drives stock decrement on order ──
+
+@router.get("/{item_id}/recipe", response_model=List[schemas.RecipeLineOut])
+async def get_recipe(
+    item_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    await _owned_menu_item(db, item_id, current_user)
+    return await _recipe_lines(db, item_id)
+
+@router.put("/{item_id}/recipe", response_model=List[schemas.RecipeLineOut])
+async def set_recipe(
+    item_id: int,
+    lines: List[schemas.RecipeLineIn],
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """Replace the item's recipe; an empty list removes it."""
+    db_item = await _owned_menu_item(db, item_id, current_user)
+
+    ids = [line.inventory_item_id for line in lines]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Each inventory item may appear only once")
+    if any(line.quantity <= 0 for line in lines):
+        raise HTTPException(status_code=400, detail="Recipe quantities must be positive")
+    known = set((await db.scalars(select(models.InventoryItem.id).filter(
+        models.InventoryItem.id.in_(ids),
+        models.InventoryItem.restaurant_id == db_item.restaurant_id,
+    ))).all()) if ids else set()
+    for inventory_item_id in ids:
+        if inventory_item_id not in known:
+            raise HTTPException(status_code=404, detail=f"Inventory item {inventory_item_id} not found")
+
+    await db.execute(delete(models.Recipe).where(models.Recipe.menu_item_id == item_id))
+    db.add_all([
+        models.Recipe(
+            restaurant_id=db_item.restaurant_id,
+            menu_item_id=item_id,
+            inventory_item_id=line.inventory_item_id,
+            quantity=line.quantity,
+        )
+        for line in lines
+    ])
+    await db.run_sync(cache.bump_version, db_item.restaurant_id)
+    await db.commit()
+    return await _recipe_lines(db, item_id)
+
+
+async def _owned_menu_item(db: AsyncSession, item_id: int, current_user: models.User) -> models.MenuItem:
+    db_item = await db.get(models.MenuItem, item_id, options=[joinedload(models.MenuItem.restaurant)])
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    if db_item.restaurant.tenant_id != current_user.tenant_id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this item")
+    return db_item
+
+async def _recipe_lines(db: AsyncSession, item_id: int) -> list:
+    rows = await db.execute(select(
+        models.Recipe.inventory_item_id,
+        models.Recipe.quantity,
+        models.InventoryItem.item_name,
+        models.InventoryItem.unit,
+    ).join(models.InventoryItem, models.InventoryItem.id == models.Recipe.inventory_item_id).filter(
+        models.Recipe.menu_item_id == item_id,
+    ).order_by(models.InventoryItem.item_name))
+    return [row._asdict() for row in rows]
+
+
 # ── Public endpoint (no auth) for customer ordering ──
 
 @router.get("/public/{restaurant_id}", response_model=List[schemas.MenuItem])
 async def get_public_menu(
     restaurant_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Public menu for customer ordering — no login required."""
-    items = db.query(models.MenuItem).filter(
+    items = (await db.scalars(select(models.MenuItem).filter(
         models.MenuItem.restaurant_id == restaurant_id,
         models.MenuItem.is_available == True,
-    ).all()
+    ))).all()
     return items
 
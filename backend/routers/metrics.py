@@ -0,0 +1,26 @@
+"""
+Prometheus scrape endpoint (see metrics.py).
+
+Set METRICS_TOKEN to require `Authorization: Bearer <token>`; unset, the
+endpoint is open like /health.
+"""
+
+import hmac
+import os
+
+from fastapi import APIRouter, Header, HTTPException, Response, status
+
+import metrics
+
+router = APIRouter(tags=["metrics"])
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+@router.get("/metrics", include_in_schema=False)
+def scrape(authorization: str = Header(None)):
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="prometheus_client is not installed")
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,101 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
+import asyncio
 
-from database import get_db
+from database import get_async_db
 import models
 import schemas
 import auth
+import order_events
+import pagination
+from ai import rollups, cache, sketches, recipes
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
-
-def _get_restaurant(db: Session, user: models.User):
-    """Get the restaurant for the current user's tenant."""
-    rest = db.query(models.Restaurant).filter(
-        models.Restaurant.tenant_id == user.tenant_id
-    ).first()
-    if not rest:
-        rest = models.Restaurant(
-            name=f"{user.tenant.name}'s Restaurant",
-            tenant_id=user.tenant_id,
-        )
-        db.add(rest)
-        db.commit()
-        db.refresh(rest)
-    return rest
+MAX_BULK_ORDERS = 1000
 
 
 @router.post("/", response_model=schemas.OrderOut)
 async def create_order(
     order: schemas.OrderCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    restaurant: models.Restaurant = Depends(auth.get_current_restaurant),
 ):
-    restaurant = _get_restaurant(db, current_user)
 
-    # Look up menu items and calculate total
-    total = 0
-    order_items = []
-    for oi in order.items:
-        menu_item = db.query(models.MenuItem).filter(
-            models.MenuItem.id == oi.menu_item_id,
-            models.MenuItem.restaurant_id == restaurant.id,
-        ).first()
-        if not menu_item:
-            raise HTTPException(status_code=404, detail=f"Menu item {oi.menu_item_id} not found")
-        line_total = menu_item.price * oi.quantity
-        total += line_total
-        order_items.append(models.OrderItem(
-            menu_item_id=menu_item.id,
-            quantity=oi.quantity,
-            unit_price=menu_item.price,
-        ))
+    # Look up menu items (one query) and calculate total
+    menu_items = await _load_menu_items(db, restaurant.id, [order])
+    order_items, total = _price_items(order.items, menu_items)
 
-    # Map string enums safely
-    try:
-        order_type = models.OrderType(order.order_type)
-    except ValueError:
-        order_type = models.OrderType.DINE_IN
-    try:
-        delivery_channel = models.DeliveryChannel(order.delivery_channel)
-    except ValueError:
-        delivery_channel = models.DeliveryChannel.WALK_IN
-    try:
-        payment_method = models.PaymentMethod(order.payment_method)
-    except ValueError:
-        payment_method = models.PaymentMethod.PENDING
-
-    is_paid = payment_method != models.PaymentMethod.PENDING
-
-    db_order = models.Order(
-        restaurant_id=restaurant.id,
-        order_type=order_type,
-        delivery_channel=delivery_channel,
-        payment_method=payment_method,
-        is_paid=is_paid,
-        customer_name=order.customer_name,
-        customer_phone=order.customer_phone,
-        table_number=order.table_number,
-        total=total,
-        notes=order.notes,
-        items=order_items,
-    )
+    db_order = _new_order(restaurant.id, order, order_items, total)
     db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
-    return _order_to_dict(db_order)
+    await db.flush()
+    await db.run_sync(rollups.record_orders, [db_order])
+    await db.run_sync(recipes.consume, [db_order])
+    await db.run_sync(cache.bump_version, restaurant.id)
+    result = _order_to_dict(db_order)  # Built before commit so nothing is reloaded afterwards
+    order_events.publish(db, restaurant.id, result, "created")
+    await db.commit()
+    order_events.notify()
+    return result
+
+
+@router.post("/bulk", response_model=schemas.BulkOrderOut)
+async def create_orders_bulk(
+    payload: schemas.BulkOrderCreate,
+    db: AsyncSession = Depends(get_async_db),
+    restaurant: models.Restaurant = Depends(auth.get_current_restaurant),
+):
+    """Ingest many orders in one transaction — POS catch-up after a network drop, aggregator imports.
+
+    All line items are priced with a single lookup and the orders are written
+    with batched INSERTs; if any item is unknown nothing is written. Recipe
+    ingredients for the whole batch come off stock in a single UPDATE.
+    """
+    if not payload.orders:
+        return {"created": 0, "order_ids": []}
+    if len(payload.orders) > MAX_BULK_ORDERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ORDERS} orders per request")
+
+    menu_items = await _load_menu_items(db, restaurant.id, payload.orders)
+
+    db_orders = []
+    for entry in payload.orders:
+        order_items, total = _price_items(entry.items, menu_items)
+        db_order = _new_order(restaurant.id, entry, order_items, total)
+        if entry.created_at:
+            db_order.created_at = _as_utc(entry.created_at)
+        db_orders.append(db_order)
+
+    db.add_all(db_orders)
+    await db.flush()
+    await db.run_sync(rollups.record_orders, db_orders)
+    await db.run_sync(recipes.consume, db_orders)
+    await db.run_sync(cache.bump_version, restaurant.id)
+    for db_order in db_orders:
+        order_events.publish(db, restaurant.id, _order_to_dict(db_order), "created")
+    order_ids = [o.id for o in db_orders]
+    await db.commit()
+    order_events.notify()
+    return {"created": len(order_ids), "order_ids": order_ids}
 
 
 @router.get("/", response_model=List[schemas.OrderOut])
 async def list_orders(
+    response: Response,
     status_filter: Optional[str] = Query(None, alias="status"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user),
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    restaurant: models.Restaurant = Depends(auth.get_current_restaurant),
 ):
-    restaurant = _get_restaurant(db, current_user)
-    q = db.query(models.Order).options(
+    """Newest first, paged by keyset on (created_at, id) — pass back `X-Next-Cursor` as `cursor`."""
+    q = select(models.Order).options(
         joinedload(models.Order.items).joinedload(models.OrderItem.menu_item)
     ).filter(models.Order.restaurant_id == restaurant.id)
 
@@ -105,35 +104,76 @@ async def list_orders(
         except ValueError:
             pass
 
-    orders = q.order_by(models.Order.created_at.desc()).limit(200).all()
+    if cursor:
+        created_at, order_id = pagination.decode_cursor(cursor, datetime, int)
+        q = q.filter(tuple_(models.Order.created_at, models.Order.id) < (created_at, order_id))
+
+    orders = (await db.scalars(
+        q.order_by(models.Order.created_at.desc(), models.Order.id.desc()).limit(limit + 1)
+    )).unique().all()
+    orders = pagination.set_next_cursor(response, orders, limit, lambda o: (o.created_at, o.id))
     return [_order_to_dict(o) for o in orders]
 
 
 @router.get("/active", response_model=List[schemas.OrderOut])
 async def active_orders(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    restaurant: models.Restaurant = Depends(auth.get_current_restaurant),
 ):
     """Orders for the KDS — pending, cooking, or ready."""
-    restaurant = _get_restaurant(db, current_user)
-    active_statuses = [models.OrderStatus.PENDING, models.OrderStatus.PREP, models.OrderStatus.READY]
-    orders = db.query(models.Order).options(
-        joinedload(models.Order.items).joinedload(models.OrderItem.menu_item)
-    ).filter(
-        models.Order.restaurant_id == restaurant.id,
-        models.Order.status.in_(active_statuses),
-    ).order_by(models.Order.created_at.asc()).all()
-    return [_order_to_dict(o) for o in orders]
+    return [_order_to_dict(o) for o in await _active_orders(db, restaurant.id)]
+
+
+@router.get("/stream")
+async def order_stream(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_from_query),
+):
+    """Server-sent events for the KDS — a `snapshot` of active orders, then one `order` event per create/status change.
+
+    Authenticates with `?token=` because EventSource cannot send headers.
+    """
+    restaurant = await auth.resolve_restaurant(db, current_user)
+    # Subscribe before taking the snapshot so nothing committed in between is missed
+    sub = await order_events.broker.subscribe(restaurant.id)
+    try:
+        snapshot = [_order_to_dict(o) for o in await _active_orders(db, restaurant.id)]
+    except Exception:
+        order_events.broker.unsubscribe(sub)
+        raise
+    await db.close()  # Hand the connection back; the stream itself never touches the session
+
+    async def events():
+        try:
+            yield order_events.sse("snapshot", snapshot)
+            while not sub.dropped and not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(sub.queue.get(), order_events.KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield order_events.sse("order", payload)
+        finally:
+            order_events.broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.patch("/{order_id}/status", response_model=schemas.OrderOut)
 async def update_order_status(
     order_id: int,
     update: schemas.OrderStatusUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
-    order = db.query(models.Order).filter(models.Order.id == order_id).first()
+    order = await db.get(models.Order, order_id, options=[
+        joinedload(models.Order.items).joinedload(models.OrderItem.menu_item)
+    ])
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
@@ -142,23 +182,36 @@ async def update_order_status(
     except ValueError:
         raise HTTPException(status_code=400, detail=f"Invalid status: {update.status}")
 
+    # Cancelling removes the order from the revenue rollups; un-cancelling restores it
+    was_cancelled = order.status == models.OrderStatus.CANCELLED
+    is_cancelled = new_status == models.OrderStatus.CANCELLED
+    if was_cancelled != is_cancelled:
+        await db.run_sync(rollups.record_orders, [order], sign=-1 if is_cancelled else 1)
+
     order.status = new_status
-    if new_status == models.OrderStatus.SERVED:
+    # Completion is sketched once per order, when completed_at is first set
+    if new_status == models.OrderStatus.SERVED and order.completed_at is None:
         order.completed_at = datetime.utcnow()
+        await db.run_sync(sketches.record_completion, order)
 
-    db.commit()
-    db.refresh(order)
-    return _order_to_dict(order)
+    await db.run_sync(cache.bump_version, order.restaurant_id)
+    result = _order_to_dict(order)
+    order_events.publish(db, order.restaurant_id, result, "status")
+    await db.commit()
+    order_events.notify()
+    return result
 
 
 @router.patch("/{order_id}/payment", response_model=schemas.OrderOut)
 async def update_order_payment(
     order_id: int,
     update: schemas.OrderPaymentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
-    order = db.query(models.Order).filter(models.Order.id == order_id).first()
+    order = await db.get(models.Order, order_id, options=[
+        joinedload(models.Order.items).joinedload(models.OrderItem.menu_item)
+    ])
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
@@ -168,9 +221,10 @@ async def update_order_payment(
         raise HTTPException(status_code=400, detail=f"Invalid payment method: {update.payment_method}")
 
     order.is_paid = update.is_paid
-    db.commit()
-    db.refresh(order)
-    return _order_to_dict(order)
+    await db.run_sync(cache.bump_version, order.restaurant_id)
+    result = _order_to_dict(order)
+    await db.commit()
+    return result
 
 
 # ── Public endpoint (no auth) for customer ordering ──
@@ -179,32 +233,15 @@ async def update_order_payment(
 async def create_public_order(
     order: schemas.OrderCreate,
     restaurant_id: int = Query(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Customer-facing order endpoint — no login required."""
-    restaurant = db.query(models.Restaurant).filter(
-        models.Restaurant.id == restaurant_id
-    ).first()
+    restaurant = await db.get(models.Restaurant, restaurant_id)
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
-    total = 0
-    order_items = []
-    for oi in order.items:
-        menu_item = db.query(models.MenuItem).filter(
-            models.MenuItem.id == oi.menu_item_id,
-            models.MenuItem.restaurant_id == restaurant.id,
-            models.MenuItem.is_available == True,
-        ).first()
-        if not menu_item:
-            raise HTTPException(status_code=404, detail=f"Menu item {oi.menu_item_id} not found or unavailable")
-        line_total = menu_item.price * oi.quantity
-        total += line_total
-        order_items.append(models.OrderItem(
-            menu_item_id=menu_item.id,
-            quantity=oi.quantity,
-            unit_price=menu_item.price,
-        ))
+    menu_items = await _load_menu_items(db, restaurant.id, [order], available_only=True)
+    order_items, total = _price_items(order.items, menu_items, unavailable_msg=" or unavailable")
 
     try:
         order_type = models.OrderType(order.order_type)
@@ -224,9 +261,97 @@ async def create_public_order(
         items=order_items,
     )
     db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
-    return _order_to_dict(db_order)
+    await db.flush()
+    await db.run_sync(rollups.record_orders, [db_order])
+    await db.run_sync(recipes.consume, [db_order])
+    await db.run_sync(cache.bump_version, restaurant.id)
+    result = _order_to_dict(db_order)
+    order_events.publish(db, restaurant.id, result, "created")
+    await db.commit()
+    order_events.notify()
+    return result
+
+
+# ── Helpers ──
+
+async def _active_orders(db: AsyncSession, restaurant_id: int) -> list:
+    """Pending, cooking and ready orders, oldest first — what the KDS shows."""
+    active_statuses = [models.OrderStatus.PENDING, models.OrderStatus.PREP, models.OrderStatus.READY]
+    result = await db.scalars(select(models.Order).options(
+        joinedload(models.Order.items).joinedload(models.OrderItem.menu_item)
+    ).filter(
+        models.Order.restaurant_id == restaurant_id,
+        models.Order.status.in_(active_statuses),
+    ).order_by(models.Order.created_at.asc()))
+    return result.unique().all()
+
+
+async def _load_menu_items(db: AsyncSession, restaurant_id: int, orders: list, available_only: bool = False) -> dict:
+    """Fetch every menu item referenced by `orders` in one IN query, keyed by id."""
+    ids = {oi.menu_item_id for order in orders for oi in order.items}
+    if not ids:
+        return {}
+    q = select(models.MenuItem).filter(
+        models.MenuItem.id.in_(ids),
+        models.MenuItem.restaurant_id == restaurant_id,
+    )
+    if available_only:
+        q = q.filter(models.MenuItem.is_available == True)
+    return {mi.id: mi for mi in await db.scalars(q)}
+
+
+def _price_items(items: list, menu_items: dict, unavailable_msg: str = ""):
+    """Build OrderItems at current menu prices. Returns (order_items, total)."""
+    total = 0
+    order_items = []
+    for oi in items:
+        menu_item = menu_items.get(oi.menu_item_id)
+        if not menu_item:
+            raise HTTPException(status_code=404, detail=f"Menu item {oi.menu_item_id} not found{unavailable_msg}")
+        total += menu_item.price * oi.quantity
+        order_items.append(models.OrderItem(
+            menu_item=menu_item,
+            quantity=oi.quantity,
+            unit_price=menu_item.price,
+        ))
+    return order_items, total
+
+
+def _new_order(restaurant_id: int, order: schemas.OrderCreate, order_items: list, total: int) -> models.Order:
+    """Staff-side Order from a create payload, mapping string enums safely."""
+    try:
+        order_type = models.OrderType(order.order_type)
+    except ValueError:
+        order_type = models.OrderType.DINE_IN
+    try:
+        delivery_channel = models.DeliveryChannel(order.delivery_channel)
+    except ValueError:
+        delivery_channel = models.DeliveryChannel.WALK_IN
+    try:
+        payment_method = models.PaymentMethod(order.payment_method)
+    except ValueError:
+        payment_method = models.PaymentMethod.PENDING
+
+    return models.Order(
+        restaurant_id=restaurant_id,
+        order_type=order_type,
+        delivery_channel=delivery_channel,
+        payment_method=payment_method,
+        is_paid=payment_method != models.PaymentMethod.PENDING,
+        customer_name=order.customer_name,
+        customer_phone=order.customer_phone,
+        table_number=order.table_number,
+        total=total,
+        notes=order.notes,
+        items=order_items,
+    )
+
+
+def _as_utc(ts: datetime) -> datetime:
+    """Naive UTC, matching how created_at is stored."""
+    if ts.tzinfo:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
 
 
 def _order_to_dict(order: models.Order) -> dict:
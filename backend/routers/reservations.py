@@ -1,48 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from datetime import date
+from datetime import date, time
 
-from database import get_db
+from database import get_async_db
 import models
 import schemas
 import auth
+from ai import cache
+import pagination
 
 router = APIRouter(prefix="/reservations", tags=["reservations"])
 
 
-def _get_restaurant(db: Session, user: models.User):
-    rest = db.query(models.Restaurant).filter(
-        models.Restaurant.tenant_id == user.tenant_id
-    ).first()
-    if not rest:
-        rest = models.Restaurant(
-            name=f"{user.tenant.name}'s Restaurant",
-            tenant_id=user.tenant_id,
-        )
-        db.add(rest)
-        db.commit()
-        db.refresh(rest)
-    return rest
-
-
 @router.get("/", response_model=List[schemas.ReservationOut])
 async def get_reservations(
+    response: Response,
     date_filter: Optional[date] = Query(None, alias="date"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user),
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    restaurant: models.Restaurant = Depends(auth.get_current_restaurant),
 ):
-    restaurant = _get_restaurant(db, current_user)
-    q = db.query(models.Reservation).filter(
+    """Latest date first, earliest time first within a day; keyset-paged on (date, time, id)."""
+    q = select(models.Reservation).filter(
         models.Reservation.restaurant_id == restaurant.id
     )
     if date_filter:
         q = q.filter(models.Reservation.reservation_date == date_filter)
 
-    reservations = q.order_by(
+    if cursor:
+        # Mixed sort directions, so spelled out rather than a row-value comparison
+        res_date, res_time, res_id = pagination.decode_cursor(cursor, date, time, int)
+        R = models.Reservation
+        q = q.filter(or_(
+            R.reservation_date < res_date,
+            and_(R.reservation_date == res_date, or_(
+                R.reservation_time > res_time,
+                and_(R.reservation_time == res_time, R.id > res_id),
+            )),
+        ))
+
+    reservations = (await db.scalars(q.order_by(
         models.Reservation.reservation_date.desc(),
         models.Reservation.reservation_time.asc(),
-    ).limit(200).all()
+        models.Reservation.id.asc(),
+    ).limit(limit + 1))).all()
+    reservations = pagination.set_next_cursor(
+        response, reservations, limit, lambda r: (r.reservation_date, r.reservation_time, r.id)
+    )
 
     return [_res_to_dict(r) for r in reservations]
 
@@ -50,10 +57,9 @@ async def get_reservations(
 @router.post("/", response_model=schemas.ReservationOut)
 async def create_reservation(
     reservation: schemas.ReservationCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    restaurant: models.Restaurant = Depends(auth.get_current_restaurant),
 ):
-    restaurant = _get_restaurant(db, current_user)
 
     db_res = models.Reservation(
         restaurant_id=restaurant.id,
@@ -69,8 +75,9 @@ async def create_reservation(
         notes=reservation.notes,
     )
     db.add(db_res)
-    db.commit()
-    db.refresh(db_res)
+    await db.run_sync(cache.bump_version, restaurant.id)
+    await db.commit()
+    await db.refresh(db_res)
     return _res_to_dict(db_res)
 
 
@@ -78,12 +85,10 @@ async def create_reservation(
 async def update_reservation_status(
     reservation_id: int,
     update: schemas.ReservationStatusUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
-    reservation = db.query(models.Reservation).filter(
-        models.Reservation.id == reservation_id
-    ).first()
+    reservation = await db.get(models.Reservation, reservation_id)
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
 
@@ -92,25 +97,25 @@ async def update_reservation_status(
     except ValueError:
         raise HTTPException(status_code=400, detail=f"Invalid status: {update.status}")
 
-    db.commit()
-    db.refresh(reservation)
+    await db.run_sync(cache.bump_version, reservation.restaurant_id)
+    await db.commit()
+    await db.refresh(reservation)
     return _res_to_dict(reservation)
 
 
 @router.delete("/{reservation_id}")
 async def delete_reservation(
     reservation_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user),
 ):
-    reservation = db.query(models.Reservation).filter(
-        models.Reservation.id == reservation_id
-    ).first()
+    reservation = await db.get(models.Reservation, reservation_id)
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
 
-    db.delete(reservation)
-    db.commit()
+    await db.delete(reservation)
+    await db.run_sync(cache.bump_version, reservation.restaurant_id)
+    await db.commit()
     return {"message": "Reservation deleted"}
 
 
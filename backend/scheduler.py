@@ -0,0 +1,105 @@
+"""
+Background jobs.
+
+Every worker runs one asyncio loop (started from main.py) that wakes every
+POLL_SECONDS and tries to take each job's lease: a `job_leases` row claimed
+with a conditional UPDATE (only if expired), so across gunicorn workers — and
+hosts sharing the database — exactly one runs a job per interval. The lease is
+extended while the job makes progress; a worker that dies mid-run just lets it
+expire. Job bodies run in the threadpool on their own Session.
+
+Jobs:
+  - ai_snapshots   ai/snapshots.refresh_all every AI_SNAPSHOT_INTERVAL_SECONDS
+                   (0 disables the scheduler)
+"""
+
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import SessionLocal
+import models
+from ai import snapshots
+
+SNAPSHOT_JOB = snapshots.LEASE_JOB
+INTERVAL = timedelta(seconds=snapshots.INTERVAL_SECONDS)
+POLL_SECONDS = min(60.0, snapshots.INTERVAL_SECONDS)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_task = None
+
+
+def start():
+    """Start this worker's loop (call from a startup handler, on the event loop)."""
+    global _task
+    if snapshots.INTERVAL_SECONDS > 0 and (_task is None or _task.done()):
+        _task = asyncio.get_running_loop().create_task(_run())
+
+
+async def stop():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+async def _run():
+    while True:
+        try:
+            await run_in_threadpool(run_snapshot_job)
+        except Exception as e:
+            print(f"[WARN] Snapshot job failed: {e}")
+        await asyncio.sleep(POLL_SECONDS)
+
+
+def run_snapshot_job() -> bool:
+    """Refresh the AI snapshots if this worker wins the lease. Returns whether it ran."""
+    db = SessionLocal()
+    try:
+        if not acquire_lease(db, SNAPSHOT_JOB, INTERVAL):
+            return False
+        snapshots.refresh_all(db, renew=lambda: renew_lease(db, SNAPSHOT_JOB, INTERVAL))
+        return True
+    finally:
+        db.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LEASES
+# ─────────────────────────────────────────────────────────────────────────────
+def acquire_lease(db: Session, job: str, duration: timedelta) -> bool:
+    """Take the job's lease for `duration` if nobody holds an unexpired one. Commits."""
+    now = datetime.utcnow()
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    db.execute(insert(models.JobLease.__table__).values(
+        job=job, holder="", expires_at=now,
+    ).on_conflict_do_nothing(index_elements=["job"]))
+    # Concurrent claimers serialise on the row; the losers re-check expires_at and match nothing
+    claimed = db.execute(update(models.JobLease).where(
+        models.JobLease.job == job,
+        models.JobLease.expires_at <= now,
+    ).values(holder=WORKER_ID, expires_at=now + duration)).rowcount
+    db.commit()
+    return claimed == 1
+
+
+def renew_lease(db: Session, job: str, duration: timedelta) -> bool:
+    """Push our lease's expiry to now + `duration`. False if another worker has taken it over."""
+    renewed = db.execute(update(models.JobLease).where(
+        models.JobLease.job == job,
+        models.JobLease.holder == WORKER_ID,
+    ).values(expires_at=datetime.utcnow() + duration)).rowcount
+    db.commit()
+    return renewed == 1
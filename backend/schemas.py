@@ -54,6 +54,14 @@ class MenuItem(MenuItemBase):
     class Config:
         from_attributes = True
 
+class RecipeLineIn(BaseModel):
+    inventory_item_id: int
+    quantity: float  # Per portion, in the inventory item's unit
+
+class RecipeLineOut(RecipeLineIn):
+    item_name: str
+    unit: str
+
 # ──────────────────────────────────────────────
 # ORDERS
 # ──────────────────────────────────────────────
@@ -71,6 +79,16 @@ class OrderCreate(BaseModel):
     table_number: Optional[int] = None
     notes: str = ""
 
+class BulkOrderEntry(OrderCreate):
+    created_at: Optional[datetime] = None  # Original POS/aggregator time; defaults to now
+
+class BulkOrderCreate(BaseModel):
+    orders: List[BulkOrderEntry]
+
+class BulkOrderOut(BaseModel):
+    created: int
+    order_ids: List[int]
+
 class OrderItemOut(BaseModel):
     id: int
     menu_item_id: int
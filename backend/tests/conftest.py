@@ -0,0 +1,86 @@
+"""
+Shared fixture data: a throwaway SQLite database filled by
+execution/generate_benchmark_data.py (deterministic per seed, ending today).
+
+  restaurants 1-2   45 days, ~25 orders/day, 15 menu items
+  restaurant  3     5 days, ~10 orders/day — too short for the seasonal model,
+                    anomalies or week-over-week figures
+  scratch           10 days, ~8 orders/day, not in `restaurant_ids`: tests that
+                    write through the API use it, so the comparisons above
+                    never see their orders
+
+DATABASE_URL is set before anything imports `database`, which binds its
+engines at import.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GENERATOR = os.path.join(BACKEND, "..", "execution", "generate_benchmark_data.py")
+
+_db_path = os.path.join(tempfile.mkdtemp(prefix="restaurant-agent-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+os.environ["AI_SNAPSHOT_INTERVAL_SECONDS"] = "0"
+os.environ.pop("RESTAURANT_UTC_OFFSET_MINUTES", None)
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+DATASETS = [
+    ["--restaurants", "2", "--days", "45", "--orders-per-day", "25", "--menu-size", "15", "--seed", "11"],
+    ["--restaurants", "1", "--days", "5", "--orders-per-day", "10", "--menu-size", "8", "--seed", "12"],
+]
+SCRATCH_DATASET = ["--restaurants", "1", "--days", "10", "--orders-per-day", "8", "--menu-size", "8", "--seed", "13"]
+
+
+@pytest.fixture(scope="session")
+def restaurant_ids():
+    for args in DATASETS:
+        subprocess.run([sys.executable, GENERATOR, *args], check=True, stdout=subprocess.DEVNULL)
+    import models
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        return [rid for (rid,) in db.query(models.Restaurant.id).order_by(models.Restaurant.id)]
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def db(restaurant_ids):
+    from database import SessionLocal
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def scratch_restaurant(restaurant_ids):
+    subprocess.run([sys.executable, GENERATOR, *SCRATCH_DATASET], check=True, stdout=subprocess.DEVNULL)
+    import models
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        return db.query(models.Restaurant.id).order_by(models.Restaurant.id.desc()).first()[0]
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def scratch_client(db, scratch_restaurant):
+    """(TestClient logged in as the scratch restaurant's user, restaurant id)."""
+    from fastapi.testclient import TestClient
+    import auth
+    import main
+    import models
+    restaurant = db.get(models.Restaurant, scratch_restaurant)
+    user = db.query(models.User).filter(models.User.tenant_id == restaurant.tenant_id).first()
+    with TestClient(main.app) as client:
+        client.headers["Authorization"] = f"Bearer {auth.create_access_token({'sub': user.email})}"
+        yield client, restaurant.id
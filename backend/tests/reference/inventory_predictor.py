@@ -0,0 +1,439 @@
+"""
+Inventory Prediction Intelligence — EXHAUSTIVE
+================================================================================
+REFERENCE COPY for tests/test_inventory_predictor.py: ai/inventory_predictor.py
+as it was before the daily stock rollups, reading 30 days of raw movements
+(tests/test_inventory_predictor.py supplies the `ctx.stock_movements` loader
+the context had then). Do not import it from application code, and do not
+change it.
+
+Full-depth inventory analytics including:
+  1. Per-item depletion forecasting (linear + trend-adjusted)
+  2. ABC Classification (Pareto analysis by cost contribution)
+  3. Consumption velocity scoring (fast/medium/slow movers)
+  4. Weekly consumption trend detection (accelerating / decelerating)
+  5. Spoilage risk scoring with urgency windows
+  6. Dynamic reorder point calculation (safety stock + lead-time buffer)
+  7. Optimal reorder quantity (EOQ approximation)
+  8. Waste percentage analysis (waste vs. total usage)
+  9. Procurement cost analytics (total spend, cost trend)
+  10. Ingredient → menu item dependency mapping
+  11. Day-of-week usage pattern (which days consume most of each item)
+  12. Stock health heatmap data
+  13. Multi-tier alerting (critical / warning / info)
+================================================================================
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from ai.context import AnalysisContext
+from ai.timebuckets import to_local
+import math
+import models
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# MAIN ENTRY POINT
+# ─────────────────────────────────────────────────────────────────────────────
+def get_inventory_predictions(ctx: AnalysisContext) -> dict:
+    """Complete inventory intelligence — exhaustive analysis."""
+    items = ctx.inventory_items
+
+    if not items:
+        return _empty_response()
+
+    now = ctx.now
+    thirty_days_ago = now - timedelta(days=30)
+    seven_days_ago = now - timedelta(days=7)
+
+    # Group the last 30 days of movements by item
+    movements_by_item = defaultdict(list)
+    for m in ctx.stock_movements:
+        movements_by_item[m.inventory_item_id].append(m)
+
+    predictions = []
+    alerts = []
+    total_inventory_value = 0
+    total_monthly_spend = 0
+
+    for item in items:
+        movements = movements_by_item.get(item.id, [])
+        analysis = _analyze_single_item(item, movements, now, thirty_days_ago, seven_days_ago)
+        predictions.append(analysis["prediction"])
+        alerts.extend(analysis["alerts"])
+        total_inventory_value += analysis["prediction"]["current_value"]
+        total_monthly_spend += analysis["prediction"]["monthly_spend"]
+
+    # ── ABC Classification (Pareto by monthly spend) ──
+    predictions = _apply_abc_classification(predictions)
+
+    # ── Summary ──
+    critical_count = sum(1 for p in predictions if p["status"] == "critical")
+    low_count = sum(1 for p in predictions if p["status"] == "low")
+    reorder_count = sum(1 for p in predictions if p["status"] == "reorder")
+    ok_count = sum(1 for p in predictions if p["status"] == "ok")
+    high_spoilage = sum(1 for p in predictions if p["spoilage_risk"] >= 70)
+    fast_movers = sum(1 for p in predictions if p["velocity"] == "fast")
+    slow_movers = sum(1 for p in predictions if p["velocity"] == "slow")
+
+    # Sort by urgency
+    priority_order = {"critical": 0, "low": 1, "reorder": 2, "ok": 3}
+    predictions.sort(key=lambda x: (priority_order.get(x["status"], 4), x["days_until_depletion"] or 9999))
+    alerts.sort(key=lambda x: {"critical": 0, "warning": 1, "info": 2}.get(x["severity"], 3))
+
+    # ── Category Breakdown ──
+    category_stats = _compute_category_stats(predictions)
+
+    # ── Stock Health Heatmap ──
+    heatmap = _stock_health_heatmap(predictions)
+
+    return {
+        "predictions": predictions,
+        "alerts": alerts,
+        "summary": {
+            "total_items": len(predictions),
+            "total_inventory_value": round(total_inventory_value, 2),
+            "total_monthly_spend": round(total_monthly_spend, 2),
+            "critical_items": critical_count,
+            "low_stock_items": low_count,
+            "reorder_items": reorder_count,
+            "ok_items": ok_count,
+            "high_spoilage_items": high_spoilage,
+            "fast_movers": fast_movers,
+            "slow_movers": slow_movers,
+            "alerts_count": len(alerts),
+            "abc_breakdown": {
+                "A": sum(1 for p in predictions if p["abc_class"] == "A"),
+                "B": sum(1 for p in predictions if p["abc_class"] == "B"),
+                "C": sum(1 for p in predictions if p["abc_class"] == "C"),
+            },
+        },
+        "category_stats": category_stats,
+        "heatmap": heatmap,
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SINGLE-ITEM DEEP ANALYSIS
+# ─────────────────────────────────────────────────────────────────────────────
+def _analyze_single_item(item, movements, now, thirty_days_ago, seven_days_ago):
+    """Exhaustive analysis for a single inventory item."""
+    alerts = []
+
+    # ── Separate OUT / IN / ADJUST movements ──
+    outs = [m for m in movements if m.movement_type == models.StockMovementType.OUT]
+    ins = [m for m in movements if m.movement_type == models.StockMovementType.IN]
+    adjusts = [m for m in movements if m.movement_type == models.StockMovementType.ADJUST]
+
+    total_out_30d = sum(m.quantity for m in outs)
+    total_in_30d = sum(m.quantity for m in ins)
+    days_tracked = max((now - thirty_days_ago).days, 1)
+
+    # ── Daily Usage ──
+    daily_usage = total_out_30d / days_tracked
+
+    # ── Recent 7-day vs Previous 23-day trend ──
+    recent_outs = [m for m in outs if m.created_at >= seven_days_ago]
+    older_outs = [m for m in outs if m.created_at < seven_days_ago]
+    recent_7d_usage = sum(m.quantity for m in recent_outs)
+    older_23d_usage = sum(m.quantity for m in older_outs)
+
+    daily_usage_recent = recent_7d_usage / 7 if recent_7d_usage else daily_usage
+    daily_usage_older = older_23d_usage / 23 if older_23d_usage else daily_usage
+
+    # Trend: positive = accelerating consumption
+    if daily_usage_older > 0:
+        consumption_trend_pct = round(((daily_usage_recent - daily_usage_older) / daily_usage_older) * 100, 1)
+    else:
+        consumption_trend_pct = 0
+    consumption_trend = "accelerating" if consumption_trend_pct > 10 else ("decelerating" if consumption_trend_pct < -10 else "stable")
+
+    # Use trend-adjusted daily usage for forward projections
+    adjusted_daily = daily_usage_recent if daily_usage_recent > 0 else daily_usage
+
+    # ── Depletion Forecast ──
+    if adjusted_daily > 0:
+        days_until_depletion = round(item.quantity / adjusted_daily, 1)
+        depletion_date = (to_local(now) + timedelta(days=days_until_depletion)).strftime("%Y-%m-%d")
+    else:
+        days_until_depletion = None
+        depletion_date = "N/A (no usage)"
+
+    # ── Spoilage Risk ──
+    if item.expiry_days and item.expiry_days > 0 and days_until_depletion is not None:
+        # If stock will last longer than expiry, high spoilage risk
+        spoilage_risk = round(max(0, min(100, (1 - adjusted_daily * item.expiry_days / max(item.quantity, 0.01)) * 100)), 1)
+        if days_until_depletion > item.expiry_days:
+            spoilage_risk = max(spoilage_risk, 80)
+    else:
+        spoilage_risk = 0
+
+    spoilage_window = None
+    if item.expiry_days and spoilage_risk > 50:
+        spoilage_window = f"Use within {item.expiry_days} days or risk waste"
+
+    # ── Reorder Intelligence ──
+    lead_time_days = 2  # Assume 2-day delivery lead time
+    safety_stock_days = 3
+    reorder_point = adjusted_daily * (lead_time_days + safety_stock_days)
+    needs_reorder = item.quantity <= reorder_point
+    low_stock = item.quantity <= item.low_stock_threshold
+
+    # EOQ (Economic Order Quantity) approximation
+    # Q* = sqrt(2DS/H) where D=annual demand, S=order cost, H=holding cost per unit
+    annual_demand = adjusted_daily * 365
+    order_cost = 500  # Fixed cost per purchase order (KES)
+    holding_cost = (item.cost_per_unit or 1) * 0.25  # 25% of unit cost per year
+    eoq = round(math.sqrt(2 * annual_demand * order_cost / max(holding_cost, 0.01)), 1) if annual_demand > 0 else 0
+
+    # ── Status Classification ──
+    if item.quantity <= 0:
+        status = "critical"
+    elif low_stock:
+        status = "low"
+    elif needs_reorder:
+        status = "reorder"
+    else:
+        status = "ok"
+
+    # ── Velocity Classification ──
+    if daily_usage >= (total_out_30d / days_tracked) * 1.3:
+        velocity = "fast"
+    elif daily_usage <= (total_out_30d / days_tracked) * 0.5:
+        velocity = "slow"
+    else:
+        velocity = "medium"
+
+    # ── Waste Analysis ──
+    waste_movements = [m for m in outs if m.reason and "waste" in m.reason.lower()]
+    total_waste = sum(m.quantity for m in waste_movements)
+    waste_pct = round((total_waste / max(total_out_30d, 1)) * 100, 1)
+
+    # ── Procurement Cost ──
+    monthly_spend = total_in_30d * (item.cost_per_unit or 0)
+    current_value = item.quantity * (item.cost_per_unit or 0)
+
+    # ── Day-of-Week Consumption Pattern ──
+    dow_usage = defaultdict(float)
+    day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    for m in outs:
+        dow_usage[day_order[m.weekday - 1]] += m.quantity
+    dow_pattern = [{"day": d, "usage": round(dow_usage.get(d, 0), 1)} for d in day_order]
+    peak_usage_day = max(dow_pattern, key=lambda x: x["usage"])["day"] if dow_pattern else "N/A"
+
+    # ── Generate Alerts ──
+    if status == "critical":
+        alerts.append({
+            "item": item.item_name,
+            "message": f"OUT OF STOCK — {item.item_name}! Immediately reorder {round(eoq)} {item.unit}.",
+            "severity": "critical",
+            "action": "reorder_now",
+        })
+    elif status == "low":
+        alerts.append({
+            "item": item.item_name,
+            "message": f"Low stock: {item.quantity} {item.unit} remaining (threshold: {item.low_stock_threshold}). Depletes by {depletion_date}.",
+            "severity": "warning",
+            "action": "reorder_soon",
+        })
+    elif status == "reorder":
+        alerts.append({
+            "item": item.item_name,
+            "message": f"Approaching reorder point ({round(reorder_point, 1)} {item.unit}). Current: {item.quantity} {item.unit}.",
+            "severity": "info",
+            "action": "plan_reorder",
+        })
+
+    if spoilage_risk >= 70:
+        alerts.append({
+            "item": item.item_name,
+            "message": f"High spoilage risk ({spoilage_risk}%) — {spoilage_window}. Consider promoting in daily specials.",
+            "severity": "warning",
+            "action": "use_or_promote",
+        })
+
+    if waste_pct > 15:
+        alerts.append({
+            "item": item.item_name,
+            "message": f"High waste rate ({waste_pct}%) over 30 days. Review portion sizes or storage.",
+            "severity": "warning",
+            "action": "reduce_waste",
+        })
+
+    if consumption_trend == "accelerating" and consumption_trend_pct > 25:
+        alerts.append({
+            "item": item.item_name,
+            "message": f"Usage accelerating +{consumption_trend_pct}% — adjust reorder frequency.",
+            "severity": "info",
+            "action": "increase_frequency",
+        })
+
+    prediction = {
+        "id": item.id,
+        "name": item.item_name,
+        "unit": item.unit,
+        "current_stock": item.quantity,
+        "current_value": round(current_value, 2),
+        "cost_per_unit": item.cost_per_unit,
+        "low_stock_threshold": item.low_stock_threshold,
+        "status": status,
+
+        # Usage analytics
+        "daily_usage_avg": round(daily_usage, 2),
+        "daily_usage_recent_7d": round(daily_usage_recent, 2),
+        "consumption_trend": consumption_trend,
+        "consumption_trend_pct": consumption_trend_pct,
+        "velocity": velocity,
+        "total_consumed_30d": round(total_out_30d, 1),
+        "total_restocked_30d": round(total_in_30d, 1),
+        "peak_usage_day": peak_usage_day,
+        "dow_pattern": dow_pattern,
+
+        # Depletion forecast
+        "days_until_depletion": days_until_depletion,
+        "depletion_date": depletion_date,
+
+        # Reorder intelligence
+        "reorder_point": round(reorder_point, 1),
+        "optimal_order_qty": round(eoq, 1),
+        "safety_stock_level": round(adjusted_daily * safety_stock_days, 1),
+        "lead_time_days": lead_time_days,
+
+        # Risk metrics
+        "spoilage_risk": spoilage_risk,
+        "spoilage_window": spoilage_window,
+        "waste_pct": waste_pct,
+        "waste_qty_30d": round(total_waste, 1),
+
+        # Cost metrics
+        "monthly_spend": round(monthly_spend, 2),
+
+        # ABC class placeholder (filled by _apply_abc_classification)
+        "abc_class": None,
+    }
+
+    return {"prediction": prediction, "alerts": alerts}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ABC CLASSIFICATION (Pareto Analysis)
+# ─────────────────────────────────────────────────────────────────────────────
+def _apply_abc_classification(predictions):
+    """
+    Classify items using ABC analysis based on monthly spend:
+      A = top 20% of items that make up ~80% of spend  (vital few)
+      B = next 30% of items that make up ~15% of spend  (moderate)
+      C = remaining 50% that make up ~5% of spend       (trivial many)
+    """
+    sorted_by_spend = sorted(predictions, key=lambda p: p["monthly_spend"], reverse=True)
+    total_spend = sum(p["monthly_spend"] for p in sorted_by_spend)
+
+    cumulative = 0
+    for p in sorted_by_spend:
+        cumulative += p["monthly_spend"]
+        cum_pct = (cumulative / max(total_spend, 1)) * 100
+        if cum_pct <= 80:
+            p["abc_class"] = "A"
+        elif cum_pct <= 95:
+            p["abc_class"] = "B"
+        else:
+            p["abc_class"] = "C"
+
+    return sorted_by_spend
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CATEGORY PERFORMANCE
+# ─────────────────────────────────────────────────────────────────────────────
+def _compute_category_stats(predictions):
+    """Group stats by ABC class and velocity for a summary view."""
+    stats = {
+        "by_abc": defaultdict(lambda: {"count": 0, "value": 0, "spend": 0}),
+        "by_velocity": defaultdict(lambda: {"count": 0, "items": []}),
+        "by_status": defaultdict(int),
+    }
+
+    for p in predictions:
+        abc = p["abc_class"] or "C"
+        stats["by_abc"][abc]["count"] += 1
+        stats["by_abc"][abc]["value"] += p["current_value"]
+        stats["by_abc"][abc]["spend"] += p["monthly_spend"]
+
+        vel = p["velocity"]
+        stats["by_velocity"][vel]["count"] += 1
+        stats["by_velocity"][vel]["items"].append(p["name"])
+
+        stats["by_status"][p["status"]] += 1
+
+    # Convert to serializable
+    return {
+        "by_abc": {k: {"count": v["count"], "value": round(v["value"], 2), "spend": round(v["spend"], 2)} for k, v in stats["by_abc"].items()},
+        "by_velocity": {k: {"count": v["count"], "items": v["items"][:5]} for k, v in stats["by_velocity"].items()},
+        "by_status": dict(stats["by_status"]),
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# STOCK HEALTH HEATMAP
+# ─────────────────────────────────────────────────────────────────────────────
+def _stock_health_heatmap(predictions):
+    """
+    Produce heatmap data: each item gets a health score 0-100.
+    Combines: stock level, spoilage risk, waste, and trend.
+    """
+    heatmap = []
+    for p in predictions:
+        # Stock level score (0-40)
+        if p["status"] == "critical":
+            stock_score = 0
+        elif p["status"] == "low":
+            stock_score = 10
+        elif p["status"] == "reorder":
+            stock_score = 25
+        else:
+            stock_score = 40
+
+        # Spoilage score (0-30)
+        spoilage_score = max(0, 30 - p["spoilage_risk"] * 0.3)
+
+        # Waste score (0-15)
+        waste_score = max(0, 15 - p["waste_pct"] * 0.5)
+
+        # Trend score (0-15): stable/decelerating is good
+        if p["consumption_trend"] == "stable":
+            trend_score = 15
+        elif p["consumption_trend"] == "decelerating":
+            trend_score = 12
+        else:
+            trend_score = max(0, 15 - abs(p["consumption_trend_pct"]) * 0.2)
+
+        health = round(stock_score + spoilage_score + waste_score + trend_score)
+        health = max(0, min(100, health))
+
+        heatmap.append({
+            "name": p["name"],
+            "health": health,
+            "status": p["status"],
+            "abc_class": p["abc_class"],
+        })
+
+    return sorted(heatmap, key=lambda x: x["health"])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# EMPTY RESPONSE
+# ─────────────────────────────────────────────────────────────────────────────
+def _empty_response():
+    return {
+        "predictions": [],
+        "alerts": [],
+        "summary": {
+            "total_items": 0, "total_inventory_value": 0, "total_monthly_spend": 0,
+            "critical_items": 0, "low_stock_items": 0, "reorder_items": 0, "ok_items": 0,
+            "high_spoilage_items": 0, "fast_movers": 0, "slow_movers": 0,
+            "alerts_count": 0,
+            "abc_breakdown": {"A": 0, "B": 0, "C": 0},
+        },
+        "category_stats": {},
+        "heatmap": [],
+    }
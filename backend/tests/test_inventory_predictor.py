@@ -0,0 +1,63 @@
+"""
+The inventory predictor must match the implementation that read raw stock
+movements (tests/reference/inventory_predictor.py) now that it reads daily
+stock rollups.
+
+The old windows were rolling (now - 30 days, now - 7 days); the rollups cover
+whole local days. With `now` at the last instant of today the two coincide,
+so any difference is a real one. Recipes are left out on both sides: the menu
+dependencies (`used_in`, `menu_items_at_risk`) came later and have no
+counterpart in the reference.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import models
+from ai import inventory_predictor
+from ai.context import AnalysisContext
+from ai.timebuckets import day_bounds, local_today, to_local
+from tests.reference import inventory_predictor as reference
+
+
+class ReferenceContext(AnalysisContext):
+    @property
+    def stock_movements(self) -> list:
+        """The loader AnalysisContext had before the rollups (last 30 days of raw movements).
+
+        It took the ISO weekday from SQL; the same local weekday is derived here.
+        """
+        return self._get("stock_movements", lambda: [
+            SimpleNamespace(**row._asdict(), weekday=to_local(row.created_at).isoweekday())
+            for row in self.db.query(
+                models.StockMovement.inventory_item_id,
+                models.StockMovement.movement_type,
+                models.StockMovement.quantity,
+                models.StockMovement.reason,
+                models.StockMovement.created_at,
+            ).join(models.InventoryItem).filter(
+                models.InventoryItem.restaurant_id == self.restaurant_id,
+                models.StockMovement.created_at >= self.now - timedelta(days=30),
+            )
+        ])
+
+
+@pytest.fixture
+def no_recipes(monkeypatch):
+    monkeypatch.setattr(AnalysisContext, "recipes", property(lambda self: []))
+
+
+def test_matches_raw_movement_implementation(db, restaurant_ids, no_recipes):
+    _, end_of_today = day_bounds(local_today(datetime.utcnow()))
+    now = end_of_today - timedelta(microseconds=1)
+    for restaurant_id in restaurant_ids:
+        expected = reference.get_inventory_predictions(ReferenceContext(db, restaurant_id, now=now))
+        actual = inventory_predictor.get_inventory_predictions(AnalysisContext(db, restaurant_id, now=now))
+
+        assert any(p["total_consumed_30d"] for p in expected["predictions"]), f"restaurant {restaurant_id} has no fixture usage"
+        for p in actual["predictions"]:
+            assert p.pop("used_in") == []
+        assert actual["summary"].pop("menu_items_at_risk") == 0
+        assert actual == expected, f"restaurant {restaurant_id}"
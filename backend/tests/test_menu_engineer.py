@@ -0,0 +1,31 @@
+"""
+Menu engineering must match the implementation that queried raw orders itself
+(tests/reference/menu_engineer.py) now that it reads the shared
+AnalysisContext's pre-aggregated item sales and hourly quantities.
+"""
+
+from datetime import datetime
+
+from ai import menu_engineer
+from ai.context import AnalysisContext
+from tests.reference import menu_engineer as reference
+
+
+def test_matches_raw_order_implementation(db, restaurant_ids, monkeypatch):
+    for restaurant_id in restaurant_ids:
+        ctx = AnalysisContext(db, restaurant_id)
+        # Same "now" on both sides, so the 7- and 30-day windows cut at the same instant
+        monkeypatch.setattr(reference, "datetime", _frozen_datetime(ctx.now))
+        expected = reference.get_menu_engineering(db, restaurant_id)
+        actual = menu_engineer.get_menu_engineering(ctx)
+
+        assert expected["matrix"], f"restaurant {restaurant_id} has no fixture sales"
+        assert actual == expected, f"restaurant {restaurant_id}"
+
+
+def _frozen_datetime(now):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now
+    return FrozenDatetime
@@ -0,0 +1,83 @@
+"""
+Walking the keyset-paged listings page by page must give exactly the rows of
+one fully sorted query, in order — including rows that tie on the leading
+sort columns, where a wrong cursor predicate skips or repeats rows.
+"""
+
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+import auth
+import main
+import models
+from pagination import NEXT_CURSOR_HEADER
+
+
+@pytest.fixture
+def client(db, restaurant_ids):
+    restaurant = db.get(models.Restaurant, restaurant_ids[-1])
+    user = db.query(models.User).filter(models.User.tenant_id == restaurant.tenant_id).first()
+    with TestClient(main.app) as client:
+        client.headers["Authorization"] = f"Bearer {auth.create_access_token({'sub': user.email})}"
+        yield client, restaurant.id
+
+
+@pytest.fixture
+def tied_orders(db, restaurant_ids):
+    """Give a run of the restaurant's orders one shared created_at, restoring them afterwards."""
+    orders = db.query(models.Order.id, models.Order.created_at).filter(
+        models.Order.restaurant_id == restaurant_ids[-1]
+    ).order_by(models.Order.id).limit(9).all()
+    db.execute(update(models.Order).where(
+        models.Order.id.in_([o.id for o in orders])
+    ).values(created_at=datetime(2026, 1, 1, 12, 0)))
+    db.commit()
+    yield
+    for o in orders:
+        db.execute(update(models.Order).where(models.Order.id == o.id).values(created_at=o.created_at))
+    db.commit()
+
+
+def _walk(client, path, limit):
+    rows, cursor = [], None
+    while True:
+        response = client.get(path, params={"limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page) <= limit
+        rows += page
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return rows
+
+
+def test_orders_pages_follow_created_at_then_id(client, db, tied_orders):
+    client, restaurant_id = client
+    expected = [oid for (oid,) in db.query(models.Order.id).filter(
+        models.Order.restaurant_id == restaurant_id
+    ).order_by(models.Order.created_at.desc(), models.Order.id.desc())]
+
+    for limit in (1, 4, 7, len(expected), len(expected) + 1):
+        assert [o["id"] for o in _walk(client, "/orders/", limit)] == expected, f"limit={limit}"
+
+
+def test_reservations_pages_follow_date_time_id(client, db):
+    client, restaurant_id = client
+    R = models.Reservation
+    expected = [rid for (rid,) in db.query(R.id).filter(R.restaurant_id == restaurant_id).order_by(
+        R.reservation_date.desc(), R.reservation_time.asc(), R.id.asc(),
+    )]
+    assert len(expected) > len({(d, t) for d, t in db.query(R.reservation_date, R.reservation_time).filter(
+        R.restaurant_id == restaurant_id
+    )}), "fixture needs reservations sharing a date and time"
+
+    for limit in (1, 3, 5, len(expected)):
+        assert [r["id"] for r in _walk(client, "/reservations/", limit)] == expected, f"limit={limit}"
+
+
+def test_bad_cursor_is_rejected(client):
+    client, _ = client
+    assert client.get("/orders/", params={"cursor": "not-a-cursor"}).status_code == 400
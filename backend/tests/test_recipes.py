@@ -0,0 +1,104 @@
+"""
+Recipe consumption (ai/recipes.consume): a ticket takes each ingredient off
+stock once, by the combined amount of every line that uses it, logs one OUT
+movement per order × ingredient, and keeps the daily stock rollups equal to a
+rebuild from the movements.
+"""
+
+import pytest
+
+import models
+from ai import rollups
+from tests.test_rollups import assert_matches_rebuild
+
+
+@pytest.fixture
+def kitchen(scratch_client, db):
+    """Two menu items sharing an ingredient, with recipes set through the API."""
+    client, restaurant_id = scratch_client
+    burger, fries = [mid for (mid,) in db.query(models.MenuItem.id).filter(
+        models.MenuItem.restaurant_id == restaurant_id
+    ).order_by(models.MenuItem.id).limit(2)]
+    oil, bun, potato = [iid for (iid,) in db.query(models.InventoryItem.id).filter(
+        models.InventoryItem.restaurant_id == restaurant_id
+    ).order_by(models.InventoryItem.id).limit(3)]
+
+    for menu_item_id, lines in (
+        (burger, [{"inventory_item_id": oil, "quantity": 0.2}, {"inventory_item_id": bun, "quantity": 1}]),
+        (fries, [{"inventory_item_id": oil, "quantity": 0.05}, {"inventory_item_id": potato, "quantity": 0.3}]),
+    ):
+        response = client.put(f"/menu/{menu_item_id}/recipe", json=lines)
+        assert response.status_code == 200, response.text
+    return client, restaurant_id, (burger, fries), (oil, bun, potato)
+
+
+def test_recipe_routes(kitchen):
+    client, _, (burger, _), (oil, bun, _) = kitchen
+    lines = client.get(f"/menu/{burger}/recipe").json()
+    assert {(line["inventory_item_id"], line["quantity"]) for line in lines} == {(oil, 0.2), (bun, 1)}
+
+    duplicate = [{"inventory_item_id": oil, "quantity": 1}, {"inventory_item_id": oil, "quantity": 2}]
+    assert client.put(f"/menu/{burger}/recipe", json=duplicate).status_code == 400
+    assert client.put(f"/menu/{burger}/recipe", json=[{"inventory_item_id": oil, "quantity": 0}]).status_code == 400
+
+
+def test_ticket_decrements_each_ingredient_once(kitchen, db):
+    client, _, (burger, fries), (oil, bun, potato) = kitchen
+    before = _stock(db, oil, bun, potato)
+
+    response = client.post("/orders/", json={"items": [
+        {"menu_item_id": burger, "quantity": 2},
+        {"menu_item_id": fries},
+        {"menu_item_id": burger},  # Same item on a second line
+    ]})
+    assert response.status_code == 200, response.text
+    order_id = response.json()["id"]
+    db.expire_all()
+
+    used = {oil: 3 * 0.2 + 0.05, bun: 3, potato: 0.3}
+    after = _stock(db, oil, bun, potato)
+    for item_id, quantity in used.items():
+        assert after[item_id] == pytest.approx(before[item_id] - quantity), item_id
+
+    movements = db.query(models.StockMovement).filter(
+        models.StockMovement.reason == f"Sale (order #{order_id})"
+    ).all()
+    assert {m.inventory_item_id: m.quantity for m in movements} == pytest.approx(used)
+    assert len(movements) == len(used)
+    assert {m.movement_type for m in movements} == {models.StockMovementType.OUT}
+
+
+def test_bulk_import_logs_each_order(kitchen, db):
+    client, _, (burger, fries), (oil, bun, potato) = kitchen
+    before = _stock(db, oil, bun, potato)
+
+    response = client.post("/orders/bulk", json={"orders": [
+        {"items": [{"menu_item_id": burger}]},
+        {"items": [{"menu_item_id": fries, "quantity": 2}, {"menu_item_id": burger}]},
+    ]})
+    assert response.status_code == 200, response.text
+    first, second = response.json()["order_ids"]
+    db.expire_all()
+
+    after = _stock(db, oil, bun, potato)
+    assert after[oil] == pytest.approx(before[oil] - (0.2 + 0.1 + 0.2))
+    assert after[bun] == pytest.approx(before[bun] - 2)
+    assert after[potato] == pytest.approx(before[potato] - 0.6)
+    for order_id, ingredients in ((first, 2), (second, 3)):
+        assert db.query(models.StockMovement).filter(
+            models.StockMovement.reason == f"Sale (order #{order_id})"
+        ).count() == ingredients
+
+
+def test_stock_rollups_match_rebuild(kitchen, db):
+    client, restaurant_id, (burger, fries), _ = kitchen
+    for items in ([{"menu_item_id": burger}], [{"menu_item_id": fries, "quantity": 3}, {"menu_item_id": burger}]):
+        assert client.post("/orders/", json={"items": items}).status_code == 200
+    db.expire_all()
+    assert_matches_rebuild(
+        db, restaurant_id, [(models.StockDailyRollup, ["inventory_item_id", "day"])], rollups.rebuild_stock_rollups,
+    )
+
+
+def _stock(db, *item_ids):
+    return {item_id: db.get(models.InventoryItem, item_id).quantity for item_id in item_ids}
@@ -0,0 +1,33 @@
+"""
+The NumPy revenue forecaster must match the pure-Python implementation it
+replaced (tests/reference/revenue_forecaster.py) on the same rollups.
+
+The daily forecast is compared only where both use weekday averages: with two
+weeks of history the current forecaster switches to the seasonal model, which
+is meant to give different numbers (tests/test_seasonal_model.py covers it).
+"""
+
+from ai import revenue_forecaster
+from ai.context import AnalysisContext
+from tests.reference import revenue_forecaster as reference
+
+FORECAST_KEYS = {"forecast", "hourly_forecast", "forecast_model"}
+
+
+def test_matches_pure_python_implementation(db, restaurant_ids):
+    for restaurant_id in restaurant_ids:
+        expected = reference.get_revenue_forecast(AnalysisContext(db, restaurant_id))
+        actual = revenue_forecaster.get_revenue_forecast(AnalysisContext(db, restaurant_id))
+
+        assert expected["daily_revenue"], f"restaurant {restaurant_id} has no fixture revenue"
+        for key in expected.keys() - FORECAST_KEYS:
+            assert actual[key] == expected[key], f"restaurant {restaurant_id}: {key}"
+        if actual["forecast_model"]["method"] == "weekday_average":
+            assert actual["forecast"] == expected["forecast"], f"restaurant {restaurant_id}: forecast"
+
+
+def test_short_history_uses_weekday_average(db, restaurant_ids):
+    result = revenue_forecaster.get_revenue_forecast(AnalysisContext(db, restaurant_ids[-1]))
+    assert result["forecast_model"]["method"] == "weekday_average"
+    assert result["anomalies"] == []
+    assert result["trends"]["week_over_week_growth"] == 0
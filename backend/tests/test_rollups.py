@@ -0,0 +1,102 @@
+"""
+Rollups and pair counts maintained by the order write path
+(`rollups.record_orders` from the create, bulk and status routes) must equal a
+rebuild from the raw orders.
+
+Cancelling reverses an order rather than deleting rows, so a bucket, check
+size or pair whose only order was cancelled keeps a row of zeros that a
+rebuild would not create. Those rows are ignored.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import models
+from ai import rollups
+
+REVENUE_TABLES = [
+    (models.RevenueRollup, ["day", "hour", "order_type"]),
+    (models.CategoryRollup, ["day", "hour", "order_type", "category"]),
+    (models.CheckSizeRollup, ["total"]),
+]
+PAIR_TABLES = [
+    (models.ItemOrderCount, ["menu_item_id"]),
+    (models.ItemPairCount, ["item_a", "item_b"]),
+]
+
+
+@pytest.fixture
+def order_activity(scratch_client, db):
+    """One order, a backdated bulk import, then a cancel + un-cancel and a cancel that stays."""
+    client, restaurant_id = scratch_client
+    menu = [mid for (mid,) in db.query(models.MenuItem.id).filter(
+        models.MenuItem.restaurant_id == restaurant_id
+    ).order_by(models.MenuItem.id)]
+    now = datetime.utcnow().replace(microsecond=0)
+
+    response = client.post("/orders/", json={"items": [
+        {"menu_item_id": menu[0], "quantity": 2},
+        {"menu_item_id": menu[1]},
+        {"menu_item_id": menu[0]},  # Same item on two lines
+    ]})
+    assert response.status_code == 200, response.text
+
+    response = client.post("/orders/bulk", json={"orders": [
+        {"items": [{"menu_item_id": menu[2]}, {"menu_item_id": menu[3], "quantity": 3}],
+         "order_type": "takeout", "created_at": (now - timedelta(days=3, hours=2)).isoformat()},
+        {"items": [{"menu_item_id": menu[0]}, {"menu_item_id": menu[2]}, {"menu_item_id": menu[4]}],
+         "order_type": "delivery", "created_at": (now - timedelta(days=2, minutes=7)).isoformat()},
+        {"items": [{"menu_item_id": menu[5]}],
+         "created_at": (now - timedelta(days=9, hours=5)).isoformat()},
+    ]})
+    assert response.status_code == 200, response.text
+    reopened, cancelled, _ = response.json()["order_ids"]
+
+    for order_id, status in ((reopened, "cancelled"), (reopened, "pending"), (cancelled, "cancelled")):
+        response = client.patch(f"/orders/{order_id}/status", json={"status": status})
+        assert response.status_code == 200, response.text
+    db.expire_all()
+    return restaurant_id
+
+
+def test_revenue_rollups_match_rebuild(db, order_activity):
+    assert_matches_rebuild(db, order_activity, REVENUE_TABLES, rollups.rebuild_revenue_rollups)
+
+
+def test_pair_counts_match_rebuild(db, order_activity):
+    assert_matches_rebuild(db, order_activity, PAIR_TABLES, rollups.rebuild_pair_counts)
+
+
+def assert_matches_rebuild(db, restaurant_id, tables, rebuild):
+    """Compare the tables as the write path left them with `rebuild` on the same data (rolled back after)."""
+    incremental = {model.__tablename__: _rows(db, model, restaurant_id, keys) for model, keys in tables}
+    try:
+        rebuild(db, restaurant_id)
+        rebuilt = {model.__tablename__: _rows(db, model, restaurant_id, keys) for model, keys in tables}
+    finally:
+        db.rollback()
+    for name, rows in rebuilt.items():
+        assert rows, f"{name} is empty after the rebuild"
+        assert incremental[name] == rows, name
+
+
+def _rows(db, model, restaurant_id, key_columns):
+    """{key: values} for a restaurant's rows, without all-zero rows.
+
+    Floats are rounded: the write path adds a batch's sum onto the stored row,
+    the rebuild adds one value at a time.
+    """
+    value_columns = [
+        c.name for c in model.__table__.columns
+        if c.name not in ("id", "restaurant_id", *key_columns)
+    ]
+    rows = {}
+    for row in db.query(model).filter(model.restaurant_id == restaurant_id):
+        values = tuple(
+            round(v, 6) if isinstance(v, float) else v
+            for v in (getattr(row, c) for c in value_columns)
+        )
+        if any(values):
+            rows[tuple(getattr(row, c) for c in key_columns)] = values
+    return rows
@@ -0,0 +1,108 @@
+"""
+Holt-Winters model cache (ai/seasonal_model.py): stepping a stored model over
+new days must land on the state a full run with the same parameters reaches,
+edited history or stale parameters must force a refit, and forecasts must
+widen with the horizon.
+
+Runs on a synthetic series, stored against the scratch restaurant.
+"""
+
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import models
+from ai import seasonal_model
+from ai.seasonal_model import MIN_DAYS, RETUNE_DAYS, SEASON
+
+FIRST_DAY = date(2026, 1, 5)
+FITTED_DAYS = 40
+
+
+@pytest.fixture
+def series():
+    """Weekly pattern + slow growth + noise, in whole currency units like the rollups."""
+    rng = np.random.default_rng(9)
+    days = np.arange(FITTED_DAYS + RETUNE_DAYS + SEASON)
+    weekly = np.array([0.8, 0.85, 0.9, 1.0, 1.25, 1.4, 1.2])[days % SEASON]
+    return np.round(50_000 * weekly * (1 + days / 400) + rng.normal(0, 2_500, len(days))).astype(np.int64)
+
+
+@pytest.fixture
+def restaurant_id(db, scratch_restaurant):
+    _delete_model(db, scratch_restaurant)
+    yield scratch_restaurant
+    _delete_model(db, scratch_restaurant)
+
+
+def test_step_forward_matches_full_run(db, restaurant_id, series):
+    fitted = seasonal_model.get_model(db, restaurant_id, FIRST_DAY, series[:FITTED_DAYS])
+    params = (fitted.alpha, fitted.beta, fitted.gamma)
+
+    row = seasonal_model.get_model(db, restaurant_id, FIRST_DAY, series[:FITTED_DAYS + 10])
+    assert (row.alpha, row.beta, row.gamma) == params
+    assert row.tuned_on == FIRST_DAY + timedelta(days=FITTED_DAYS - 1), "stepped, not refitted"
+    assert row.last_day == FIRST_DAY + timedelta(days=FITTED_DAYS + 9)
+    assert row.fitted_revenue == int(series[:FITTED_DAYS + 10].sum())
+
+    level, trend, season, sse, n_errors = _full_run(series[:FITTED_DAYS + 10], params)
+    assert row.level == pytest.approx(level)
+    assert row.trend == pytest.approx(trend)
+    assert json.loads(row.seasonal) == pytest.approx(season)
+    assert row.sse == pytest.approx(sse)
+    assert row.n_errors == n_errors
+
+
+def test_edited_history_forces_refit(db, restaurant_id, series):
+    seasonal_model.get_model(db, restaurant_id, FIRST_DAY, series[:FITTED_DAYS])
+
+    edited = series[:FITTED_DAYS + 1].copy()
+    edited[3] += 10_000  # A backdated import
+    row = seasonal_model.get_model(db, restaurant_id, FIRST_DAY, edited)
+    assert row.tuned_on == FIRST_DAY + timedelta(days=FITTED_DAYS), "refitted"
+    assert row.fitted_revenue == int(edited.sum())
+
+
+def test_retune_days_force_refit(db, restaurant_id, series):
+    seasonal_model.get_model(db, restaurant_id, FIRST_DAY, series[:FITTED_DAYS])
+
+    days = FITTED_DAYS + RETUNE_DAYS - 1
+    row = seasonal_model.get_model(db, restaurant_id, FIRST_DAY, series[:days])
+    assert row.tuned_on == FIRST_DAY + timedelta(days=FITTED_DAYS - 1), "still within RETUNE_DAYS"
+
+    row = seasonal_model.get_model(db, restaurant_id, FIRST_DAY, series[:days + 1])
+    assert row.tuned_on == FIRST_DAY + timedelta(days=days), "refitted"
+
+
+def test_short_series_has_no_model(db, restaurant_id, series):
+    assert seasonal_model.get_model(db, restaurant_id, FIRST_DAY, series[:MIN_DAYS - 1]) is None
+
+
+def test_forecast_intervals_widen(db, restaurant_id, series):
+    row = seasonal_model.get_model(db, restaurant_id, FIRST_DAY, series[:FITTED_DAYS])
+    start = row.last_day + timedelta(days=1)
+    horizon = 21
+
+    forecast = seasonal_model.forecast_daily(row, start, horizon)
+    assert [f["date"] for f in forecast] == [start + timedelta(days=i) for i in range(horizon)]
+    widths = [f["high"] - f["predicted"] for f in forecast]
+    assert all(later >= earlier for earlier, later in zip(widths, widths[1:]))
+    assert widths[-1] > widths[0] > 0
+    assert all(f["low"] <= f["predicted"] <= f["high"] for f in forecast)
+
+
+def _full_run(y, params):
+    """Final state of one Holt-Winters run over all of `y` with fixed parameters."""
+    alpha, beta, gamma = (np.array([p]) for p in params)
+    level, trend, season = seasonal_model._initial_state(y, 1)
+    state = seasonal_model._run(y[SEASON:], SEASON, alpha, beta, gamma, level, trend, season,
+                                np.zeros(1), np.zeros(1, dtype=np.int64))
+    level, trend, season, sse, n_errors = (s[0] for s in state)
+    return float(level), float(trend), season.tolist(), float(sse), int(n_errors)
+
+
+def _delete_model(db, restaurant_id):
+    db.query(models.ForecastModel).filter(models.ForecastModel.restaurant_id == restaurant_id).delete()
+    db.commit()
@@ -0,0 +1,109 @@
+"""
+KLL sketches (ai/sketches.py): exact below K values, merged day rows within
+the rank error documented at SKETCH_K, a lossless JSON form, and completion
+rows kept by the status route equal to a rebuild.
+"""
+
+import bisect
+import random
+
+import pytest
+
+import models
+from ai import sketches
+from ai.sketches import KLL, SKETCH_K
+
+RANK_ERROR = 0.017  # Documented at SKETCH_K = 200
+QUANTILES = [i / 100 for i in range(1, 100)]
+
+
+def _prep_minutes(rng, n, mean=12.0):
+    return [max(0.5, rng.gauss(mean, 4)) for _ in range(n)]
+
+
+def _sketch(values):
+    sketch = KLL()
+    for value in values:
+        sketch.update(value)
+    return sketch
+
+
+@pytest.mark.parametrize("n", [1, 7, 150, SKETCH_K])
+def test_exact_below_k(n):
+    values = _prep_minutes(random.Random(n), n)
+    sketch = _sketch(values)
+    exact = sorted(values)
+    for q in [0, *QUANTILES, 0.999]:
+        assert sketch.quantile(q) == exact[int(q * n)], q
+
+
+def test_merged_days_within_rank_error():
+    rng = random.Random(3)
+    days = [_prep_minutes(rng, rng.randint(200, 1200), mean=10 + day % 7) for day in range(60)]
+    merged = KLL()
+    for values in days:
+        merged.merge(KLL.from_json(_sketch(values).to_json()))
+
+    exact = sorted(v for values in days for v in values)
+    n = len(exact)
+    assert merged.n == n
+    assert sum(len(level) for level in merged.levels) < n / 50, "merge did not compact"
+    for q in QUANTILES:
+        value = merged.quantile(q)
+        # Ranks the returned value occupies in the exact data, vs the rank asked for
+        low, high = bisect.bisect_left(exact, value), bisect.bisect_right(exact, value) - 1
+        target = int(q * n)
+        error = 0 if low <= target <= high else min(abs(low - target), abs(high - target)) / n
+        assert error <= RANK_ERROR, f"q={q}: rank error {error:.4f}"
+
+
+def test_json_round_trip():
+    rng = random.Random(4)
+    sketch = _sketch(_prep_minutes(rng, 5000))
+    copy = KLL.from_json(sketch.to_json())
+    assert (copy.k, copy.n, copy.flips, copy.levels) == (sketch.k, sketch.n, sketch.flips, sketch.levels)
+
+    # The compaction offsets survive too, so both keep compacting identically
+    more = _prep_minutes(rng, 3000)
+    for value in more:
+        sketch.update(value)
+        copy.update(value)
+    assert copy.to_json() == sketch.to_json()
+
+
+def test_serving_updates_completion_row(scratch_client, db):
+    client, restaurant_id = scratch_client
+    menu_item_id = db.query(models.MenuItem.id).filter(models.MenuItem.restaurant_id == restaurant_id).first()[0]
+    order_id = client.post("/orders/", json={"items": [{"menu_item_id": menu_item_id}]}).json()["id"]
+    before = sum(n for (n,) in db.query(models.TimingSketch.n).filter(
+        models.TimingSketch.restaurant_id == restaurant_id, models.TimingSketch.metric == "completion",
+    ))
+
+    # Re-serving must not sketch the order a second time
+    for status in ("ready", "served", "ready", "served"):
+        response = client.patch(f"/orders/{order_id}/status", json={"status": status})
+        assert response.status_code == 200, response.text
+    db.expire_all()
+
+    incremental = _completion_rows(db, restaurant_id)
+    assert sum(row["n"] for row in incremental.values()) == before + 1
+    try:
+        sketches.rebuild_timing_sketches(db, restaurant_id)
+        rebuilt = _completion_rows(db, restaurant_id)
+    finally:
+        db.rollback()
+    assert incremental == rebuilt
+
+
+def _completion_rows(db, restaurant_id):
+    rows = {}
+    for row in db.query(models.TimingSketch).filter(
+        models.TimingSketch.restaurant_id == restaurant_id, models.TimingSketch.metric == "completion",
+    ):
+        sketch = KLL.from_json(row.sketch)
+        rows[row.day] = {
+            "n": row.n, "total": round(row.total, 6), "total_sq": round(row.total_sq, 6),
+            "min": row.min_value, "max": row.max_value,
+            "quantiles": [sketch.quantile(q) for q in QUANTILES],
+        }
+    return rows
@@ -0,0 +1,274 @@
+"""
+Benchmark the AI analyzers and the order hot paths.
+
+For each dataset scale, times every analyzer plus `POST /orders/` and
+`GET /orders/active`, and records:
+  - wall time   median (and min) of --repeat runs after one warm-up run,
+                which absorbs lazy backfills and model fits
+  - queries     SQL statements issued by one run (all three engines)
+  - peak KB     tracemalloc peak over one extra run (traced separately, since
+                tracing slows the code down)
+
+Results are compared with the baseline JSON checked in at
+execution/benchmarks/baseline.json (or --baseline); a target regresses when its
+median is more than --tolerance slower (and at least 5 ms), it issues more
+queries, or its peak memory grows more than --tolerance.
+
+Usage:
+    python execution/benchmark_analyzers.py                          # scales 0.25, 1, 4
+    python execution/benchmark_analyzers.py --scales 1,8 --repeat 3
+    python execution/benchmark_analyzers.py --save-baseline          # record the current numbers
+    python execution/benchmark_analyzers.py --fail-on-regression     # exit 1 on a regression (CI)
+    python execution/benchmark_analyzers.py --database-url postgresql://...   # an existing database
+
+Datasets come from execution/generate_benchmark_data.py: one restaurant with
+200 × scale orders/day over 180 days ending today. They are cached in
+.tmp/benchmark/ (one SQLite file per scale and day). Each dataset is measured
+in its own process, since the engine is bound to DATABASE_URL at import.
+Runs use a copy of the cached file; with --database-url the posted orders
+stay in that database.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import event
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+CACHE_DIR = os.path.join(ROOT, ".tmp", "benchmark")
+DEFAULT_BASELINE = os.path.join(ROOT, "execution", "benchmarks", "baseline.json")  # Tracked
+GENERATOR = os.path.join(ROOT, "execution", "generate_benchmark_data.py")
+SEED = 7
+NOISE_FLOOR_MS = 5.0  # Smaller slowdowns are timer noise, whatever the percentage
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# WORKER (one dataset, in its own process)
+# ─────────────────────────────────────────────────────────────────────────────
+class QueryCounter:
+    def __init__(self, engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def measure(fn, repeat: int, counter: QueryCounter) -> dict:
+    fn()  # Warm-up
+    times = []
+    for _ in range(repeat):
+        counter.count = 0
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    queries = counter.count
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_ms": round(statistics.median(times), 2),
+        "min_ms": round(min(times), 2),
+        "queries": queries,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_worker(repeat: int, restaurant_id: int = None) -> dict:
+    os.environ.setdefault("AI_SNAPSHOT_INTERVAL_SECONDS", "0")  # No background refreshes mid-measurement
+    sys.path.insert(0, os.path.join(ROOT, "backend"))
+    os.chdir(os.path.join(ROOT, "backend"))
+
+    from fastapi.testclient import TestClient
+    from database import SessionLocal, engine, async_engine, analyzer_engine, init_db
+    import models
+    from ai import menu_engineer, revenue_forecaster, kds_intelligence, inventory_predictor, reservation_optimizer, ops_manager
+    from ai.context import AnalysisContext
+    import main
+
+    analyzers = {
+        "menu_engineering": menu_engineer.get_menu_engineering,
+        "upsell_pairs": menu_engineer.get_upsell_pairs,
+        "revenue_forecast": revenue_forecaster.get_revenue_forecast,
+        "kds_intelligence": kds_intelligence.get_kds_intelligence,
+        "inventory_predictions": inventory_predictor.get_inventory_predictions,
+        "reservation_insights": reservation_optimizer.get_reservation_insights,
+        "dashboard": ops_manager.get_operations_dashboard,
+    }
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if restaurant_id:
+            restaurant = db.get(models.Restaurant, restaurant_id)
+        else:
+            restaurant = db.query(models.Restaurant).order_by(models.Restaurant.id).first()
+        if restaurant is None:
+            raise SystemExit("No restaurant to benchmark — generate data first (execution/generate_benchmark_data.py).")
+        restaurant_id = restaurant.id
+        user = db.query(models.User).filter(models.User.tenant_id == restaurant.tenant_id).first()
+        if user is None:
+            raise SystemExit(f"Restaurant {restaurant_id} has no user to call the routes as.")
+        menu_ids = [m.id for m in db.query(models.MenuItem.id).filter(
+            models.MenuItem.restaurant_id == restaurant_id, models.MenuItem.is_available == True,
+        ).order_by(models.MenuItem.id).limit(3)]
+        stats = {
+            "orders": db.query(models.Order).filter(models.Order.restaurant_id == restaurant_id).count(),
+            "menu_items": db.query(models.MenuItem).filter(models.MenuItem.restaurant_id == restaurant_id).count(),
+        }
+    finally:
+        db.close()
+
+    counter = QueryCounter([engine, async_engine.sync_engine, analyzer_engine])
+    results = {}
+    for name, fn in analyzers.items():
+        def run(fn=fn):
+            session = SessionLocal()
+            try:
+                fn(AnalysisContext(session, restaurant_id))
+            finally:
+                session.close()
+        results[name] = measure(run, repeat, counter)
+        print(f"  {name:<24} {results[name]['wall_ms']:>9.1f} ms", file=sys.stderr)
+
+    # Routes last: POST /orders/ adds orders, which would shift the analyzers' inputs
+    import auth
+    with TestClient(main.app) as client:
+        headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': user.email})}"}
+        payload = {"items": [{"menu_item_id": i, "quantity": 1} for i in menu_ids], "order_type": "dine_in"}
+        routes = {
+            "POST /orders/": lambda: client.post("/orders/", json=payload, headers=headers),
+            "GET /orders/active": lambda: client.get("/orders/active", headers=headers),
+        }
+        for name, request in routes.items():
+            def run(request=request, name=name):
+                response = request()
+                if response.status_code != 200:
+                    raise SystemExit(f"{name} returned {response.status_code}: {response.text[:200]}")
+            results[name] = measure(run, repeat, counter)
+            print(f"  {name:<24} {results[name]['wall_ms']:>9.1f} ms", file=sys.stderr)
+
+    return {"dataset": {"restaurant_id": restaurant_id, **stats}, "results": results}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# DRIVER
+# ─────────────────────────────────────────────────────────────────────────────
+def dataset_url(scale: float, regenerate: bool) -> str:
+    """SQLite dataset for `scale`, generated on first use (and again each day, as "today" moves).
+
+    Returns the URL of a fresh copy, so orders posted by one run never leak into the next.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"scale_{scale:g}_{datetime.utcnow():%Y-%m-%d}.db")
+    if regenerate and os.path.exists(path):
+        os.remove(path)
+    if not os.path.exists(path):
+        print(f"Generating scale {scale:g} dataset...")
+        subprocess.run(
+            [sys.executable, GENERATOR, "--scale", str(scale), "--restaurants", "1", "--seed", str(SEED)],
+            env={**os.environ, "DATABASE_URL": f"sqlite:///{path}"}, check=True, stdout=subprocess.DEVNULL,
+        )
+    run_path = os.path.join(CACHE_DIR, f"run_scale_{scale:g}.db")
+    shutil.copyfile(path, run_path)
+    return f"sqlite:///{run_path}"
+
+
+def run_dataset(url: str, repeat: int, restaurant_id: int = None) -> dict:
+    args = [sys.executable, os.path.abspath(__file__), "--worker", "--repeat", str(repeat)]
+    if restaurant_id:
+        args += ["--restaurant-id", str(restaurant_id)]
+    out = subprocess.run(args, env={**os.environ, "DATABASE_URL": url}, check=True, stdout=subprocess.PIPE, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(label: str, current: dict, baseline: dict, tolerance: float) -> list:
+    """Print one dataset's table; return the regressions found."""
+    regressions = []
+    base_results = (baseline or {}).get("results", {})
+    print(f"\n{label} — {current['dataset']['orders']:,} orders, {current['dataset']['menu_items']} menu items")
+    print(f"  {'target':<24} {'wall ms':>9} {'base':>9} {'Δ%':>7} {'queries':>8} {'base':>6} {'peak KB':>9} {'base':>9}")
+    for name, r in current["results"].items():
+        b = base_results.get(name)
+        flags = []
+        if b:
+            delta = (r["wall_ms"] - b["wall_ms"]) / b["wall_ms"] * 100 if b["wall_ms"] else 0.0
+            if r["wall_ms"] > b["wall_ms"] * (1 + tolerance) and r["wall_ms"] - b["wall_ms"] >= NOISE_FLOOR_MS:
+                flags.append("slower")
+            if r["queries"] > b["queries"]:
+                flags.append("more queries")
+            if r["peak_kb"] > b["peak_kb"] * (1 + tolerance):
+                flags.append("more memory")
+            base_cols = f"{b['wall_ms']:>9.1f} {delta:>+6.0f}% {r['queries']:>8} {b['queries']:>6} {r['peak_kb']:>9.0f} {b['peak_kb']:>9.0f}"
+        else:
+            base_cols = f"{'—':>9} {'':>7} {r['queries']:>8} {'—':>6} {r['peak_kb']:>9.0f} {'—':>9}"
+        print(f"  {name:<24} {r['wall_ms']:>9.1f} {base_cols}" + (f"  !! {', '.join(flags)}" if flags else ""))
+        regressions += [(label, name, flag) for flag in flags]
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", default="0.25,1,4", help="comma-separated dataset scales (default 0.25,1,4)")
+    parser.add_argument("--database-url", help="benchmark this database instead of generated datasets")
+    parser.add_argument("--restaurant-id", type=int, help="with --database-url; defaults to the first restaurant")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per target (default 5)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON (default execution/benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run's results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown / memory growth (default 0.2)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if any target regressed")
+    parser.add_argument("--regenerate", action="store_true", help="rebuild cached datasets")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.repeat, args.restaurant_id)))
+        return
+
+    if args.database_url:
+        datasets = {"database": args.database_url}
+    else:
+        datasets = {f"scale={float(s):g}": dataset_url(float(s), args.regenerate) for s in args.scales.split(",")}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("datasets", {})
+    elif not args.save_baseline:
+        print(f"No baseline at {args.baseline} — run with --save-baseline to record one.")
+
+    current = {}
+    regressions = []
+    for label, url in datasets.items():
+        print(f"\nBenchmarking {label}...")
+        current[label] = run_dataset(url, args.repeat, args.restaurant_id)
+        regressions += compare(label, current[label], baseline.get(label), args.tolerance)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"recorded_at": datetime.utcnow().isoformat(), "repeat": args.repeat, "datasets": current}, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+
+    print()
+    if regressions:
+        print(f"{len(regressions)} regression(s):")
+        for label, name, flag in regressions:
+            print(f"  {label} {name}: {flag}")
+        if args.fail_on_regression:
+            sys.exit(1)
+    elif baseline:
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
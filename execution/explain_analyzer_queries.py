@@ -0,0 +1,146 @@
+"""
+EXPLAIN every query the AI analyzers run.
+
+Runs each analyzer once against the configured DATABASE_URL, captures the
+SQL it issues, and prints the plan of each distinct statement. Full table
+scans (SQLite `SCAN <table>`, PostgreSQL `Seq Scan`) are flagged so a
+missing index shows up before it shows up as a slow dashboard.
+
+Usage:
+    python execution/explain_analyzer_queries.py [--restaurant-id N] [--only NAME] [--strict]
+
+--strict exits non-zero when a flagged scan hits one of the large tables.
+On small PostgreSQL tables the planner prefers a seq scan even with an
+index, so run that against realistic data.
+"""
+import argparse
+import os
+import re
+import sys
+
+# Add backend to path
+backend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, backend_dir)
+
+from sqlalchemy import event
+from database import SessionLocal, engine, init_db
+import models
+from ai import menu_engineer, revenue_forecaster, kds_intelligence, inventory_predictor, reservation_optimizer, ops_manager
+from ai.context import AnalysisContext
+
+ANALYZERS = {
+    "menu_engineering": menu_engineer.get_menu_engineering,
+    "upsell_pairs": menu_engineer.get_upsell_pairs,
+    "revenue_forecast": revenue_forecaster.get_revenue_forecast,
+    "kds_intelligence": kds_intelligence.get_kds_intelligence,
+    "inventory_predictions": inventory_predictor.get_inventory_predictions,
+    "reservation_insights": reservation_optimizer.get_reservation_insights,
+    "dashboard": lambda ctx: ops_manager.get_operations_dashboard(ctx, concurrent=False),
+}
+
+# Tables that grow with traffic; a full scan of one of these is a real problem
+LARGE_TABLES = {"orders", "order_items", "prep_times", "stock_movements", "reservations", "order_events"}
+
+
+def capture(fn, restaurant_id: int) -> list:
+    """Run one analyzer; return [statement, first parameters, times run] per distinct statement, in order."""
+    seen = {}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            seen.setdefault(statement, [statement, parameters, 0])[2] += 1
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    db = SessionLocal()
+    try:
+        fn(AnalysisContext(db, restaurant_id))
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", on_execute)
+    return list(seen.values())
+
+
+def explain(statement: str, parameters) -> list:
+    """Plan lines for one statement, in the dialect's own format."""
+    postgres = engine.dialect.name == "postgresql"
+    prefix = "EXPLAIN " if postgres else "EXPLAIN QUERY PLAN "
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+    if postgres:
+        return [r[0] for r in rows]
+    # SQLite rows are (id, parent, notused, detail); indent by depth
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def full_scans(plan: list) -> list:
+    """Tables read end to end without an index."""
+    tables = []
+    for line in plan:
+        line = line.strip()
+        m = re.match(r"SCAN (?:TABLE )?(\w+)(.*)", line)  # SQLite
+        if m and "INDEX" not in m.group(2):
+            tables.append(m.group(1))
+        m = re.search(r"Seq Scan on (\w+)", line)  # PostgreSQL
+        if m:
+            tables.append(m.group(1))
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--restaurant-id", type=int, help="defaults to the first restaurant")
+    parser.add_argument("--only", choices=sorted(ANALYZERS), help="explain one analyzer")
+    parser.add_argument("--strict", action="store_true", help="exit 1 on full scans of large tables")
+    args = parser.parse_args()
+
+    init_db()  # Same as app startup: rollup/cache tables exist before the analyzers need them
+
+    restaurant_id = args.restaurant_id
+    if restaurant_id is None:
+        db = SessionLocal()
+        restaurant = db.query(models.Restaurant).order_by(models.Restaurant.id).first()
+        db.close()
+        if restaurant is None:
+            print("No restaurants in the database — seed it first (execution/seed_demo_data.py).")
+            sys.exit(1)
+        restaurant_id = restaurant.id
+
+    print(f"Database: {engine.dialect.name} — restaurant {restaurant_id}\n")
+    flagged = []
+    names = [args.only] if args.only else list(ANALYZERS)
+    for name in names:
+        statements = capture(ANALYZERS[name], restaurant_id)
+        print("=" * 78)
+        print(f"{name}: {len(statements)} distinct queries")
+        print("=" * 78)
+        for i, (statement, parameters, runs) in enumerate(statements, 1):
+            plan = explain(statement, parameters)
+            scans = full_scans(plan)
+            times = f" (x{runs})" if runs > 1 else ""
+            print(f"\n[{name} #{i}]{times} {' '.join(statement.split())[:200]}")
+            for line in plan:
+                print(f"    {line}")
+            large = sorted(set(scans) & LARGE_TABLES)
+            if large:
+                print(f"    !! full scan of {', '.join(large)}")
+                flagged.append((name, i, large))
+        print()
+
+    print("-" * 78)
+    if flagged:
+        print(f"{len(flagged)} queries scan a large table end to end:")
+        for name, i, tables in flagged:
+            print(f"  {name} #{i}: {', '.join(tables)}")
+    else:
+        print("No full scans of large tables.")
+    if args.strict and flagged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+"""
+Benchmark Data Generator
+Synthetic restaurant history at any volume, for judging analytics changes
+against realistic data instead of the 30-day demo seed.
+
+Scale factor 1 is one restaurant with 180 days of ~200 orders/day (~36k
+orders, ~90k order items); volume grows linearly with the factor, spread over
+floor(F) restaurants. Any dimension can be set directly instead.
+
+Usage:
+    python execution/generate_benchmark_data.py --scale 1
+    python execution/generate_benchmark_data.py --scale 200 --reset          # ~18M order items
+    python execution/generate_benchmark_data.py --restaurants 3 --days 365 --orders-per-day 400 --menu-size 80
+
+Output is deterministic for a given --seed and --end-date (default today).
+Orders, items, prep times, stock movements and reservations are streamed
+in batches with explicit ids: PostgreSQL COPY, executemany elsewhere. The
+rollups and timing sketches are then rebuilt so the analyzers read steady
+state (--skip-rollups leaves them to the lazy backfill).
+
+Each restaurant gets its own tenant; log in as bench<restaurant id>@leviii.ai
+with password bench123.
+"""
+import argparse
+import csv
+import io
+import math
+import os
+import random
+import sys
+import time as clock
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+# Add backend to path
+backend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, backend_dir)
+
+from database import SessionLocal, engine, init_db
+import models
+from models import Base
+from auth import get_password_hash
+from ai import rollups, sketches
+from ai.timebuckets import UTC_OFFSET, local_today
+
+BASE_DAYS = 180
+BASE_ORDERS_PER_DAY = 200
+BASE_MENU_SIZE = 40
+PASSWORD = "bench123"
+
+# Relative order volume by weekday (Monday first) and by local hour
+WEEKDAY_LOAD = [0.8, 0.85, 0.9, 1.0, 1.25, 1.4, 1.2]
+HOUR_LOAD = {
+    7: 2, 8: 3, 9: 3, 10: 4, 11: 8, 12: 14, 13: 13, 14: 7, 15: 4, 16: 4,
+    17: 6, 18: 10, 19: 14, 20: 13, 21: 8, 22: 4, 23: 2,
+}
+
+# Distinct menu items per order and portions per line (cumulative weights)
+LINES, LINE_WEIGHTS = [1, 2, 3, 4, 5, 6], [25, 55, 77, 89, 96, 100]
+QUANTITIES, QUANTITY_WEIGHTS = [1, 2, 3], [80, 95, 100]
+
+# (category, share of menu, price range KES, cost ratio range, station, prep minutes)
+CATEGORIES = [
+    ("Starters", 0.2, (300, 700), (0.2, 0.35), "fryer", 10),
+    ("Main", 0.35, (700, 1800), (0.3, 0.45), "grill", 20),
+    ("Sides", 0.15, (50, 400), (0.15, 0.3), "main", 8),
+    ("Beverages", 0.2, (150, 500), (0.2, 0.5), "drinks", 3),
+    ("Desserts", 0.1, (300, 700), (0.25, 0.35), "main", 5),
+]
+DISH_NAMES = {
+    "Starters": ["Spring Rolls", "Samosa", "Soup of the Day", "Caesar Salad", "Chicken Wings", "Bruschetta"],
+    "Main": ["Nyama Choma", "Chicken Tikka", "Grilled Fish", "Beef Burger", "Pilau", "Biryani", "Goat Stew"],
+    "Sides": ["Chapati", "Ugali", "French Fries", "Kachumbari", "Sukuma Wiki", "Rice"],
+    "Beverages": ["Fruit Juice", "Tusker Beer", "Soda", "Mocktail", "Chai", "Coffee", "Water"],
+    "Desserts": ["Chocolate Cake", "Ice Cream", "Tiramisu", "Fruit Salad", "Mandazi"],
+}
+# (name, unit, cost per unit KES, shelf life days)
+INGREDIENTS = [
+    ("Beef", "kg", 800, 7), ("Chicken", "kg", 600, 5), ("Fish", "kg", 900, 3), ("Goat", "kg", 950, 5),
+    ("Rice", "kg", 200, 90), ("Flour", "kg", 150, 60), ("Maize Meal", "kg", 120, 90),
+    ("Cooking Oil", "litres", 300, 180), ("Tomatoes", "kg", 100, 5), ("Onions", "kg", 80, 14),
+    ("Potatoes", "kg", 120, 21), ("Lettuce", "heads", 50, 4), ("Sukuma", "bunches", 30, 3),
+    ("Milk", "litres", 120, 5), ("Eggs", "trays", 450, 21), ("Sugar", "kg", 160, 365),
+    ("Tea Leaves", "kg", 600, 365), ("Coffee Beans", "kg", 1500, 120), ("Fruit", "kg", 150, 5),
+    ("Beer Stock", "bottles", 180, 365), ("Soda Stock", "bottles", 60, 365), ("Chocolate", "kg", 1200, 90),
+    ("Ice Cream Base", "litres", 500, 30), ("Spices", "kg", 900, 180),
+]
+
+NULL = "\\N"  # COPY's NULL marker
+
+# Streamed tables: column order of the generated tuples
+COLUMNS = {
+    "orders": ["id", "restaurant_id", "status", "order_type", "delivery_channel", "payment_method", "is_paid",
+               "table_number", "customer_name", "customer_phone", "total", "notes", "created_at", "completed_at"],
+    "order_items": ["id", "order_id", "menu_item_id", "quantity", "unit_price"],
+    "prep_times": ["id", "order_item_id", "station", "started_at", "completed_at", "actual_minutes"],
+    "stock_movements": ["id", "inventory_item_id", "movement_type", "quantity", "reason", "created_at"],
+    "reservations": ["id", "restaurant_id", "table_id", "customer_name", "customer_phone", "customer_email",
+                     "party_size", "reservation_date", "reservation_time", "duration_minutes", "status",
+                     "deposit_paid", "notes", "created_at"],
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BULK WRITER
+# ─────────────────────────────────────────────────────────────────────────────
+class BulkWriter:
+    """Buffers row tuples per table and writes them in batches on one raw connection.
+
+    Enums are written as their names (what SQLAlchemy stores); ids are
+    assigned here, continuing from the current maximum of each table.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self.conn = engine.raw_connection()
+        self.postgres = engine.dialect.name == "postgresql"
+        self.buffers = defaultdict(list)
+        self.counts = defaultdict(int)
+        self.next_id = {}
+        cursor = self.conn.cursor()
+        for table in COLUMNS:
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+            self.next_id[table] = cursor.fetchone()[0] + 1
+        if not self.postgres:
+            cursor.execute("PRAGMA synchronous = OFF")  # Load speed over durability; the data is disposable
+        cursor.close()
+
+    def new_id(self, table: str) -> int:
+        value = self.next_id[table]
+        self.next_id[table] += 1
+        return value
+
+    def add(self, table: str, row: tuple):
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(table)
+
+    def flush(self, table: str = None):
+        for name in [table] if table else list(self.buffers):
+            rows = self.buffers[name]
+            if not rows:
+                continue
+            if self.postgres:
+                self._copy(name, rows)
+            else:
+                self._executemany(name, rows)
+            self.counts[name] += len(rows)
+            self.buffers[name] = []
+
+    def _copy(self, table: str, rows: list):
+        buf = io.StringIO()
+        # NULL as \N, so an empty field stays an empty string
+        csv.writer(buf).writerows(tuple(NULL if v is None else v for v in row) for row in rows)
+        buf.seek(0)
+        cursor = self.conn.cursor()
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(COLUMNS[table])}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')", buf,
+        )
+        cursor.close()
+
+    def _executemany(self, table: str, rows: list):
+        columns = COLUMNS[table]
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [tuple(_sqlite_value(v) for v in row) for row in rows],
+        )
+        cursor.close()
+
+    def commit(self):
+        self.flush()
+        self.conn.commit()
+
+    def close(self):
+        if self.postgres:
+            # Explicit ids bypass the sequences; move them past the loaded rows
+            cursor = self.conn.cursor()
+            for table in COLUMNS:
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                )
+            cursor.close()
+            self.conn.commit()
+        self.conn.close()
+
+
+def _sqlite_value(value):
+    """Values in SQLAlchemy's SQLite storage formats (the stdlib adapters drop zero microseconds)."""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, time):
+        return value.strftime("%H:%M:%S.%f")
+    return value
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# MASTER DATA (small — written through the ORM)
+# ─────────────────────────────────────────────────────────────────────────────
+def create_restaurant(db, rng: random.Random, index: int, menu_size: int, password_hash: str) -> dict:
+    """Tenant, admin user, restaurant, tables, menu, inventory and recipes for one restaurant."""
+    tenant = models.Tenant(name=f"Benchmark Restaurant {index + 1}", plan="premium")
+    db.add(tenant)
+    db.flush()
+    restaurant = models.Restaurant(tenant_id=tenant.id, name=f"Bench Kitchen {index + 1}", address="Nairobi, Kenya")
+    db.add(restaurant)
+    db.flush()
+    db.add(models.User(
+        tenant_id=tenant.id, email=f"bench{restaurant.id}@leviii.ai",
+        hashed_password=password_hash, role=models.Role.ADMIN,
+    ))
+
+    tables = [
+        models.Table(restaurant_id=restaurant.id, table_number=i, capacity=rng.choice([2, 4, 4, 6, 6, 8]))
+        for i in range(1, max(8, menu_size // 3) + 1)
+    ]
+    db.add_all(tables)
+
+    menu = []
+    for category, share, (low, high), (cost_low, cost_high), station, prep in CATEGORIES:
+        names = DISH_NAMES[category]
+        for k in range(max(1, round(menu_size * share))):
+            price = rng.randrange(low, high + 1, 50) * 100
+            base = names[k % len(names)]
+            menu.append(models.MenuItem(
+                restaurant_id=restaurant.id,
+                name=base if k < len(names) else f"{base} {k // len(names) + 1}",
+                description=f"House {base.lower()}",
+                price=price,
+                cost_price=int(price * rng.uniform(cost_low, cost_high)),
+                category=category,
+                prep_station=station,
+                avg_prep_minutes=float(max(1, round(prep * rng.uniform(0.7, 1.4)))),
+                is_available=rng.random() > 0.03,
+            ))
+    db.add_all(menu)
+
+    inventory = []
+    for k in range(max(10, menu_size // 2)):
+        name, unit, cost, shelf_life = INGREDIENTS[k % len(INGREDIENTS)]
+        inventory.append(models.InventoryItem(
+            restaurant_id=restaurant.id,
+            item_name=name if k < len(INGREDIENTS) else f"{name} {k // len(INGREDIENTS) + 1}",
+            quantity=0, unit=unit, cost_per_unit=cost,
+            low_stock_threshold=rng.choice([3, 5, 10, 20]), expiry_days=shelf_life,
+        ))
+    db.add_all(inventory)
+    db.flush()
+
+    recipes = defaultdict(list)  # menu item id → [(inventory item id, qty per portion)]
+    for item in menu:
+        for ingredient in rng.sample(inventory, rng.randint(1, min(4, len(inventory)))):
+            qty = round(rng.uniform(0.05, 0.4), 2)
+            recipes[item.id].append((ingredient.id, qty))
+            db.add(models.Recipe(
+                restaurant_id=restaurant.id, menu_item_id=item.id,
+                inventory_item_id=ingredient.id, quantity=qty,
+            ))
+
+    # Popularity: Zipf-like weights over a shuffled menu, so there are clear stars and dogs
+    ranked = menu[:]
+    rng.shuffle(ranked)
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(ranked))]
+    db.commit()
+    return {
+        "id": restaurant.id,
+        "tables": [(t.id, t.table_number, t.capacity) for t in tables],
+        "menu": [(m.id, m.price, m.prep_station, m.avg_prep_minutes) for m in ranked],
+        "cum_weights": list(_accumulate(weights)),
+        "inventory": [i.id for i in inventory],
+        "recipes": recipes,
+    }
+
+
+def _accumulate(values):
+    total = 0
+    for v in values:
+        total += v
+        yield total
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# HISTORY (streamed)
+# ─────────────────────────────────────────────────────────────────────────────
+def generate_history(writer: BulkWriter, rng: random.Random, r: dict, days: int, orders_per_day: int,
+                     end_day: date, now: datetime) -> int:
+    """Orders with items and prep times, daily stock movements and reservations. Returns orders written."""
+    hours, hour_weights = list(HOUR_LOAD), list(_accumulate(HOUR_LOAD.values()))
+    mean_load = sum(WEEKDAY_LOAD) / len(WEEKDAY_LOAD)
+    table_numbers = [number for _, number, _ in r["tables"]]
+    usage_estimate = defaultdict(float)
+    written = 0
+
+    for offset in range(days - 1, -1, -1):
+        day = end_day - timedelta(days=offset)
+        is_today = offset == 0
+        growth = 1 + 0.15 * (days - offset) / days  # Gentle upward trend over the period
+        count = orders_per_day * WEEKDAY_LOAD[day.weekday()] / mean_load * growth * rng.gauss(1, 0.1)
+        used = defaultdict(float)
+
+        for _ in range(max(0, round(count))):
+            hour = rng.choices(hours, cum_weights=hour_weights)[0]
+            local = datetime.combine(day, time(hour, rng.randrange(60), rng.randrange(60)))
+            created_at = local - UTC_OFFSET
+            if created_at > now:
+                continue  # Today's orders stop at the current time
+            age_minutes = (now - created_at).total_seconds() / 60
+            if is_today and age_minutes < 15:
+                status = rng.choice(["PENDING", "PREP"])
+            elif is_today and age_minutes < 40:
+                status = rng.choice(["PREP", "READY", "SERVED"])
+            else:
+                status = "CANCELLED" if rng.random() < 0.05 else "SERVED"
+            order_type = rng.choices(["DINE_IN", "TAKEOUT", "DELIVERY"], [60, 25, 15])[0]
+            channel = {
+                "DINE_IN": "WALK_IN",
+                "TAKEOUT": rng.choice(["WALK_IN", "APP"]),
+                "DELIVERY": rng.choice(["UBER_EATS", "BOLT_FOOD", "GLOVO", "APP"]),
+            }[order_type]
+            payment = "PENDING" if status in ("PENDING", "PREP") else rng.choices(["MPESA", "CASH", "CARD"], [60, 25, 15])[0]
+            completed_at = None
+            if status == "SERVED":
+                completed_at = min(now, created_at + timedelta(minutes=max(5.0, rng.gauss(25, 8))))
+
+            order_id = writer.new_id("orders")
+            total = 0
+            picks = rng.choices(r["menu"], cum_weights=r["cum_weights"], k=rng.choices(LINES, cum_weights=LINE_WEIGHTS)[0])
+            for menu_item_id, price, station, prep in dict.fromkeys(picks):  # Distinct, first-pick order
+                qty = rng.choices(QUANTITIES, cum_weights=QUANTITY_WEIGHTS)[0]
+                total += qty * price
+                item_id = writer.new_id("order_items")
+                writer.add("order_items", (item_id, order_id, menu_item_id, qty, price))
+                if status in ("READY", "SERVED"):
+                    minutes = round(max(1.0, prep * rng.uniform(0.8, 1.3) + rng.gauss(0, prep * 0.15)), 1)
+                    writer.add("prep_times", (
+                        writer.new_id("prep_times"), item_id, station,
+                        created_at, created_at + timedelta(minutes=minutes), minutes,
+                    ))
+                if status != "CANCELLED":
+                    for inventory_item_id, per_portion in r["recipes"].get(menu_item_id, ()):
+                        used[inventory_item_id] += per_portion * qty
+
+            writer.add("orders", (
+                order_id, r["id"], status, order_type, channel, payment, payment != "PENDING",
+                rng.choice(table_numbers) if order_type == "DINE_IN" else None,
+                f"Customer_{rng.randint(100, 9999)}", f"+2547{rng.randint(10000000, 99999999)}",
+                total, "", created_at, completed_at,
+            ))
+            written += 1
+
+        # Stock: one sale movement per ingredient-day, occasional waste, weekly restocks
+        day_end = min(now, datetime.combine(day, time(23, 0)) - UTC_OFFSET)
+        for k, inventory_item_id in enumerate(r["inventory"]):
+            qty = used.get(inventory_item_id, 0.0)
+            usage_estimate[inventory_item_id] = 0.8 * usage_estimate[inventory_item_id] + 0.2 * qty
+            if qty:
+                writer.add("stock_movements", (
+                    writer.new_id("stock_movements"), inventory_item_id, "OUT", round(qty, 2), "sale", day_end,
+                ))
+            if rng.random() < 0.03:
+                writer.add("stock_movements", (
+                    writer.new_id("stock_movements"), inventory_item_id, "OUT",
+                    round(max(0.1, qty * rng.uniform(0.05, 0.3)), 2), "waste — spoiled", day_end,
+                ))
+            if (day.toordinal() + k) % 7 == 0:
+                writer.add("stock_movements", (
+                    writer.new_id("stock_movements"), inventory_item_id, "IN",
+                    round(max(1.0, usage_estimate[inventory_item_id] * 7 * rng.uniform(0.9, 1.3)), 1),
+                    "purchase", datetime.combine(day, time(8, 0)) - UTC_OFFSET,
+                ))
+
+        _reservations(writer, rng, r, day, max(2, orders_per_day // 15), completed=True)
+
+    # A week of upcoming bookings
+    for ahead in range(1, 8):
+        _reservations(writer, rng, r, end_day + timedelta(days=ahead), max(2, orders_per_day // 20), completed=False)
+
+    r["usage_estimate"] = usage_estimate
+    return written
+
+
+def _reservations(writer: BulkWriter, rng: random.Random, r: dict, day: date, per_day: int, completed: bool):
+    for _ in range(rng.randint(per_day // 2, per_day + per_day // 2)):
+        table_id, _, capacity = rng.choice(r["tables"])
+        if completed:
+            status = rng.choices(["COMPLETED", "NO_SHOW", "CANCELLED"], [78, 12, 10])[0]
+        else:
+            status = rng.choices(["CONFIRMED", "CANCELLED"], [92, 8])[0]
+        writer.add("reservations", (
+            writer.new_id("reservations"), r["id"], table_id,
+            f"Guest_{rng.randint(100, 9999)}", f"+2547{rng.randint(10000000, 99999999)}", "",
+            rng.randint(1, capacity), day, time(rng.choice([12, 13, 18, 19, 20, 21]), rng.choice([0, 30])),
+            rng.choice([60, 90, 120]), status, rng.random() < 0.3, "",
+            datetime.combine(day, time(9, 0)) - timedelta(days=rng.randint(0, 14)) - UTC_OFFSET,
+        ))
+
+
+def finish_restaurant(db, rng: random.Random, r: dict, skip_rollups: bool):
+    """Current stock levels (1-14 days of cover) and, unless skipped, the derived tables."""
+    for inventory_item_id in r["inventory"]:
+        cover = rng.choice([0.5, 1, 2, 4, 7, 10, 14])
+        db.query(models.InventoryItem).filter(models.InventoryItem.id == inventory_item_id).update(
+            {"quantity": round(r["usage_estimate"].get(inventory_item_id, 0.0) * cover, 1)},
+            synchronize_session=False,
+        )
+    if not skip_rollups:
+        rollups.rebuild_revenue_rollups(db, r["id"])
+        rollups.rebuild_pair_counts(db, r["id"])
+        rollups.rebuild_stock_rollups(db, r["id"])
+        sketches.rebuild_timing_sketches(db, r["id"])
+    db.commit()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ENTRY POINT
+# ─────────────────────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="volume multiplier (default 1)")
+    parser.add_argument("--restaurants", type=int, help="default floor(scale), at least 1")
+    parser.add_argument("--days", type=int, default=BASE_DAYS, help=f"days of history (default {BASE_DAYS})")
+    parser.add_argument("--orders-per-day", type=int, help="average per restaurant (default from scale)")
+    parser.add_argument("--menu-size", type=int, default=BASE_MENU_SIZE, help=f"menu items per restaurant (default {BASE_MENU_SIZE})")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", type=date.fromisoformat, help="last local day (default today); today's orders stop at now")
+    parser.add_argument("--batch-size", type=int, default=20000, help="rows per COPY / executemany")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate every table first")
+    parser.add_argument("--skip-rollups", action="store_true", help="leave rollups and sketches to the lazy backfill")
+    args = parser.parse_args()
+
+    restaurants = args.restaurants or max(1, math.floor(args.scale))
+    orders_per_day = args.orders_per_day or max(1, round(BASE_ORDERS_PER_DAY * args.scale / restaurants))
+    now = datetime.utcnow()
+    end_day = args.end_date or local_today(now)
+    if args.end_date:
+        now = datetime.combine(end_day, time(21, 0)) - UTC_OFFSET  # A fixed "now" keeps the output reproducible
+
+    if args.reset:
+        print("Dropping and recreating all tables...")
+        Base.metadata.drop_all(bind=engine)
+    init_db()
+
+    print(f"Database: {engine.dialect.name} — {restaurants} restaurant(s) × {args.days} days × "
+          f"~{orders_per_day} orders/day, {args.menu_size} menu items, seed {args.seed}")
+    password_hash = get_password_hash(PASSWORD)
+    started = clock.perf_counter()
+    writer = BulkWriter(args.batch_size)
+    total_orders = 0
+    try:
+        for index in range(restaurants):
+            rng = random.Random(f"{args.seed}:{index}")
+            db = SessionLocal()
+            try:
+                r = create_restaurant(db, rng, index, args.menu_size, password_hash)
+                t = clock.perf_counter()
+                n = generate_history(writer, rng, r, args.days, orders_per_day, end_day, now)
+                writer.commit()
+                t_rollups = clock.perf_counter()
+                finish_restaurant(db, rng, r, args.skip_rollups)
+                total_orders += n
+                print(f"  restaurant {r['id']}: {n:,} orders in {t_rollups - t:.1f}s"
+                      + ("" if args.skip_rollups else f", rollups {clock.perf_counter() - t_rollups:.1f}s")
+                      + f" — login bench{r['id']}@leviii.ai / {PASSWORD}")
+            finally:
+                db.close()
+    finally:
+        writer.close()
+
+    elapsed = clock.perf_counter() - started
+    print(f"\nDone in {elapsed:.1f}s — {total_orders:,} orders")
+    for table in COLUMNS:
+        print(f"  {table:<16} {writer.counts[table]:>12,} rows")
+    items = writer.counts["order_items"]
+    print(f"  {items / max(elapsed, 1e-9):,.0f} order items/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useState, useCallback } from "react";
-import api from "@/lib/api";
+import api, { API_BASE_URL } from "@/lib/api";
 import { motion, AnimatePresence } from "framer-motion";
 import {
     Clock,
@@ -36,6 +36,17 @@ interface Order {
     items: OrderItem[];
 }
 
+const ACTIVE_STATUSES = ["pending", "prep", "ready"];
+
+// Apply a pushed order to the board: upsert while active, drop once served/cancelled
+const applyOrder = (orders: Order[], order: Order): Order[] => {
+    const rest = orders.filter((o) => o.id !== order.id);
+    if (!ACTIVE_STATUSES.includes(order.status)) return rest;
+    return [...rest, order].sort(
+        (a, b) => new Date(a.created_at).getTime() - new Date(b.created_at).getTime()
+    );
+};
+
 export default function KitchenPage() {
     const [orders, setOrders] = useState<Order[]>([]);
     const [loading, setLoading] = useState(true);
@@ -51,17 +62,47 @@ export default function KitchenPage() {
         setLoading(false);
     }, []);
 
+    // Live feed: a snapshot of active orders, then one event per created/status-changed order
     useEffect(() => {
-        fetchOrders();
-        const interval = setInterval(fetchOrders, 10000); // Refresh every 10s
-        return () => clearInterval(interval);
+        const token = localStorage.getItem("access_token");
+        if (!token) {
+            fetchOrders();
+            return;
+        }
+        let source: EventSource | null = null;
+        let retry: ReturnType<typeof setTimeout> | null = null;
+
+        const connect = () => {
+            source = new EventSource(`${API_BASE_URL}/orders/stream?token=${encodeURIComponent(token)}`);
+            source.addEventListener("snapshot", (e) => {
+                setOrders(JSON.parse((e as MessageEvent).data));
+                setLoading(false);
+            });
+            source.addEventListener("order", (e) => {
+                const { order } = JSON.parse((e as MessageEvent).data);
+                setOrders((prev) => applyOrder(prev, order));
+            });
+            source.onerror = () => {
+                // EventSource retries on its own unless the server refused the stream (e.g. expired token)
+                if (source?.readyState === EventSource.CLOSED) {
+                    fetchOrders(); // Redirects to login on 401
+                    retry = setTimeout(connect, 5000);
+                }
+            };
+        };
+        connect();
+
+        return () => {
+            source?.close();
+            if (retry) clearTimeout(retry);
+        };
     }, [fetchOrders]);
 
     const moveOrder = async (orderId: number, newStatus: string) => {
         setUpdating(orderId);
         try {
-            await api.patch(`/orders/${orderId}/status`, { status: newStatus });
-            await fetchOrders();
+            const res = await api.patch(`/orders/${orderId}/status`, { status: newStatus });
+            setOrders((prev) => applyOrder(prev, res.data));
         } catch (err) {
             console.error("Failed to update order:", err);
         }
@@ -9,18 +9,34 @@ export default function OrdersPage() {
     const [orders, setOrders] = useState<any[]>([]);
     const [aiData, setAiData] = useState<any>(null);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         Promise.all([
-            api.get("/orders/").catch(() => ({ data: [] })),
+            api.get("/orders/").catch(() => ({ data: [], headers: {} as any })),
             api.get("/ai/revenue-forecast").catch(() => ({ data: null })),
         ]).then(([ordersRes, aiRes]) => {
             setOrders(Array.isArray(ordersRes.data) ? ordersRes.data : []);
+            setNextCursor(ordersRes.headers?.["x-next-cursor"] || null);
             setAiData(aiRes.data);
             setLoading(false);
         });
     }, []);
 
+    // Older history, one page at a time (keyset cursor from the previous page)
+    const loadMore = () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        api.get("/orders/", { params: { cursor: nextCursor } })
+            .then((res) => {
+                setOrders((prev) => [...prev, ...(Array.isArray(res.data) ? res.data : [])]);
+                setNextCursor(res.headers["x-next-cursor"] || null);
+            })
+            .catch(() => {})
+            .finally(() => setLoadingMore(false));
+    };
+
     if (loading) {
         return (
             <div className="space-y-3">
@@ -175,7 +191,7 @@ export default function OrdersPage() {
                             };
                             return (
                                 <motion.div key={order.id || i} initial={{ opacity: 0 }} animate={{ opacity: 1 }}
-                                    transition={{ delay: i * 0.03 }}
+                                    transition={{ delay: Math.min(i, 20) * 0.03 }}
                                     className="px-4 py-3 flex items-center justify-between hover:bg-[#1a1a1a] transition-colors">
                                     <div className="flex items-center gap-3">
                                         <span className="text-sm font-mono text-[#525252]">#{order.id}</span>
@@ -197,6 +213,12 @@ export default function OrdersPage() {
                         })}
                     </div>
                 )}
+                {nextCursor && (
+                    <button onClick={loadMore} disabled={loadingMore}
+                        className="w-full px-4 py-3 border-t border-[#1a1a1a] text-xs text-[#737373] hover:text-[#e5e5e5] hover:bg-[#1a1a1a] transition-colors disabled:opacity-50">
+                        {loadingMore ? "Loading…" : "Load older orders"}
+                    </button>
+                )}
             </div>
         </div>
     );